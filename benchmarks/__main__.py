@@ -0,0 +1,58 @@
+# -*- coding: future_fstrings -*-
+"""
+Runs the benchmark suites and writes their results as json.
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --output current.json --baseline previous.json --threshold 0.2
+
+With a baseline, every benchmark whose median slowed down by more than the threshold is reported and the exit status
+is 1, so a release pipeline can fail on performance regressions.
+"""
+import argparse
+import sys
+
+from . import harness, parsing, throughput, transport
+
+SUITES = {
+    parsing.SUITE: parsing.run,
+    throughput.SUITE: throughput.run,
+    transport.SUITE: transport.run,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Runs the pypowerbi benchmarks')
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES), help='suite to run; defaults to all')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies the amount of work per benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='timed repeats per benchmark')
+    parser.add_argument('--output', help='path to write the json results to')
+    parser.add_argument('--baseline', help='path of earlier json results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown of the median counted as a regression; defaults to 0.2')
+    arguments = parser.parse_args(argv)
+
+    results = []
+    for suite in arguments.suite or sorted(SUITES):
+        for result in SUITES[suite](scale=arguments.scale, repeat=arguments.repeat):
+            print(harness.format_result(result))
+            results.append(result)
+
+    if arguments.output:
+        harness.write_results(results, arguments.output)
+
+    if arguments.baseline:
+        regressed = False
+        for suite, name, before, after, change, is_regression in harness.compare(
+                harness.read_results(arguments.baseline), results, arguments.threshold):
+            marker = 'REGRESSION' if is_regression else ''
+            print(f'{suite + "." + name:<45} {before * 1e3:10.3f} ms -> {after * 1e3:10.3f} ms {change:+8.1%} {marker}')
+            regressed = regressed or is_regression
+
+        if regressed:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# -*- coding: future_fstrings -*-
+"""
+Timing, result and comparison helpers shared by the benchmark suites. Results are plain dicts written as json, so runs
+from different releases can be compared with compare().
+"""
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+
+
+def measure(suite, name, func, number=1, repeat=5, items=None, warmup=1):
+    """Times func and returns a result dict
+
+    :param suite: The suite the benchmark belongs to
+    :param name: The benchmark name, unique within the suite
+    :param func: The callable to time, taking no arguments
+    :param number: The number of calls per timed repeat
+    :param repeat: The number of timed repeats
+    :param items: The number of items (rows, models, requests) a single call processes, for a throughput figure
+    :param warmup: The number of untimed calls made first
+    :return: The result, with per call timings in seconds
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = [x / number for x in timeit.repeat(func, number=number, repeat=repeat)]
+
+    result = {
+        'suite': suite,
+        'name': name,
+        'number': number,
+        'repeat': repeat,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+    if items is not None:
+        result['items'] = items
+        result['items_per_second'] = items / result['median'] if result['median'] else None
+
+    return result
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              check=True, universal_newlines=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Describes the machine and interpreter the benchmarks ran on"""
+    return {
+        'timestamp': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'revision': _git_revision(),
+    }
+
+
+def write_results(results, path):
+    """Writes results with the environment they ran in as a json document"""
+    with open(path, 'w') as results_file:
+        json.dump({'environment': environment(), 'results': results}, results_file, indent=2)
+
+
+def read_results(path):
+    with open(path) as results_file:
+        return json.load(results_file)['results']
+
+
+def compare(baseline, results, threshold=0.2):
+    """Compares results against a baseline run
+
+    :param baseline: The baseline results
+    :param results: The current results
+    :param threshold: The relative slowdown of the median beyond which a benchmark counts as regressed
+    :return: A list of (suite, name, baseline median, current median, relative change, regressed) tuples for the
+     benchmarks present in both runs
+    """
+    baseline_medians = {(x['suite'], x['name']): x['median'] for x in baseline}
+
+    comparisons = []
+    for result in results:
+        key = (result['suite'], result['name'])
+        if key not in baseline_medians:
+            continue
+
+        before = baseline_medians[key]
+        change = (result['median'] - before) / before if before else 0.0
+        comparisons.append((result['suite'], result['name'], before, result['median'], change, change > threshold))
+
+    return comparisons
+
+
+def format_result(result):
+    line = f"{result['suite'] + '.' + result['name']:<45} median {result['median'] * 1e3:10.3f} ms"
+    if result.get('items_per_second'):
+        line += f"  {result['items_per_second']:14,.0f} items/s"
+
+    return line
@@ -0,0 +1,84 @@
+# -*- coding: future_fstrings -*-
+"""
+Measures the memory footprint and construction time of the slotted models against equivalent __dict__ based
+models. Run with: python -m benchmarks.models
+"""
+import timeit
+import tracemalloc
+
+from pypowerbi.dataset import Dataset, Column
+from pypowerbi.report import Report
+from pypowerbi.gateway import GatewayDatasource
+from pypowerbi.enums import CredentialType
+
+
+def dict_based(model_class):
+    """Creates a plain class sharing the model's __init__, so its attributes land in a per-instance __dict__"""
+    return type(f'Dict{model_class.__name__}', (), {'__init__': model_class.__init__})
+
+
+def make_dataset(model_class, i):
+    return model_class(f'dataset {i}', f'00000000-0000-0000-0000-{i:012d}', add_rows_api_enabled=False,
+                       configured_by='someone@somecompany.com', is_refreshable=True)
+
+
+def make_report(model_class, i):
+    return model_class(f'00000000-0000-0000-0000-{i:012d}', f'report {i}', 'https://app.powerbi.com/',
+                       'https://app.powerbi.com/reportEmbed', f'00000000-0000-0000-0000-{i:012d}')
+
+
+def make_column(model_class, i):
+    return model_class(f'column {i}', 'Int64')
+
+
+def make_datasource(model_class, i):
+    return model_class(f'{i}', '00000000-0000-0000-0000-000000000000', CredentialType.BASIC, f'datasource {i}',
+                       'Sql', '{"server":"a","database":"b"}')
+
+
+CASES = [
+    (Dataset, make_dataset),
+    (Report, make_report),
+    (Column, make_column),
+    (GatewayDatasource, make_datasource),
+]
+
+
+def measure_memory(factory, model_class, count):
+    tracemalloc.start()
+    instances = [factory(model_class, i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+    return size
+
+
+def measure_construction(factory, model_class, count, repeat):
+    return min(timeit.repeat(lambda: [factory(model_class, i) for i in range(count)], number=1, repeat=repeat))
+
+
+def run(count=100000, repeat=5):
+    results = []
+    for model_class, factory in CASES:
+        legacy_class = dict_based(model_class)
+        results.append({
+            'model': model_class.__name__,
+            'count': count,
+            'slotted_bytes': measure_memory(factory, model_class, count),
+            'dict_bytes': measure_memory(factory, legacy_class, count),
+            'slotted_seconds': measure_construction(factory, model_class, count, repeat),
+            'dict_seconds': measure_construction(factory, legacy_class, count, repeat),
+        })
+
+    return results
+
+
+def main():
+    for result in run():
+        print(f"{result['model']:<20} "
+              f"memory {result['dict_bytes'] / 2 ** 20:8.1f} MiB -> {result['slotted_bytes'] / 2 ** 20:8.1f} MiB  "
+              f"construction {result['dict_seconds']:.3f}s -> {result['slotted_seconds']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# -*- coding: future_fstrings -*-
+"""
+Measures model parsing, encoding and datetime conversion without any http. Run with: python -m benchmarks.parsing
+"""
+import json
+
+from pypowerbi.dataset import Column, Dataset, DatasetEncoder, Row, RowEncoder, Table, TableEncoder
+from pypowerbi.gateway import Gateway
+from pypowerbi.import_class import Import
+from pypowerbi.json_codec import default_codec
+from pypowerbi.utils import convert_datetime_fields
+
+from .harness import format_result, measure
+
+SUITE = 'parsing'
+
+
+def guid(i):
+    return f'00000000-0000-0000-0000-{i:012d}'
+
+
+def dataset_dict(i):
+    return {
+        'id': guid(i),
+        'name': f'dataset {i}',
+        'addRowsAPIEnabled': False,
+        'configuredBy': 'someone@somecompany.com',
+        'isRefreshable': True,
+        'isEffectiveIdentityRequired': False,
+        'isEffectiveIdentityRolesRequired': False,
+        'isOnPremGatewayRequired': True,
+    }
+
+
+def report_dict(i):
+    return {
+        'id': guid(i),
+        'name': f'report {i}',
+        'webUrl': f'https://app.powerbi.com/groups/me/reports/{guid(i)}',
+        'embedUrl': f'https://app.powerbi.com/reportEmbed?reportId={guid(i)}',
+        'datasetId': guid(i),
+    }
+
+
+def gateway_dict(i):
+    return {
+        'id': guid(i),
+        'name': f'gateway {i}',
+        'type': 'Resource',
+        'gatewayAnnotation': '{"gatewayContactInformation":["someone@somecompany.com"],"gatewayVersion":"3000.0.0"}',
+        'publicKey': {'exponent': 'AQAB', 'modulus': 'o6j2kNjvj4mfTJ8sSJz1yFgzkz9G2kDCR0wCa3cUgAPyCg=='},
+        'gatewayStatus': 'Live',
+    }
+
+
+def import_dict(i):
+    return {
+        'id': guid(i),
+        'name': f'import {i}',
+        'importState': 'Succeeded',
+        'createdDateTime': '2020-01-01T00:00:00.000Z',
+        'updatedDateTime': '2020-01-01T00:00:10.000Z',
+        'datasets': [dataset_dict(i)],
+        'reports': [report_dict(i), report_dict(i + 1)],
+    }
+
+
+def rows(count):
+    return [Row(id=i, name=f'row {i}', is_interesting=i % 2 == 0, cost_usd=i * 1.5,
+                purchase_date='2020-01-01T00:00:00') for i in range(count)]
+
+
+def table(row_count):
+    columns = [Column('id', 'Int64'), Column('name', 'string'), Column('is_interesting', 'boolean'),
+               Column('cost_usd', 'double'), Column('purchase_date', 'datetime')]
+    return Table('sales', columns, rows=rows(row_count))
+
+
+def refresh_dicts(count):
+    return [{'requestId': guid(i), 'refreshType': 'ViaApi', 'status': 'Completed',
+             'startTime': '2019-03-05T03:09:31.493Z', 'endTime': '2019-03-05T03:10:02Z'} for i in range(count)]
+
+
+def run(scale=1.0, repeat=5):
+    count = max(int(10000 * scale), 1)
+    results = []
+
+    datasets = [dataset_dict(i) for i in range(count)]
+    results.append(measure(SUITE, 'Dataset.from_dict', lambda: [Dataset.from_dict(x) for x in datasets],
+                           repeat=repeat, items=count))
+
+    gateways = [gateway_dict(i) for i in range(count)]
+    results.append(measure(SUITE, 'Gateway.from_dict', lambda: [Gateway.from_dict(x) for x in gateways],
+                           repeat=repeat, items=count))
+
+    imports = [import_dict(i) for i in range(count)]
+    results.append(measure(SUITE, 'Import.from_dict', lambda: [Import.from_dict(x) for x in imports],
+                           repeat=repeat, items=count))
+
+    pushed_rows = rows(count)
+    results.append(measure(SUITE, 'RowEncoder', lambda: json.dumps({'rows': pushed_rows}, cls=RowEncoder),
+                           repeat=repeat, items=count))
+    # the path post_rows takes
+    results.append(measure(SUITE, 'post_rows body', lambda: default_codec.dumps({'rows': [x.to_dict()
+                                                                                          for x in pushed_rows]}),
+                           repeat=repeat, items=count))
+
+    pushed_table = table(count)
+    results.append(measure(SUITE, 'TableEncoder', lambda: json.dumps(pushed_table, cls=TableEncoder),
+                           repeat=repeat, items=count))
+    pushed_dataset = Dataset('dataset', tables=[table(0) for _ in range(100)])
+    results.append(measure(SUITE, 'DatasetEncoder', lambda: json.dumps(pushed_dataset, cls=DatasetEncoder),
+                           number=10, repeat=repeat, items=100))
+
+    refreshes = refresh_dicts(count)
+    results.append(measure(SUITE, 'convert_datetime_fields',
+                           lambda: convert_datetime_fields(refreshes, ['startTime', 'endTime']),
+                           repeat=repeat, items=count))
+
+    return results
+
+
+def main():
+    for result in run():
+        print(format_result(result))
+
+
+if __name__ == '__main__':
+    main()
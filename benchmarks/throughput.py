@@ -0,0 +1,82 @@
+# -*- coding: future_fstrings -*-
+"""
+Measures end to end throughput of the library against the in-process fake service, without network latency, so the
+figures reflect the library's own overhead: request building, encoding, the transport and response parsing.
+Run with: python -m benchmarks.throughput
+"""
+import datetime
+import tempfile
+
+from pypowerbi.dataset import Column, Dataset, Table
+from pypowerbi.fake_service import FakePowerBIService
+
+from .harness import format_result, measure
+from .parsing import rows
+
+SUITE = 'throughput'
+
+
+def run(scale=1.0, repeat=5):
+    count = max(int(1000 * scale), 1)
+    results = []
+
+    service = FakePowerBIService(seed=0)
+    client = service.client()
+
+    # post rows, in batches of the given size
+    columns = [Column('id', 'Int64'), Column('name', 'string'), Column('is_interesting', 'boolean'),
+               Column('cost_usd', 'double'), Column('purchase_date', 'datetime')]
+    dataset = client.datasets.post_dataset(Dataset('push', tables=[Table('sales', columns)]))
+    batch = rows(count)
+
+    def post_rows():
+        for _ in range(10):
+            client.datasets.post_rows(dataset.id, 'sales', batch)
+        client.datasets.delete_rows(dataset.id, 'sales')
+
+    results.append(measure(SUITE, 'post_rows', post_rows, repeat=repeat, items=10 * count))
+
+    # list endpoints, building every model
+    group = service.add_group('benchmarks')
+    gateway = service.add_gateway('gateway')
+    for i in range(count):
+        dataset_id = service.add_dataset(f'dataset {i}', group_id=group['id'])['id']
+        service.add_report(f'report {i}', dataset_id, group['id'])
+        service.add_group(f'group {i}')
+        service.add_gateway_datasource(gateway['id'], f'datasource {i}', connection_details={'server': f'{i}'})
+
+    results.append(measure(SUITE, 'get_datasets', lambda: list(client.datasets.get_datasets(group['id'])),
+                           repeat=repeat, items=count))
+    results.append(measure(SUITE, 'get_reports', lambda: list(client.reports.get_reports(group['id'])),
+                           repeat=repeat, items=count))
+    results.append(measure(SUITE, 'get_groups', lambda: list(client.groups.get_groups()),
+                           repeat=repeat, items=count + 1))
+    results.append(measure(SUITE, 'get_datasources', lambda: list(client.gateways.get_datasources(gateway['id'])),
+                           repeat=repeat, items=count))
+
+    # export, items are bytes
+    content = bytes(range(256)) * (4 * 1024 * max(int(scale * 4), 1))
+    report = service.add_report('export', dataset.id, content=content)
+    with tempfile.TemporaryDirectory() as directory:
+        results.append(measure(SUITE, 'export_report',
+                               lambda: client.reports.export_report(report['id'], directory, filename='export'),
+                               repeat=repeat, items=len(content)))
+
+    # activity log continuation chains of 10 pages
+    service.activity_events_page_size = count
+    service.add_activity_events([{'Id': str(i), 'Activity': 'ViewReport', 'UserId': 'someone@somecompany.com',
+                                  'CreationTime': '2020-01-01T00:00:00'} for i in range(10 * count)])
+    results.append(measure(SUITE, 'get_activity_logs',
+                           lambda: client.activity_logs.get_activity_logs(datetime.datetime(2020, 1, 1)),
+                           repeat=repeat, items=10 * count))
+
+    return results
+
+
+def main():
+    for result in run():
+        print(format_result(result))
+
+
+if __name__ == '__main__':
+    main()
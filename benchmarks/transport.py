@@ -0,0 +1,61 @@
+# -*- coding: future_fstrings -*-
+"""
+Compares the requests (HTTP/1.1) and httpx transports against the in-process fake service, one request at a time and
+with many requests in flight from a thread pool. The httpx transport is skipped when httpx is not installed.
+
+The fake service is reached in process, through a requests adapter and an httpx WSGI transport, so no sockets are
+opened and the figures measure each transport's own overhead per request rather than HTTP/2 multiplexing, which only
+pays off against a remote host. Run with: python -m benchmarks.transport
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.transport import HttpxSession, httpx
+
+from .harness import format_result, measure
+
+SUITE = 'transport'
+
+
+def _clients(service):
+    yield 'requests', service.client()
+
+    if httpx is not None:
+        session = HttpxSession(http2=False, transport=httpx.WSGITransport(app=service))
+        yield 'httpx', service.client(session=session)
+
+
+def run(scale=1.0, repeat=5):
+    count = max(int(200 * scale), 1)
+    results = []
+
+    service = FakePowerBIService(seed=0)
+    group = service.add_group('benchmarks')
+    for i in range(10):
+        service.add_dataset(f'dataset {i}', group_id=group['id'])
+
+    for name, client in _clients(service):
+        def sequential():
+            for _ in range(count):
+                client.datasets.get_datasets(group['id'])
+
+        results.append(measure(SUITE, f'{name}_sequential', sequential, repeat=repeat, items=count))
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            def concurrent():
+                list(executor.map(lambda _: client.datasets.get_datasets(group['id']), range(count)))
+
+            results.append(measure(SUITE, f'{name}_concurrent', concurrent, repeat=repeat, items=count))
+
+        client.session.close()
+
+    return results
+
+
+def main():
+    for result in run():
+        print(format_result(result))
+
+
+if __name__ == '__main__':
+    main()
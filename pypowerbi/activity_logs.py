@@ -1,11 +1,13 @@
 # -*- coding: future_fstrings -*-
-import requests
 
 import datetime
 
 from requests.exceptions import HTTPError
 
+from .tracing import traced_operations
 
+
+@traced_operations
 class ActivityLogs:
 
     def __init__(self, client):
@@ -62,13 +64,13 @@ class ActivityLogs:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
 
-        response_obj = response.json()
+        response_obj = self.client.json_codec.loads(response.content)
 
         event_entities = response_obj["activityEventEntities"]
         continuation_uri = response_obj["continuationUri"]
@@ -84,8 +86,8 @@ class ActivityLogs:
         cont_count = 1
         while continuation_token is not None:
 
-            response = requests.get(continuation_uri, headers=headers)
-            response_obj = response.json()
+            response = self.client.request('GET', continuation_uri, headers=headers)
+            response_obj = self.client.json_codec.loads(response.content)
 
             event_entities = response_obj["activityEventEntities"]
             continuation_uri = response_obj["continuationUri"]
@@ -1,10 +1,346 @@
+# -*- coding: future_fstrings -*-
 import abc
-from typing import Dict, Union
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type, Union
+
+
+class Field:
+    """Declares how a single model attribute maps onto a key of the model's json representation
+
+    Models list their fields in a `field_specs` tuple; a decoder (`from_dict`) and, when any field is encoded, an
+    encoder (`to_dict`) are generated from it once, when the model class is created.
+    """
+    __slots__ = ('key', 'attribute', 'required', 'not_blank', 'convert', 'model', 'many', 'default', 'decode',
+                 'encode', 'omit_none', 'serialize')
+
+    def __init__(
+        self,
+        key: str,
+        attribute: str,
+        required: bool = False,
+        not_blank: bool = False,
+        convert: Optional[Callable[[Any], Any]] = None,
+        model: Optional[type] = None,
+        many: bool = False,
+        default: Any = None,
+        decode: bool = True,
+        encode: bool = False,
+        omit_none: bool = True,
+        serialize: Optional[Callable[[Any], Any]] = None
+    ):
+        """Constructs a Field
+
+        :param key: The json key
+        :param attribute: The model attribute
+        :param required: Decoding raises a RuntimeError when the key is absent or null
+        :param not_blank: Decoding raises a RuntimeError when the (converted) value is empty or whitespace
+        :param convert: Callable applied to a present, non-null value when decoding
+        :param model: Nested model class; its from_dict is used to decode and its to_dict to encode
+        :param many: The value is a list, convert/model/serialize are applied to each item
+        :param default: The attribute value when the key is absent or null, or when the field is not decoded
+        :param decode: Whether the key is read by from_dict
+        :param encode: Whether the attribute is written by to_dict
+        :param omit_none: Whether to_dict leaves the key out when the attribute is None
+        :param serialize: Callable applied to a non-null attribute value when encoding
+        """
+        self.key = key
+        self.attribute = attribute
+        self.required = required
+        self.not_blank = not_blank
+        self.convert = convert
+        self.model = model
+        self.many = many
+        self.default = default
+        self.decode = decode
+        self.encode = encode
+        self.omit_none = omit_none
+        self.serialize = serialize
+
+
+def compile_function(name: str, lines: Sequence[str], namespace: Dict[str, Any]):
+    """Compiles generated source defining a function, e.g. a model's decoder
+
+    :param name: The name of the function
+    :param lines: The source lines of the function
+    :param namespace: The globals of the function; the function is added to it
+    :return: The function
+    """
+    exec('\n'.join(lines), namespace)
+    return namespace[name]
+
+
+def _compile_decoder(cls, fields: Sequence[Field]):
+    """Generates a from_dict for the model class, assigning slots directly rather than going through __init__"""
+    namespace = {'_new': object.__new__}
+    lines = [
+        'def from_dict(cls, dictionary):',
+        '    get = dictionary.get',
+        '    self = _new(cls)',
+    ]
+
+    for index, field in enumerate(fields):
+        if not field.decode:
+            namespace[f'_default{index}'] = field.default
+            lines.append(f'    self.{field.attribute} = _default{index}')
+            continue
+
+        value = f'v{index}'
+        lines.append(f'    {value} = get({field.key!r})')
+
+        converter = field.model.from_dict if field.model is not None else field.convert
+        if converter is not None:
+            namespace[f'_convert{index}'] = converter
+            if field.many:
+                conversion = f'{value} = [_convert{index}(x) for x in {value}]'
+            else:
+                conversion = f'{value} = _convert{index}({value})'
+        else:
+            conversion = None
+
+        if field.required:
+            lines.append(f'    if {value} is None:')
+            lines.append(f'        raise RuntimeError("{cls.__name__} dict has no {field.key} key")')
+            indent = '    '
+            if conversion is not None:
+                lines.append(f'{indent}{conversion}')
+        elif field.default is None:
+            # absent and null values are already None, only present values need converting
+            indent = '        '
+            if conversion is not None or field.not_blank:
+                lines.append(f'    if {value} is not None:')
+                lines.append(f'{indent}{conversion or "pass"}')
+        else:
+            namespace[f'_default{index}'] = field.default
+            indent = '        '
+            lines.append(f'    if {value} is None:')
+            lines.append(f'        {value} = _default{index}')
+            if conversion is not None or field.not_blank:
+                lines.append('    else:')
+                lines.append(f'{indent}{conversion or "pass"}')
+
+        if field.not_blank:
+            lines.append(f'{indent}if not {value} or {value}.isspace():')
+            lines.append(f'{indent}    raise RuntimeError("{cls.__name__} dict has empty {field.key} key value")')
+
+        lines.append(f'    self.{field.attribute} = {value}')
+
+    lines.append('    return self')
+
+    return classmethod(compile_function('from_dict', lines, namespace))
+
+
+def _compile_encoder(fields: Sequence[Field]):
+    """Generates a to_dict for the model class, writing keys in field declaration order"""
+    namespace = {}
+    lines = [
+        'def to_dict(self):',
+        '    json_dict = {}',
+    ]
+
+    for index, field in enumerate(fields):
+        if not field.encode:
+            continue
+
+        value = f'v{index}'
+        lines.append(f'    {value} = self.{field.attribute}')
+
+        serializer = field.model.to_dict if field.model is not None else field.serialize
+        if serializer is not None:
+            namespace[f'_serialize{index}'] = serializer
+            if field.many:
+                expression = f'[_serialize{index}(x) for x in {value}]'
+            else:
+                expression = f'_serialize{index}({value})'
+        else:
+            expression = value
+
+        if field.omit_none:
+            lines.append(f'    if {value} is not None:')
+            lines.append(f'        json_dict[{field.key!r}] = {expression}')
+        elif serializer is not None:
+            lines.append(f'    json_dict[{field.key!r}] = None if {value} is None else {expression}')
+        else:
+            lines.append(f'    json_dict[{field.key!r}] = {value}')
+
+    lines.append('    return json_dict')
+
+    return compile_function('to_dict', lines, namespace)
 
 
 class Deserializable(metaclass=abc.ABCMeta):
-    """Interface to ensure operations modules need fewer methods to turn responses into objects"""
+    """Interface to ensure operations modules need fewer methods to turn responses into objects
+
+    Subclasses declaring `field_specs` get a generated from_dict, and a generated to_dict if any field is encoded.
+    """
+    # empty slots so that slotted models deriving from this interface stay free of a per-instance __dict__
+    __slots__ = ()
+
+    field_specs: Sequence[Field] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        fields = cls.__dict__.get('field_specs')
+        if not fields:
+            return
+
+        cls.from_dict = _compile_decoder(cls, fields)
+
+        if any(field.encode for field in fields):
+            cls.to_dict = _compile_encoder(fields)
+
     @classmethod
     @abc.abstractmethod
     def from_dict(cls, dictionary: Dict[str, Union[str, Dict[str, str]]]):
         pass
+
+
+class ModelEncoder(json.JSONEncoder):
+    """Encodes any model providing a to_dict"""
+    def default(self, o):
+        return o.to_dict()
+
+
+class ModelList(list):
+    """A list of models built from the entries of a list response
+
+    Entries are kept as decoded json and each model is only built, once, when its element is read by index or
+    iteration. project and ids read values straight from the entries without building any model. Anything else, such
+    as comparing, concatenating or changing the list, builds the remaining models first and then behaves as a plain
+    list; once changed, the list no longer has entries to project.
+    """
+    __slots__ = ('_entries', '_models', '_model_class')
+
+    def __init__(self, entries: List[Dict[str, Any]], model_class: Type[Deserializable]):
+        """Constructs a ModelList
+
+        :param entries: The decoded json entries
+        :param model_class: The model class to build entries into
+        """
+        super().__init__()
+        self._entries = entries
+        # the models built so far, until all are and the list holds them itself
+        self._models = [None] * len(entries)
+        self._model_class = model_class
+
+    def _model(self, index: int):
+        model = self._models[index]
+        if model is None:
+            model = self._model_class.from_dict(self._entries[index])
+            self._models[index] = model
+
+        return model
+
+    def _build(self) -> None:
+        """Builds the remaining models into the list itself"""
+        # unpickling adds the models before it restores the slots
+        if getattr(self, '_models', None) is not None:
+            models = [self._model(index) for index in range(len(self._models))]
+            self._models = None
+            list.extend(self, models)
+
+    def _change(self) -> None:
+        self._build()
+        self._entries = None
+
+    @property
+    def entries(self) -> List[Dict[str, Any]]:
+        """The decoded json entries backing the list"""
+        if self._entries is None:
+            raise ValueError('The list was changed, it no longer matches its entries')
+
+        return self._entries
+
+    def __len__(self) -> int:
+        if self._models is None:
+            return list.__len__(self)
+
+        return len(self._models)
+
+    def __getitem__(self, index):
+        if self._models is None:
+            return list.__getitem__(self, index)
+
+        if isinstance(index, slice):
+            return ModelList(self._entries[index], self._model_class)
+
+        return self._model(index)
+
+    def __iter__(self):
+        if self._models is None:
+            return list.__iter__(self)
+
+        return (self._model(index) for index in range(len(self._models)))
+
+    def __radd__(self, other):
+        self._build()
+        return other.__add__(self)
+
+    def project(self, *keys: str) -> List[Any]:
+        """Reads values from the entries without building models
+
+        :param keys: The json keys to read
+        :return: The value of the key for each entry, or a tuple of values per entry if several keys are given
+        """
+        entries = self.entries
+        if len(keys) == 1:
+            key = keys[0]
+            return [entry.get(key) for entry in entries]
+
+        return [tuple(entry.get(key) for key in keys) for entry in entries]
+
+    def ids(self) -> List[Any]:
+        """The id of each model, read from the entries without building models where possible"""
+        if self._entries is None:
+            return [model.id for model in self]
+
+        # converted the way the models convert them
+        convert = next((field.convert for field in getattr(self._model_class, 'field_specs', ())
+                        if field.attribute == 'id'), None)
+        if convert is None:
+            return self.project('id')
+
+        return [None if id is None else convert(id) for id in self.project('id')]
+
+
+def _model_list_method(name: str, change: bool):
+    method = getattr(list, name)
+
+    def call(self, *args):
+        if change:
+            self._change()
+        else:
+            self._build()
+        return method(self, *args)
+
+    call.__name__ = name
+    call.__doc__ = method.__doc__
+    return call
+
+
+for _name in ('__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__', '__contains__', '__add__', '__mul__',
+              '__rmul__', '__reversed__', '__repr__', '__reduce_ex__', 'copy', 'count', 'index'):
+    setattr(ModelList, _name, _model_list_method(_name, change=False))
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop', 'remove',
+              'clear', 'sort', 'reverse'):
+    setattr(ModelList, _name, _model_list_method(_name, change=True))
+
+del _name
+
+
+def attributes_dict(obj) -> Dict[str, Any]:
+    """Returns the attributes of a slotted model as a dict, in declaration order
+
+    Slotted models have no per-instance __dict__, this stands in for it wherever the attributes are needed as a whole
+    (reprs, comparisons).
+
+    :param obj: The slotted model instance
+    :return: Dictionary of attribute names to values
+    """
+    attributes = {}
+    for klass in reversed(type(obj).__mro__):
+        for name in klass.__dict__.get('__slots__', ()):
+            attributes[name] = getattr(obj, name, None)
+
+    return attributes
@@ -0,0 +1,424 @@
+# -*- coding: future_fstrings -*-
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .concurrency import throttled_map
+from .gateway import DatasourceUser, PublishDatasourceToGatewayRequest
+
+
+"""
+This file contains the bulk operations used to promote datasets and reports between environments and to provision
+gateway datasources. Every item is read first so changes that are already in place are skipped, and items are
+processed concurrently with a bounded number of workers and an optional request rate.
+"""
+
+
+class DatasetBinding:
+    """The parameter values and gateway a dataset should have"""
+    __slots__ = ('parameters', 'gateway_id')
+
+    def __init__(self, parameters: Optional[Mapping[str, Any]] = None, gateway_id: Optional[str] = None):
+        """Constructs a DatasetBinding
+
+        :param parameters: The parameter values by name; None leaves the parameters alone
+        :param gateway_id: The id of the gateway the dataset's datasources should be bound to; None leaves the
+         binding alone
+        """
+        self.parameters = parameters
+        self.gateway_id = gateway_id
+
+    def __repr__(self):
+        return f'<DatasetBinding parameters={self.parameters} gateway={self.gateway_id}>'
+
+
+class DatasetBindingResult:
+    """What a bulk rebind did to a single dataset"""
+    __slots__ = ('dataset_id', 'group_id', 'changed_parameters', 'rebound', 'refreshed', 'error')
+
+    def __init__(self, dataset_id: str, group_id: Optional[str]):
+        self.dataset_id = dataset_id
+        self.group_id = group_id
+        # the parameters that were updated, as (old value, new value) by name
+        self.changed_parameters: Dict[str, Tuple[Optional[str], str]] = {}
+        self.rebound = False
+        self.refreshed = False
+        self.error: Optional[BaseException] = None
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.changed_parameters) or self.rebound
+
+    @property
+    def status(self) -> str:
+        """'failed', 'updated' or 'unchanged'"""
+        if self.error is not None:
+            return 'failed'
+
+        return 'updated' if self.changed else 'unchanged'
+
+    def to_row(self) -> Dict[str, Any]:
+        """The result as a flat dict, e.g. for a csv report or a DataFrame"""
+        return {
+            'dataset_id': self.dataset_id,
+            'group_id': self.group_id,
+            'status': self.status,
+            'changed_parameters': ', '.join(sorted(self.changed_parameters)),
+            'rebound': self.rebound,
+            'refreshed': self.refreshed,
+            'error': None if self.error is None else str(self.error),
+        }
+
+    def __repr__(self):
+        return f'<DatasetBindingResult dataset={self.dataset_id} status={self.status}>'
+
+
+def _parameter_changes(datasets, dataset_id, parameters, group_id):
+    current = {parameter['name']: parameter.get('currentValue')
+               for parameter in datasets.get_dataset_parameters(dataset_id, group_id).get('value', ())}
+
+    # parameter values are always sent as strings
+    return {name: (current.get(name), str(value)) for name, value in parameters.items()
+            if current.get(name) != str(value)}
+
+
+def _needs_binding(datasets, dataset_id, gateway_id, group_id):
+    datasources = datasets.get_dataset_gateway_datasources(dataset_id, group_id)
+
+    return not datasources or any(str(datasource.get('gatewayId', '')).lower() != gateway_id.lower()
+                                  for datasource in datasources)
+
+
+def rebind_datasets(
+    datasets,
+    bindings: Mapping[str, DatasetBinding],
+    group_id: Optional[str] = None,
+    refresh: bool = False,
+    notify_option: Optional[str] = None,
+    max_workers: int = 8,
+    requests_per_second: Optional[float] = None
+) -> List[DatasetBindingResult]:
+    """Updates the parameters and gateway bindings of many datasets, skipping what is already in place
+
+    Per dataset, the current parameter values are read and only the differing ones are set. The gateway datasources
+    are read after that, as new parameter values may point the dataset at other sources, and the dataset is bound
+    only if any datasource is on another gateway. Failures are recorded per dataset rather than raised.
+
+    :param datasets: The Datasets operations of a client
+    :param bindings: The bindings by dataset id
+    :param group_id: The optional id of the group of the datasets
+    :param refresh: Whether to refresh the datasets that were changed
+    :param notify_option: The notify option of the refreshes
+    :param max_workers: The number of datasets processed concurrently
+    :param requests_per_second: The rate datasets are started at across workers; None does not pace them
+    :return: A result per dataset, in the order of bindings
+    """
+    def rebind(item):
+        dataset_id, binding = item
+        result = DatasetBindingResult(dataset_id, group_id)
+
+        try:
+            if binding.parameters:
+                changes = _parameter_changes(datasets, dataset_id, binding.parameters, group_id)
+                if changes:
+                    datasets.set_dataset_parameters(dataset_id, {name: new for name, (_, new) in changes.items()},
+                                                    group_id)
+                    result.changed_parameters = changes
+
+            if binding.gateway_id is not None and _needs_binding(datasets, dataset_id, binding.gateway_id, group_id):
+                datasets.bind_dataset_gateway(dataset_id, binding.gateway_id, group_id)
+                result.rebound = True
+
+            if refresh and result.changed:
+                datasets.refresh_dataset(dataset_id, notify_option, group_id)
+                result.refreshed = True
+        except Exception as error:
+            result.error = error
+
+        return result
+
+    return throttled_map(rebind, bindings.items(), max_workers, requests_per_second)
+
+
+class ReportPromotionResult:
+    """What a promotion did to a single report"""
+    __slots__ = ('report_id', 'name', 'action', 'target_report_id', 'target_dataset_id', 'error')
+
+    # what can happen to a report
+    cloned = 'cloned'
+    rebound = 'rebound'
+    unchanged = 'unchanged'
+    skipped = 'skipped'
+    failed = 'failed'
+
+    def __init__(self, report_id: str, name: str):
+        self.report_id = report_id
+        self.name = name
+        self.action = self.failed
+        self.target_report_id: Optional[str] = None
+        self.target_dataset_id: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+    def to_row(self) -> Dict[str, Any]:
+        """The result as a flat dict, e.g. for a csv report or a DataFrame"""
+        return {
+            'report_id': self.report_id,
+            'name': self.name,
+            'action': self.action,
+            'target_report_id': self.target_report_id,
+            'target_dataset_id': self.target_dataset_id,
+            'error': None if self.error is None else str(self.error),
+        }
+
+    def __repr__(self):
+        return f'<ReportPromotionResult {self.name} {self.action}>'
+
+
+def promote_reports(
+    client,
+    source_group_id: Optional[str],
+    target_group_id: Optional[str],
+    report_ids: Optional[Iterable[str]] = None,
+    on_conflict: str = 'rebind',
+    max_workers: int = 8,
+    requests_per_second: Optional[float] = None
+) -> List[ReportPromotionResult]:
+    """Clones the reports of a workspace into another, bound to the target datasets of the same name
+
+    The reports and datasets of both workspaces are listed once, concurrently, and the target datasets are indexed by
+    name, so a report's target dataset and any conflicting target report are found without further list calls.
+    Reports are cloned straight onto their target dataset, concurrently. A report whose name is already taken in the
+    target workspace is handled per on_conflict:
+
+    - 'rebind' rebinds the existing target report to the target dataset, if it is bound to another one
+    - 'skip' leaves the existing target report alone
+    - 'clone' clones the report anyway, leaving two reports of that name
+
+    Failures, such as a dataset missing from the target workspace, are recorded per report rather than raised.
+
+    :param client: The PowerBIClient
+    :param source_group_id: The id of the group to promote from; None for 'My workspace'
+    :param target_group_id: The id of the group to promote to; None for 'My workspace'
+    :param report_ids: The ids of the reports to promote; None promotes them all
+    :param on_conflict: 'rebind', 'skip' or 'clone'
+    :param max_workers: The number of reports processed concurrently
+    :param requests_per_second: The rate reports are started at across workers; None does not pace them
+    :return: A result per promoted report
+    """
+    if on_conflict not in ('rebind', 'skip', 'clone'):
+        raise ValueError(f'on_conflict must be rebind, skip or clone, not {on_conflict}')
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix='pypowerbi-bulk') as executor:
+        source_reports = executor.submit(client.reports.get_reports, source_group_id)
+        source_datasets = executor.submit(client.datasets.get_datasets, source_group_id)
+        target_reports = executor.submit(client.reports.get_reports, target_group_id)
+        target_datasets = executor.submit(client.datasets.get_datasets, target_group_id)
+
+    source_dataset_names = {dataset.id: dataset.name for dataset in source_datasets.result()}
+    # dataset names need not be unique, a name taken twice cannot be promoted to
+    target_dataset_ids = {}
+    for dataset in target_datasets.result():
+        target_dataset_ids[dataset.name] = None if dataset.name in target_dataset_ids else dataset.id
+    target_reports_by_name = {report.name: report for report in target_reports.result()}
+
+    reports = list(source_reports.result())
+    if report_ids is not None:
+        wanted = set(report_ids)
+        reports = [report for report in reports if report.id in wanted]
+
+    def promote(report):
+        result = ReportPromotionResult(report.id, report.name)
+
+        try:
+            dataset_name = source_dataset_names.get(report.dataset_id)
+            if dataset_name not in target_dataset_ids:
+                raise RuntimeError(f'The target workspace has no dataset named {dataset_name}')
+            result.target_dataset_id = target_dataset_ids[dataset_name]
+            if result.target_dataset_id is None:
+                raise RuntimeError(f'The target workspace has several datasets named {dataset_name}')
+
+            existing = target_reports_by_name.get(report.name)
+            if existing is not None and on_conflict != 'clone':
+                result.target_report_id = existing.id
+                if on_conflict == 'skip':
+                    result.action = result.skipped
+                elif existing.dataset_id == result.target_dataset_id:
+                    result.action = result.unchanged
+                else:
+                    client.reports.rebind_report(existing.id, result.target_dataset_id, target_group_id)
+                    result.action = result.rebound
+            else:
+                clone = client.reports.clone_report(report.id, report.name, target_group_id,
+                                                    result.target_dataset_id, source_group_id)
+                result.target_report_id = clone.id
+                result.action = result.cloned
+        except Exception as error:
+            result.action = result.failed
+            result.error = error
+
+        return result
+
+    return throttled_map(promote, reports, max_workers, requests_per_second)
+
+
+class DatasourceSpec:
+    """A datasource a gateway should have, with the users that should have access to it"""
+    __slots__ = ('request', 'users')
+
+    def __init__(self, request: PublishDatasourceToGatewayRequest, users: Iterable[DatasourceUser] = ()):
+        """Constructs a DatasourceSpec
+
+        :param request: The request creating the datasource; its name identifies the datasource on the gateway
+        :param users: The users that should have access, with their access rights; other users are left alone
+        """
+        self.request = request
+        self.users = list(users)
+
+    @property
+    def name(self) -> str:
+        return self.request.datasource_name
+
+    def __repr__(self):
+        return f'<DatasourceSpec {self.name} users={len(self.users)}>'
+
+
+class DatasourceProvisioningResult:
+    """What a bulk provisioning did to a single datasource"""
+    __slots__ = ('gateway_id', 'datasource_name', 'datasource_id', 'action', 'credentials_updated', 'users_added',
+                 'error')
+
+    # what can happen to a datasource
+    created = 'created'
+    updated = 'updated'
+    unchanged = 'unchanged'
+    deleted = 'deleted'
+    failed = 'failed'
+
+    def __init__(self, gateway_id: str, datasource_name: str, datasource_id: Optional[str] = None):
+        self.gateway_id = gateway_id
+        self.datasource_name = datasource_name
+        self.datasource_id = datasource_id
+        self.action = self.failed
+        self.credentials_updated = False
+        # the identifiers of the users that were added, or whose access right was changed
+        self.users_added: List[str] = []
+        self.error: Optional[BaseException] = None
+
+    def to_row(self) -> Dict[str, Any]:
+        """The result as a flat dict, e.g. for a csv report or a DataFrame"""
+        return {
+            'gateway_id': self.gateway_id,
+            'datasource_name': self.datasource_name,
+            'datasource_id': self.datasource_id,
+            'action': self.action,
+            'credentials_updated': self.credentials_updated,
+            'users_added': ', '.join(self.users_added),
+            'error': None if self.error is None else str(self.error),
+        }
+
+    def __repr__(self):
+        return f'<DatasourceProvisioningResult {self.datasource_name} {self.action}>'
+
+
+def _user_key(user: DatasourceUser) -> str:
+    return (user.identifier or user.email_address or '').lower()
+
+
+def _connection_details(value) -> Any:
+    # connection details are json strings, compared by value rather than formatting; GatewayDatasource encodes the
+    # string it is given once more
+    while isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            break
+
+    return value
+
+
+def provision_datasources(
+    gateways,
+    gateway_id: str,
+    specs: Iterable[DatasourceSpec],
+    update_credentials: bool = False,
+    prune: bool = False,
+    max_workers: int = 8,
+    requests_per_second: Optional[float] = None
+) -> List[DatasourceProvisioningResult]:
+    """Makes the datasources of a gateway match a declarative list, changing only what differs
+
+    The gateway's datasources are listed once and matched to the specs by name. Missing datasources are created with
+    all their users. For existing ones, the users are read and only the users that are missing, or have another access
+    right, are added; with update_credentials, the credentials are replaced as well, since they cannot be read back to
+    compare. A datasource's type and connection details cannot be updated, a datasource whose type or connection
+    details differ from its spec fails rather than being recreated under a new id. Datasources are processed
+    concurrently and failures are recorded per datasource rather than raised.
+
+    :param gateways: The Gateways operations of a client
+    :param gateway_id: The gateway id
+    :param specs: The datasources the gateway should have
+    :param update_credentials: Whether to set the credentials of existing datasources, e.g. to rotate them
+    :param prune: Whether to delete the datasources of the gateway that are not in specs
+    :param max_workers: The number of datasources processed concurrently
+    :param requests_per_second: The rate datasources are started at across workers; None does not pace them
+    :return: A result per spec, in the order of specs, followed by a result per deleted datasource
+    """
+    specs = list(specs)
+    existing = {datasource.datasource_name: datasource for datasource in gateways.get_datasources(gateway_id)}
+
+    def provision(spec):
+        datasource = existing.get(spec.name)
+        result = DatasourceProvisioningResult(gateway_id, spec.name, datasource and datasource.id)
+
+        try:
+            if datasource is None:
+                datasource = gateways.create_datasource(gateway_id, spec.request)
+                result.datasource_id = datasource.id
+                result.action = result.created
+                users = {}
+            else:
+                if datasource.datasource_type != spec.request.datasource_type or \
+                        _connection_details(datasource.connection_details) != \
+                        _connection_details(spec.request.connection_details):
+                    raise RuntimeError(f'The type or connection details of datasource {spec.name} differ from its '
+                                       f'spec, and cannot be updated')
+                result.action = result.unchanged
+                users = {_user_key(user): user.datasource_access_right
+                         for user in gateways.get_datasource_users(gateway_id, datasource.id)}
+
+                if update_credentials:
+                    gateways.update_datasource(gateway_id, datasource.id, spec.request.credential_details)
+                    result.credentials_updated = True
+
+            for user in spec.users:
+                if users.get(_user_key(user)) != user.datasource_access_right:
+                    gateways.add_datasource_user(gateway_id, datasource.id, user)
+                    result.users_added.append(_user_key(user))
+
+            if result.action == result.unchanged and (result.credentials_updated or result.users_added):
+                result.action = result.updated
+        except Exception as error:
+            result.action = result.failed
+            result.error = error
+
+        return result
+
+    def delete(datasource):
+        result = DatasourceProvisioningResult(gateway_id, datasource.datasource_name, datasource.id)
+
+        try:
+            gateways.delete_datasource(gateway_id, datasource.id)
+            result.action = result.deleted
+        except Exception as error:
+            result.error = error
+
+        return result
+
+    results = throttled_map(provision, specs, max_workers, requests_per_second)
+
+    if prune:
+        wanted = {spec.name for spec in specs}
+        results += throttled_map(delete, [datasource for name, datasource in existing.items() if name not in wanted],
+                                 max_workers, requests_per_second)
+
+    return results
@@ -2,7 +2,9 @@
 
 import json
 import datetime
+import time
 import adal
+import requests
 
 from .reports import Reports
 from .datasets import Datasets
@@ -10,6 +12,11 @@ from .imports import Imports
 from .groups import Groups
 from .gateways import Gateways
 from .activity_logs import ActivityLogs
+from .base import Deserializable, Field, ModelEncoder
+from .json_codec import JsonCodec, get_codec
+from .instrumentation import Hooks, MetricsCollector, RequestContext
+from .tracing import attempt_span, record_retry
+from .concurrency import SingleFlight
 
 
 class PowerBIClient:
@@ -20,8 +27,13 @@ class PowerBIClient:
     api_version_snippet = 'v1.0'
     api_myorg_snippet = 'myorg'
 
+    # throttled (429) requests are retried, waiting for Retry-After seconds or an exponential backoff
+    default_max_retries = 3
+    default_max_retry_wait = 60.0
+
     @staticmethod
-    def get_client_with_username_password(client_id, username, password, authority_url=None, resource_url=None, api_url=None):
+    def get_client_with_username_password(client_id, username, password, authority_url=None, resource_url=None, api_url=None,
+                                          json_codec=None):
         """
         Constructs a client with the option of using common defaults.
 
@@ -31,6 +43,7 @@ class PowerBIClient:
         :param authority_url: The authority_url; defaults to 'https://login.windows.net/common'
         :param resource_url: The resource_url; defaults to 'https://analysis.windows.net/powerbi/api'
         :param api_url: The api_url: defaults to 'https://api.powerbi.com'
+        :param json_codec: The json codec, or the name of one; defaults to the fastest installed backend
         :return:
         """
         if authority_url is None:
@@ -52,11 +65,46 @@ class PowerBIClient:
                                                              username=username,
                                                              password=password)
 
-        return PowerBIClient(api_url, token)
+        return PowerBIClient(api_url, token, json_codec)
 
-    def __init__(self, api_url, token):
+    def __init__(self, api_url, token, json_codec=None, max_retries=None, max_retry_wait=None, session=None,
+                 coalesce_reads=False):
+        """
+        Constructs a client
+
+        :param api_url: The api url
+        :param token: The token dict as returned by adal
+        :param json_codec: The JsonCodec used for request and response bodies, or the name of one ('orjson', 'ujson'
+         or 'json'); defaults to orjson when installed
+        :param max_retries: How many times a throttled (429) request is retried; defaults to 3
+        :param max_retry_wait: The longest wait in seconds before retrying a throttled request; defaults to 60
+        :param session: The session requests are sent through, a requests.Session or e.g. a transport.HttpxSession for
+         HTTP/2; defaults to a new requests.Session
+        :param coalesce_reads: Whether identical GET requests made concurrently, e.g. from several threads, share a
+         single request and its response. A read joining one that started before the caller's own write returns the
+         state from before that write, so only enable it where reads do not need to see the client's earlier writes,
+         such as read-only inventories and audits.
+        """
         self.api_url = api_url
         self.token = token
+
+        if not isinstance(json_codec, JsonCodec):
+            json_codec = get_codec(json_codec)
+        self.json_codec = json_codec
+
+        self.max_retries = self.default_max_retries if max_retries is None else max_retries
+        self.max_retry_wait = self.default_max_retry_wait if max_retry_wait is None else max_retry_wait
+
+        # all requests share one session, and so one connection pool
+        self.session = requests.Session() if session is None else session
+
+        self.coalesce_reads = coalesce_reads
+        self.reads = SingleFlight()
+
+        self.hooks = Hooks()
+        self.metrics = MetricsCollector()
+        self.metrics.attach(self.hooks)
+
         self.datasets = Datasets(self)
         self.reports = Reports(self)
         self.imports = Imports(self)
@@ -73,35 +121,132 @@ class PowerBIClient:
 
         return self._auth_header
 
+    @property
+    def json_headers(self):
+        """The auth header along with the content type of json request bodies"""
+        headers = dict(self.auth_header)
+        headers['Content-Type'] = self.json_codec.content_type
+
+        return headers
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends an http request through the client's session. Every request made by the library goes through here,
+        which emits the client's hooks for each attempt and retries throttled (429) requests.
+
+        :param method: The http method
+        :param url: The request url
+        :param kwargs: Keyword arguments for requests.Session.request, e.g. headers, data and files
+        :return: The http response, whatever its status code
+        """
+        # identical reads in flight share the response of the first, retries included; the auth header is part of
+        # the key, so requests made with different tokens are never shared
+        if method == 'GET' and self.coalesce_reads and kwargs.keys() <= {'headers', 'params'}:
+            key = (url, self._freeze(kwargs.get('headers')), self._freeze(kwargs.get('params')))
+            return self.reads.do(key, lambda: self._request(method, url, **kwargs))
+
+        return self._request(method, url, **kwargs)
+
+    @staticmethod
+    def _freeze(mapping):
+        return None if mapping is None else tuple(sorted(mapping.items()))
+
+    def _request(self, method, url, **kwargs):
+        # file uploads are streams that cannot be replayed, only retry requests with in-memory bodies
+        max_retries = 0 if 'files' in kwargs else self.max_retries
+
+        attempt = 0
+        while True:
+            context = RequestContext(method, url, attempt)
+            data = kwargs.get('data')
+            if isinstance(data, (bytes, str)):
+                context.bytes_sent = len(data)
+
+            self.hooks.emit(Hooks.before_request, context)
+
+            with attempt_span(context) as span:
+                start = time.perf_counter()
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except Exception as error:
+                    context.elapsed = time.perf_counter() - start
+                    self.hooks.emit(Hooks.on_error, context, error)
+                    raise
+
+                context.elapsed = time.perf_counter() - start
+                context.status_code = response.status_code
+                context.bytes_received = len(response.content)
+                if response.request is not None and isinstance(response.request.body, (bytes, str)):
+                    context.bytes_sent = len(response.request.body)
+
+                self.hooks.emit(Hooks.after_response, context, response)
+
+                if response.status_code != 429 or attempt >= max_retries:
+                    return response
+
+                wait = self._retry_wait(response, attempt)
+                record_retry(span, wait)
+
+            self.hooks.emit(Hooks.on_retry, context, response, wait)
+            time.sleep(wait)
+
+            attempt += 1
+
+    def _retry_wait(self, response, attempt):
+        """
+        The seconds to wait before retrying a throttled request, as asked by the Retry-After header or else backing off
+        exponentially, capped at max_retry_wait
+        """
+        retry_after = response.headers.get('Retry-After')
+
+        try:
+            wait = float(retry_after)
+        except (TypeError, ValueError):
+            wait = float(2 ** attempt)
+
+        return min(max(wait, 0.0), self.max_retry_wait)
+
     _auth_header = None
 
 
-class EffectiveIdentity:
+class EffectiveIdentity(Deserializable):
     username_key = 'username'
     roles_key = 'roles'
     datasets_key = 'datasets'
 
+    __slots__ = ('username', 'roles', 'datasets')
+
+    field_specs = (
+        Field(username_key, 'username', encode=True, omit_none=False),
+        Field(roles_key, 'roles', encode=True, omit_none=False),
+        Field(datasets_key, 'datasets', encode=True, omit_none=False),
+    )
+
     def __init__(self, username, roles, datasets):
         self.username = username
         self.roles = roles
         self.datasets = datasets
 
 
-class EffectiveIdentityEncoder(json.JSONEncoder):
-    def default(self, o):
-        return {
-            EffectiveIdentity.username_key: o.username,
-            EffectiveIdentity.roles_key: o.roles,
-            EffectiveIdentity.datasets_key: o.datasets,
-        }
+class EffectiveIdentityEncoder(ModelEncoder):
+    pass
 
 
-class TokenRequest:
+class TokenRequest(Deserializable):
     access_level_key = 'accessLevel'
     dataset_id_key = 'datasetId'
     allow_saveas_key = 'allowSaveAs'
     identities_key = 'identities'
 
+    __slots__ = ('access_level', 'dataset_id', 'allow_saveas', 'identities')
+
+    field_specs = (
+        Field(access_level_key, 'access_level', encode=True, omit_none=False),
+        Field(dataset_id_key, 'dataset_id', encode=True),
+        Field(allow_saveas_key, 'allow_saveas', encode=True),
+        Field(identities_key, 'identities', model=EffectiveIdentity, many=True, encode=True),
+    )
+
     def __init__(self, access_level, dataset_id=None, allow_saveas=None, identities=None):
         self.access_level = access_level
         self.dataset_id = dataset_id
@@ -109,47 +254,104 @@ class TokenRequest:
         self.identities = identities
 
 
-class TokenRequestEncoder(json.JSONEncoder):
-    def default(self, o):
-        effective_identity_encoder = EffectiveIdentityEncoder()
+class TokenRequestEncoder(ModelEncoder):
+    pass
+
+
+class TokenRequestDataset(Deserializable):
+    id_key = 'id'
+    xmla_permissions_key = 'xmlaPermissions'
+
+    __slots__ = ('id', 'xmla_permissions')
+
+    field_specs = (
+        Field(id_key, 'id', required=True, encode=True),
+        Field(xmla_permissions_key, 'xmla_permissions', encode=True),
+    )
+
+    def __init__(self, dataset_id, xmla_permissions=None):
+        self.id = dataset_id
+        self.xmla_permissions = xmla_permissions
+
+
+class TokenRequestReport(Deserializable):
+    id_key = 'id'
+    allow_edit_key = 'allowEdit'
+
+    __slots__ = ('id', 'allow_edit')
+
+    field_specs = (
+        Field(id_key, 'id', required=True, encode=True),
+        Field(allow_edit_key, 'allow_edit', encode=True),
+    )
+
+    def __init__(self, report_id, allow_edit=None):
+        self.id = report_id
+        self.allow_edit = allow_edit
 
-        json_dict = {
-            TokenRequest.access_level_key: o.access_level
-        }
 
-        if o.dataset_id is not None:
-            json_dict[TokenRequest.dataset_id_key] = o.dataset_id
+class TokenRequestTargetWorkspace(Deserializable):
+    id_key = 'id'
 
-        if o.allow_saveas is not None:
-            json_dict[TokenRequest.allow_saveas_key] = o.allow_saveas
+    __slots__ = ('id',)
 
-        if o.identities is not None:
-            json_dict[TokenRequest.identities_key] = [effective_identity_encoder.default(x) for x in o.identities]
+    field_specs = (
+        Field(id_key, 'id', required=True, encode=True),
+    )
 
-        return json_dict
+    def __init__(self, group_id):
+        self.id = group_id
 
 
-class EmbedToken:
+class MultiResourceTokenRequest(Deserializable):
+    """A token request covering several reports, datasets and target workspaces at once"""
+    datasets_key = 'datasets'
+    reports_key = 'reports'
+    target_workspaces_key = 'targetWorkspaces'
+    identities_key = 'identities'
+    lifetime_in_minutes_key = 'lifetimeInMinutes'
+
+    __slots__ = ('datasets', 'reports', 'target_workspaces', 'identities', 'lifetime_in_minutes')
+
+    field_specs = (
+        Field(datasets_key, 'datasets', model=TokenRequestDataset, many=True, encode=True),
+        Field(reports_key, 'reports', model=TokenRequestReport, many=True, encode=True),
+        Field(target_workspaces_key, 'target_workspaces', model=TokenRequestTargetWorkspace, many=True, encode=True),
+        Field(identities_key, 'identities', model=EffectiveIdentity, many=True, encode=True),
+        Field(lifetime_in_minutes_key, 'lifetime_in_minutes', convert=int, encode=True),
+    )
+
+    def __init__(self, datasets=None, reports=None, target_workspaces=None, identities=None,
+                 lifetime_in_minutes=None):
+        self.datasets = datasets
+        self.reports = reports
+        self.target_workspaces = target_workspaces
+        self.identities = identities
+        self.lifetime_in_minutes = lifetime_in_minutes
+
+
+class MultiResourceTokenRequestEncoder(ModelEncoder):
+    pass
+
+
+class EmbedToken(Deserializable):
     token_key = 'token'
     token_id_key = 'tokenId'
     expiration_key = 'expiration'
 
+    __slots__ = ('token', 'token_id', 'expiration')
+
+    field_specs = (
+        Field(token_key, 'token', required=True),
+        Field(token_id_key, 'token_id', required=True),
+        Field(expiration_key, 'expiration', required=True),
+    )
+
     def __init__(self, token, token_id, expiration):
         self.token = token
         self.token_id = token_id
         self.expiration = expiration
 
-    @classmethod
-    def from_dict(cls, dictionary):
-        if cls.token_key not in dictionary:
-            raise RuntimeError(f'Token dict has no {cls.token_key} key')
-
-        token = dictionary[cls.token_key]
-        token_id = dictionary[cls.token_id_key]
-        expiration = dictionary[cls.expiration_key]
-
-        return EmbedToken(token, token_id, expiration)
-
     @property
     def expiration_as_datetime(self):
         return datetime.datetime.strptime(self.expiration, '%Y-%m-%dT%H:%M:%SZ')
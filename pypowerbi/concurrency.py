@@ -0,0 +1,168 @@
+# -*- coding: future_fstrings -*-
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, TypeVar
+
+
+"""
+This file contains the concurrency helpers: a rate limiter pacing requests across threads, a bounded, rate limited map
+over a thread pool for the bulk operations, and single-flight groups sharing one execution between identical
+concurrent calls.
+"""
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class RateLimiter:
+    """Paces calls across threads to a number per second, allowing bursts of up to burst calls"""
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """Constructs a RateLimiter
+
+        :param rate: The calls per second
+        :param burst: The calls allowed back to back after a quiet period; defaults to one second's worth
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+
+        self.rate = rate
+        self.burst = max(burst or int(rate), 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Waits for the next call's turn
+
+        :return: The seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # take the token now, even if it only becomes available later, so waiting callers queue up in order
+            self._tokens -= 1
+            wait_seconds = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait_seconds:
+            time.sleep(wait_seconds)
+
+        return wait_seconds
+
+    def __repr__(self):
+        return f'<RateLimiter rate={self.rate}/s burst={self.burst}>'
+
+
+def throttled_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 8,
+    requests_per_second: Optional[float] = None
+) -> List[R]:
+    """Calls func on every item concurrently, keeping the order of items
+
+    :param func: The function, which should record its own failures rather than raise
+    :param items: The items
+    :param max_workers: The number of concurrent calls
+    :param requests_per_second: The calls started per second across all workers; None does not pace them
+    :return: The results, in the order of items
+    """
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+    def call(item):
+        if limiter is not None:
+            limiter.acquire()
+        return func(item)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pypowerbi-bulk') as executor:
+        return list(executor.map(call, items))
+
+
+class SingleFlight:
+    """Lets concurrent calls with the same key share one execution
+
+    The first caller of a key runs the function; callers arriving while it runs wait for it and get the same result,
+    or the same exception. Once it returns, the next call of the key runs the function again, so nothing is cached.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        # calls that waited for another caller's execution
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], R]) -> R:
+        """Runs func, or waits for the execution already running for key
+
+        :param key: The key identifying identical calls
+        :param func: The function
+        :return: The result of func
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """The asyncio counterpart of SingleFlight, for tasks of one event loop
+
+    E.g. to share blocking client calls made from tasks:
+
+        flight = AsyncSingleFlight()
+        datasets = await flight.do(('datasets', group_id),
+                                   lambda: loop.run_in_executor(None, client.datasets.get_datasets, group_id))
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, 'asyncio.Future'] = {}
+        # calls that waited for another task's execution
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[R]]) -> R:
+        """Awaits func(), or the execution already running for key
+
+        :param key: The key identifying identical calls
+        :param func: Returns the awaitable to share, e.g. a coroutine
+        :return: The result of the awaitable
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # a waiting task being cancelled does not cancel the shared execution
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # the exception is raised here, waiting tasks need not retrieve it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -1,7 +1,8 @@
-from typing import Optional, Dict, List, Union
+from typing import Optional, Dict, Iterable, List, Union
 import json
 
 from pypowerbi import CredentialType
+from .json_codec import wire_string
 
 
 class CredentialsBase:
@@ -19,8 +20,69 @@ class CredentialsBase:
         )
 
     def to_json(self) -> str:
-        return json.dumps(self.credential_data, separators=(',', ':'))\
-            .replace('\\\\', '\\')
+        """The credentials as the compact json the API expects, with backslashes left unescaped"""
+        return _encode_credential_data(self.credential_data)
+
+
+def _encode_credential_data(credential_data) -> str:
+    """Encodes the credential data add_credential_data builds directly, other data through _encode"""
+    if len(credential_data) == 1:
+        (key, data), = credential_data.items()
+        if isinstance(key, str) and isinstance(data, list):
+            items = []
+            for item in data:
+                name = item.get('name') if type(item) is dict and len(item) == 2 and next(iter(item)) == 'name' \
+                    else None
+                value = item.get('value') if name is not None else None
+                if not isinstance(name, str) or not isinstance(value, str):
+                    break
+                items.append(f'{{"name":{wire_string(name)},"value":{wire_string(value)}}}')
+            else:
+                return f'{{{wire_string(key)}:[{",".join(items)}]}}'
+
+    return _encode(credential_data)
+
+
+def _encode_key(key) -> str:
+    """Converts a dict key to a string the way json.dumps does"""
+    if isinstance(key, str):
+        return key
+
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+
+    if isinstance(key, (int, float)):
+        return json.dumps(key)
+
+    raise TypeError(f'keys must be str, int, float, bool or None, not {type(key).__name__}')
+
+
+def _encode(value) -> str:
+    """Encodes credential data the way json.dumps does, compactly, but with backslashes left unescaped"""
+    if isinstance(value, str):
+        return wire_string(value)
+
+    if isinstance(value, dict):
+        items = [f'{wire_string(_encode_key(key))}:{_encode(item)}' for key, item in value.items()]
+        return '{' + ','.join(items) + '}'
+
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join([_encode(item) for item in value]) + ']'
+
+    return json.dumps(value)
+
+
+def credentials_to_json(credentials: Iterable[CredentialsBase]) -> List[str]:
+    """Encodes many credentials, as their to_json methods do
+
+    :param credentials: The credentials
+    :return: The json of each of the credentials, in order
+    """
+    return [_encode_credential_data(item.credential_data) for item in credentials]
 
 
 class UsernamePasswordCredentials(CredentialsBase):
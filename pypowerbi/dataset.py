@@ -1,221 +1,66 @@
 # -*- coding: future_fstrings -*-
-import json
 from enum import Enum
 from typing import List, Optional, Dict, Union
 
+from .base import Deserializable, Field, ModelEncoder, attributes_dict
 
-class Dataset:
-    # json keys
-    id_key = 'id'
-    name_key = 'name'
-    add_rows_api_enabled_key = 'addRowsAPIEnabled'
-    configured_by_key = 'configuredBy'
-    is_refreshable_key = 'isRefreshable'
-    is_effective_identity_required_key = 'isEffectiveIdentityRequired'
-    is_effective_identity_roles_required_key = 'isEffectiveIdentityRolesRequired'
-    is_on_prem_gateway_required_key = 'isOnPremGatewayRequired'
-    tables_key = 'tables'
 
-    def __init__(self, name, dataset_id=None, tables=None, add_rows_api_enabled=None,
-                 configured_by=None, is_refreshable=None, is_effective_identity_required=None,
-                 is_effective_identity_roles_required=None, is_on_prem_gateway_required=None):
-        self.name = name
-        self.id = dataset_id
-        self.tables = tables
-        self.add_rows_api_enabled = add_rows_api_enabled
-        self.configured_by = configured_by
-        self.is_refreshable = is_refreshable
-        self.is_effective_identity_required = is_effective_identity_required
-        self.is_effective_identity_roles_required = is_effective_identity_roles_required
-        self.is_on_prem_gateway_required = is_on_prem_gateway_required
+class Row:
+    # no __slots__: the values are the row's attributes, and its __dict__ is the json object of the row
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
 
-    @classmethod
-    def from_dict(cls, dictionary):
-        """
-        Creates a dataset from a dictionary, key values for 'id' and 'name' required
-        :param dictionary: The dictionary to create the dataset from
-        :return: A dataset created from the given dictionary
-        """
-        # id is required
-        if Dataset.id_key in dictionary:
-            dataset_id = str(dictionary[Dataset.id_key])
-            # id cannot be whitespace
-            if dataset_id.isspace():
-                raise RuntimeError('Dataset dict has empty id key value')
-        else:
-            raise RuntimeError('Dataset dict has no id key')
-        # name is required
-        if Dataset.name_key in dictionary:
-            dataset_name = str(dictionary[Dataset.name_key])
-            # name cannot be whitespace
-            if dataset_id.isspace():
-                raise RuntimeError('Dataset dict has empty name key value')
-        else:
-            raise RuntimeError('Dataset dict has no name key')
-
-        # add api enabled is optional
-        if Dataset.add_rows_api_enabled_key in dictionary:
-            add_rows_api_enabled = bool(dictionary[Dataset.add_rows_api_enabled_key])
-        else:
-            add_rows_api_enabled = None
-
-        # configured by is optional
-        if Dataset.configured_by_key in dictionary:
-            configured_by = str(dictionary[Dataset.configured_by_key])
-        else:
-            configured_by = None
-
-        # is refreshable is optional
-        if Dataset.is_refreshable_key in dictionary:
-            is_refreshable = bool(dictionary[Dataset.is_refreshable_key])
-        else:
-            is_refreshable = None
-
-        # is effective identity required is optional
-        if Dataset.is_effective_identity_required_key in dictionary:
-            is_effective_identity_required = bool(dictionary[Dataset.is_effective_identity_required_key])
-        else:
-            is_effective_identity_required = None
-
-        # is effective identity roles required is optional
-        if Dataset.is_effective_identity_roles_required_key in dictionary:
-            is_effective_identity_roles_required = bool(dictionary[Dataset.is_effective_identity_roles_required_key])
-        else:
-            is_effective_identity_roles_required = None
-
-        # is on prem gateway required is optional
-        if Dataset.is_on_prem_gateway_required_key in dictionary:
-            is_on_prem_gateway_required = bool(dictionary[Dataset.is_on_prem_gateway_required_key])
-        else:
-            is_on_prem_gateway_required = None
-
-        return Dataset(dataset_name, dataset_id, add_rows_api_enabled=add_rows_api_enabled,
-                       configured_by=configured_by, is_refreshable=is_refreshable,
-                       is_effective_identity_required=is_effective_identity_required,
-                       is_effective_identity_roles_required=is_effective_identity_roles_required,
-                       is_on_prem_gateway_required=is_on_prem_gateway_required)
+    def to_dict(self):
+        return dict(self.__dict__)
 
     def __repr__(self):
-        return f'<Dataset {str(self.__dict__)}>'
-
-
-class DatasetEncoder(json.JSONEncoder):
-    def default(self, o):
-        table_encoder = TableEncoder()
+        return f'<Row {str(self.__dict__)}>'
 
-        json_dict = {
-            Dataset.name_key: o.name,
-            Dataset.tables_key: [table_encoder.default(x) for x in o.tables],
-        }
 
-        return json_dict
+class RowEncoder(ModelEncoder):
+    pass
 
 
-class Table:
+class Column(Deserializable):
     name_key = 'name'
-    columns_key = 'columns'
-    measures_key = 'measures'
-    rows_key = 'rows'
+    datatype_key = 'dataType'
+    formatstring_key = 'formatString'
 
-    @classmethod
-    def from_dict(cls, dictionary):
-        """
-        Creates a table from a dictionary, 'name' key value required
-        :param dictionary: The dictionary to create the table from
-        :return: A table created from the dictionary
-        """
-        # name is required
-        if Table.name_key in dictionary:
-            table_name = str(dictionary[Table.name_key])
-            # name cannot be whitespace
-            if table_name.isspace():
-                raise RuntimeError('Table dict has empty name key value')
-        else:
-            raise RuntimeError('Table dict has no name key')
-
-        # columns are optional
-        if Table.columns_key in dictionary:
-            table_columns = [Table.from_dict(x) for x in dictionary[Table.columns_key]]
-        else:
-            table_columns = None
-
-        # measures are optional
-        if Table.measures_key in dictionary:
-            table_measures = [Table.from_dict(x) for x in dictionary[Table.measures_key]]
-        else:
-            table_measures = None
-
-        return Table(name=table_name, columns=table_columns, measures=table_measures)
+    __slots__ = ('name', 'data_type', 'formatstring')
 
-    def __init__(self, name, columns, measures=None, rows=None):
+    field_specs = (
+        Field(name_key, 'name', required=True, not_blank=True, convert=str, encode=True),
+        Field(datatype_key, 'data_type', required=True, convert=str, encode=True),
+        Field(formatstring_key, 'formatstring', convert=str, encode=True),
+    )
+
+    def __init__(self, name, data_type, formatstring=None):
         self.name = name
-        self.columns = columns
-        self.measures = measures
-        self.rows = rows
+        self.data_type = data_type
+        self.formatstring = formatstring
 
     def __repr__(self):
-        return f'<Table {str(self.__dict__)}>'
-
-
-class TableEncoder(json.JSONEncoder):
-    def default(self, o):
-        json_dict = {
-            Table.name_key: o.name,
-        }
+        return f'<Column {str(attributes_dict(self))}>'
 
-        if o.columns is not None:
-            column_encoder = ColumnEncoder()
-            json_dict[Table.columns_key] = [column_encoder.default(x) for x in o.columns]
 
-        if o.measures is not None:
-            measure_encoder = MeasureEncoder()
-            json_dict[Table.measures_key] = [measure_encoder.default(x) for x in o.measures]
+class ColumnEncoder(ModelEncoder):
+    pass
 
-        if o.rows is not None:
-            row_encoder = RowEncoder()
-            json_dict[Table.row_key] = [row_encoder.default(x) for x in o.rows]
 
-        return json_dict
-
-
-class Measure:
+class Measure(Deserializable):
     name_key = 'name'
     expression_key = 'expression'
     formatstring_key = 'formatString'
     is_hidden_key = 'isHidden'
 
-    @classmethod
-    def from_dict(cls, dictionary):
-        # name is required
-        if Measure.name_key in dictionary:
-            measure_name = str(dictionary[Measure.name_key])
-            # name cannot be whitespace
-            if measure_name.isspace():
-                raise RuntimeError('Measure dict has empty name key value')
-        else:
-            raise RuntimeError('Measure dict has no name key')
-
-        # expression is required
-        if Measure.expression_key in dictionary:
-            measure_expression = str(dictionary[Measure.expression_key])
-            # expression cannot be whitespace
-            if measure_expression.isspace():
-                raise RuntimeError('Measure dict has empty expression key value')
-        else:
-            raise RuntimeError('Measure dict has no expression key')
-
-        if Measure.formatstring_key in dictionary:
-            measure_formatstring = str(dictionary[Measure.formatstring_key])
-        else:
-            measure_formatstring = None
-
-        if Measure.is_hidden_key in dictionary:
-            measure_is_hidden = bool(dictionary[Measure.is_hidden_key])
-        else:
-            measure_is_hidden = None
-
-        return Measure(name=measure_name, expression=measure_expression, formatstring=measure_formatstring,
-                       is_hidden=measure_is_hidden)
+    __slots__ = ('name', 'expression', 'formatstring', 'is_hidden')
+
+    field_specs = (
+        Field(name_key, 'name', required=True, not_blank=True, convert=str, encode=True),
+        Field(expression_key, 'expression', required=True, not_blank=True, convert=str, encode=True),
+        Field(formatstring_key, 'formatstring', convert=str, encode=True),
+        Field(is_hidden_key, 'is_hidden', convert=bool, encode=True),
+    )
 
     def __init__(self, name, expression, formatstring=None, is_hidden=None):
         self.name = name
@@ -224,64 +69,91 @@ class Measure:
         self.is_hidden = is_hidden
 
     def __repr__(self):
-        return f'<Measure {str(self.__dict__)}>'
+        return f'<Measure {str(attributes_dict(self))}>'
 
 
-class MeasureEncoder(json.JSONEncoder):
-    def default(self, o):
-        json_dict = {
-            Measure.name_key: o.name,
-            Measure.expression_key: o.expression,
-        }
-
-        if o.formatstring is not None:
-            json_dict[Measure.formatstring_key] = o.formatstring
+class MeasureEncoder(ModelEncoder):
+    pass
 
-        if o.is_hidden is not None:
-            json_dict[Measure.is_hidden_key] = o.is_hidden
 
-        return json_dict
+class Table(Deserializable):
+    name_key = 'name'
+    columns_key = 'columns'
+    measures_key = 'measures'
+    rows_key = 'rows'
 
+    __slots__ = ('name', 'columns', 'measures', 'rows')
 
-class Column:
-    name_key = 'name'
-    datatype_key = 'dataType'
-    formatstring_key = 'formatString'
+    field_specs = (
+        Field(name_key, 'name', required=True, not_blank=True, convert=str, encode=True),
+        Field(columns_key, 'columns', model=Column, many=True, encode=True),
+        Field(measures_key, 'measures', model=Measure, many=True, encode=True),
+        # rows are only ever pushed, never returned by the API
+        Field(rows_key, 'rows', model=Row, many=True, decode=False, encode=True),
+    )
 
-    def __init__(self, name, data_type, formatstring=None):
+    def __init__(self, name, columns, measures=None, rows=None):
         self.name = name
-        self.data_type = data_type
-        self.formatstring = formatstring
+        self.columns = columns
+        self.measures = measures
+        self.rows = rows
 
     def __repr__(self):
-        return f'<Column {str(self.__dict__)}>'
+        return f'<Table {str(attributes_dict(self))}>'
 
 
-class ColumnEncoder(json.JSONEncoder):
-    def default(self, o):
-        json_dict = {
-            Column.name_key: o.name,
-            Column.datatype_key: o.data_type
-        }
+class TableEncoder(ModelEncoder):
+    pass
 
-        if o.formatstring is not None:
-            json_dict[Column.formatstring_key] = o.formatstring
 
-        return json_dict
+class Dataset(Deserializable):
+    # json keys
+    id_key = 'id'
+    name_key = 'name'
+    add_rows_api_enabled_key = 'addRowsAPIEnabled'
+    configured_by_key = 'configuredBy'
+    is_refreshable_key = 'isRefreshable'
+    is_effective_identity_required_key = 'isEffectiveIdentityRequired'
+    is_effective_identity_roles_required_key = 'isEffectiveIdentityRolesRequired'
+    is_on_prem_gateway_required_key = 'isOnPremGatewayRequired'
+    tables_key = 'tables'
 
+    __slots__ = ('name', 'id', 'tables', 'add_rows_api_enabled', 'configured_by', 'is_refreshable',
+                 'is_effective_identity_required', 'is_effective_identity_roles_required',
+                 'is_on_prem_gateway_required')
+
+    # only the name and tables are sent when posting a dataset
+    field_specs = (
+        Field(id_key, 'id', required=True, not_blank=True, convert=str),
+        Field(name_key, 'name', required=True, not_blank=True, convert=str, encode=True),
+        Field(tables_key, 'tables', model=Table, many=True, encode=True),
+        Field(add_rows_api_enabled_key, 'add_rows_api_enabled', convert=bool),
+        Field(configured_by_key, 'configured_by', convert=str),
+        Field(is_refreshable_key, 'is_refreshable', convert=bool),
+        Field(is_effective_identity_required_key, 'is_effective_identity_required', convert=bool),
+        Field(is_effective_identity_roles_required_key, 'is_effective_identity_roles_required', convert=bool),
+        Field(is_on_prem_gateway_required_key, 'is_on_prem_gateway_required', convert=bool),
+    )
 
-class Row:
-    def __init__(self, **kwargs):
-        for key in kwargs:
-            setattr(self, key, kwargs[key])
+    def __init__(self, name, dataset_id=None, tables=None, add_rows_api_enabled=None,
+                 configured_by=None, is_refreshable=None, is_effective_identity_required=None,
+                 is_effective_identity_roles_required=None, is_on_prem_gateway_required=None):
+        self.name = name
+        self.id = dataset_id
+        self.tables = tables
+        self.add_rows_api_enabled = add_rows_api_enabled
+        self.configured_by = configured_by
+        self.is_refreshable = is_refreshable
+        self.is_effective_identity_required = is_effective_identity_required
+        self.is_effective_identity_roles_required = is_effective_identity_roles_required
+        self.is_on_prem_gateway_required = is_on_prem_gateway_required
 
     def __repr__(self):
-        return f'<Row {str(self.__dict__)}>'
+        return f'<Dataset {str(attributes_dict(self))}>'
 
 
-class RowEncoder(json.JSONEncoder):
-    def default(self, o):
-        return o.__dict__
+class DatasetEncoder(ModelEncoder):
+    pass
 
 
 class ScheduleNotifyOption(Enum):
@@ -289,23 +161,25 @@ class ScheduleNotifyOption(Enum):
     NO_NOTIFICATION = "NoNotification"
 
 
-class RefreshSchedule:
+def _notify_option(value: str) -> Optional[ScheduleNotifyOption]:
+    # an empty notify option means none is set
+    return ScheduleNotifyOption(value) if value else None
+
+
+class RefreshSchedule(Deserializable):
     notify_option_key = 'NotifyOption'
     days_key = 'days'
     enabled_key = 'enabled'
     local_time_zone_id_key = 'localTimeZoneId'
     times_key = 'times'
 
-    @classmethod
-    def from_dict(cls, dictionary: Dict[str, Union[str, bool]]) -> 'RefreshSchedule':
-        notify_option_value = dictionary.get(cls.notify_option_key, None)
-        notify_option = ScheduleNotifyOption(notify_option_value) if notify_option_value else None
-        days = dictionary.get(cls.days_key, None)
-        enabled = dictionary.get(cls.enabled_key, None)
-        local_time_zone_id = dictionary.get(cls.local_time_zone_id_key, "")
-        times = dictionary.get(cls.times_key, None)
-
-        return cls(notify_option, days, enabled, local_time_zone_id, times)
+    field_specs = (
+        Field(notify_option_key, 'notify_option', convert=_notify_option),
+        Field(days_key, 'days'),
+        Field(enabled_key, 'enabled'),
+        Field(local_time_zone_id_key, 'local_time_zone_id'),
+        Field(times_key, 'times'),
+    )
 
     def __init__(
         self,
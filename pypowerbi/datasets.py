@@ -1,12 +1,16 @@
 # -*- coding: future_fstrings -*-
 import requests
-import json
 from pypowerbi.utils import convert_datetime_fields
 
 from requests.exceptions import HTTPError
+from .base import ModelList
+from .json_codec import default_codec
+from .tracing import traced_operations
+from .validation import RowValidator, validate_rows
 from .dataset import *
 
 
+@traced_operations
 class Datasets:
     # url snippets
     groups_snippet = 'groups'
@@ -25,6 +29,8 @@ class Datasets:
     def __init__(self, client):
         self.client = client
         self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
+        # row validators by (group id, dataset id), then table name
+        self._row_validators = {}
 
     def count(self, group_id=None):
         """
@@ -43,11 +49,7 @@ class Datasets:
         """
         datasets = self.get_datasets(group_id)
 
-        for dataset in datasets:
-            if dataset.id == str(dataset_id):
-                return True
-
-        return False
+        return str(dataset_id) in datasets.ids()
 
     def get_datasets(self, group_id=None):
         """
@@ -68,13 +70,13 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
 
-        return self.datasets_from_get_datasets_response(response)
+        return self.datasets_from_get_datasets_response(response, self.client.json_codec)
 
     def get_dataset(self, dataset_id, group_id=None):
         """
@@ -95,13 +97,13 @@ class Datasets:
         # form the headers
         headers = self.client.auth_header
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
 
-        return Dataset.from_dict(json.loads(response.text))
+        return Dataset.from_dict(self.client.json_codec.loads(response.content))
 
     def post_dataset(self, dataset, group_id=None):
         """
@@ -120,18 +122,24 @@ class Datasets:
         # form the url
         url = f'{self.base_url}{groups_part}/{self.datasets_snippet}'
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
         # form the json dict
-        json_dict = DatasetEncoder().default(dataset)
+        json_dict = dataset.to_dict()
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(json_dict))
 
         # 201 - Created. The request was fulfilled and a new Dataset was created.
         if response.status_code != 201:
             raise HTTPError(response, f'Post Datasets request returned http code: {response.json()}')
 
-        return Dataset.from_dict(json.loads(response.text))
+        posted_dataset = Dataset.from_dict(self.client.json_codec.loads(response.content))
+
+        # the posted tables are the schema rows are validated against, no need to get them again
+        if dataset.tables:
+            self.cache_table_schemas(posted_dataset.id, dataset.tables, group_id)
+
+        return posted_dataset
 
     def delete_dataset(self, dataset_id, group_id=None):
         """
@@ -151,12 +159,14 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.delete(url, headers=headers)
+        response = self.client.request('DELETE', url, headers=headers)
 
         # 200 is the only successful code
         if response.status_code != 200:
             raise HTTPError(response, f'Delete Dataset request returned http error: {response.json()}')
 
+        self.invalidate_table_schemas(dataset_id, group_id)
+
     def delete_all_datasets(self, group_id=None):
         """
         Deletes all datasets
@@ -187,17 +197,17 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
 
-        return self.tables_from_get_tables_response(response)
+        return self.tables_from_get_tables_response(response, self.client.json_codec)
 
     def put_table(self, dataset_id, table_name, table, group_id=None):
         """
-        Updates the metadata and schema for the specified table within the specified dataset from "My Workspace".
+        Updates the metadata and schema for the specified table within the specified dataset
         https://docs.microsoft.com/en-us/rest/api/power-bi/pushdatasets/datasets_puttable
         :param dataset_id: The id of the dataset to put the table in
         :param table_name: The name of the table to put
@@ -210,30 +220,46 @@ class Datasets:
         else:
             groups_part = f'/{self.groups_snippet}/{group_id}/'
 
-            # form the url
-            url = f'{self.base_url}{groups_part}/{self.datasets_snippet}/{dataset_id}/' \
-                  f'{self.tables_snippet}/{table_name}'
-            # form the headers
-            headers = self.client.auth_header
-            # form the json dict
-            json_dict = TableEncoder().default(table)
+        # form the url
+        url = f'{self.base_url}{groups_part}/{self.datasets_snippet}/{dataset_id}/' \
+              f'{self.tables_snippet}/{table_name}'
+        # form the headers
+        headers = self.client.json_headers
+        # form the json dict
+        json_dict = table.to_dict()
 
-            # get the response
-            response = requests.post(url, headers=headers, json=json_dict)
+        # get the response
+        response = self.client.request('PUT', url, headers=headers, data=self.client.json_codec.dumps(json_dict))
 
-            # 200 is the only successful code
-            if response.status_code != 200:
-                raise HTTPError(response, f'Post row request returned http error: {response.json()}')
+        # 200 is the only successful code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Put table request returned http error: {response.json()}')
+
+        # rows are validated against the new schema from now on, under the name rows are posted with
+        cached_tables = self._row_validators.get((group_id, str(dataset_id)))
+        if cached_tables is not None:
+            cached_tables[table_name] = table
 
-    def post_rows(self, dataset_id, table_name, rows, group_id=None):
+    def post_rows(self, dataset_id, table_name, rows, group_id=None, validate=False, reject_sink=None):
         """
         Posts rows to a table in a given dataset
         https://msdn.microsoft.com/en-us/library/mt203561.aspx
         :param dataset_id: The id of the dataset to post rows to
         :param table_name: The name of the table to post rows to
-        :param rows: The rows to post to the table
+        :param rows: The rows to post to the table, as Row objects or dicts
         :param group_id: The optional id of the group to post rows to
-        """
+        :param validate: Whether to validate and coerce the rows against the table's columns before posting
+        :param reject_sink: Callable taking the list of rows failing validation, e.g. a list's extend; the remaining
+        rows are posted. If None, rows failing validation raise a RowValidationError and nothing is posted.
+        """
+        if validate:
+            rows = self.validate_rows(dataset_id, table_name, rows, group_id, reject_sink)
+            if not rows:
+                return
+            row_dicts = rows
+        else:
+            row_dicts = [x if type(x) is dict else x.to_dict() for x in rows]
+
         # group_id can be none, account for it
         if group_id is None:
             groups_part = '/'
@@ -244,15 +270,14 @@ class Datasets:
         url = f'{self.base_url}{groups_part}/{self.datasets_snippet}/{dataset_id}/' \
               f'{self.tables_snippet}/{table_name}/{self.rows_snippet}'
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
         # form the json dict
-        row_encoder = RowEncoder()
         json_dict = {
-            'rows': [row_encoder.default(x) for x in rows]
+            Table.rows_key: row_dicts
         }
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(json_dict))
 
         # 200 is the only successful code
         if response.status_code != 200:
@@ -279,12 +304,71 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.delete(url, headers=headers)
+        response = self.client.request('DELETE', url, headers=headers)
 
         # 200 is the only successful code
         if response.status_code != 200:
             raise HTTPError(response, f'Post row request returned http error: {response.json()}')
 
+    def get_row_validator(self, dataset_id, table_name, group_id=None):
+        """
+        Gets the row validator of a table, compiled from the table's columns. Tables are fetched with get_tables
+        once per dataset, unless the dataset was posted through this client, and cached.
+        :param dataset_id: The id of the dataset
+        :param table_name: The name of the table
+        :param group_id: The optional id of the group
+        :return: The RowValidator of the table
+        """
+        key = (group_id, str(dataset_id))
+        validators = self._row_validators.get(key)
+
+        if validators is None:
+            self.cache_table_schemas(dataset_id, self.get_tables(dataset_id, group_id), group_id)
+            validators = self._row_validators[key]
+
+        validator = validators.get(table_name)
+        if validator is None:
+            raise RuntimeError(f'Dataset {dataset_id} has no table {table_name}')
+
+        # validators are compiled on first use
+        if isinstance(validator, Table):
+            validator = RowValidator(validator)
+            validators[table_name] = validator
+
+        return validator
+
+    def validate_rows(self, dataset_id, table_name, rows, group_id=None, reject_sink=None):
+        """
+        Validates and coerces rows against the columns of a table, without posting them
+        :param dataset_id: The id of the dataset
+        :param table_name: The name of the table
+        :param rows: The rows, as Row objects or dicts
+        :param group_id: The optional id of the group
+        :param reject_sink: Callable taking the list of rows failing validation, e.g. a list's extend. If None, rows
+        failing validation raise a RowValidationError.
+        :return: The coerced rows as dicts
+        """
+        validator = self.get_row_validator(dataset_id, table_name, group_id)
+
+        return validate_rows(validator, rows, reject_sink)
+
+    def cache_table_schemas(self, dataset_id, tables, group_id=None):
+        """
+        Caches the table schemas rows posted to a dataset are validated against, replacing any cached before
+        :param dataset_id: The id of the dataset
+        :param tables: The tables of the dataset, with their columns
+        :param group_id: The optional id of the group
+        """
+        self._row_validators[(group_id, str(dataset_id))] = {table.name: table for table in tables}
+
+    def invalidate_table_schemas(self, dataset_id, group_id=None):
+        """
+        Drops the cached table schemas of a dataset, so they are fetched again on the next validation
+        :param dataset_id: The id of the dataset
+        :param group_id: The optional id of the group
+        """
+        self._row_validators.pop((group_id, str(dataset_id)), None)
+
     def get_dataset_parameters(self, dataset_id, group_id=None):
         """
         Gets all parameters for a single dataset
@@ -304,13 +388,13 @@ class Datasets:
         # form the headers
         headers = self.client.auth_header
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Dataset parameters request returned http error: {response.json()}')
 
-        return json.loads(response.text)
+        return self.client.json_codec.loads(response.content)
 
     def set_dataset_parameters(self, dataset_id, params, group_id=None):
         """
@@ -331,9 +415,9 @@ class Datasets:
         update_details = [{"name": k, "newValue": str(v)} for k, v in params.items()]
         body = {"updateDetails": update_details}
 
-        headers = self.client.auth_header
+        headers = self.client.json_headers
 
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(body))
 
         if response.status_code != 200:
             raise HTTPError(response, f'Setting dataset parameters failed with http error: {response.json()}')
@@ -355,17 +439,18 @@ class Datasets:
         url = f'{self.base_url}{groups_part}/{self.datasets_snippet}/{dataset_id}/{self.refreshes_snippet}'
 
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
 
         if notify_option is not None:
             json_dict = {
                 'notifyOption': notify_option
             }
+            data = self.client.json_codec.dumps(json_dict)
         else:
-            json_dict = None
+            data = None
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.request('POST', url, headers=headers, data=data)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 202:
@@ -390,14 +475,14 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             print(url)
             raise HTTPError(response, f'Dataset gateway datasources request returned http error: {response.json()}')
 
-        data_sources = json.loads(response.text)["value"]
+        data_sources = self.client.json_codec.loads(response.content)["value"]
 
         return data_sources
 
@@ -417,9 +502,9 @@ class Datasets:
         url = f'{self.base_url}{groups_part}/{self.datasets_snippet}/{dataset_id}/{self.bind_gateway_snippet}'
 
         body = {"gatewayObjectId": gateway_id}
-        headers = self.client.auth_header
+        headers = self.client.json_headers
 
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(body))
 
         if response.status_code != 200:
             raise HTTPError(response, f'Binding gateway to dataset failed with http error: {response.json()}')
@@ -447,13 +532,13 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Dataset refresh history request returned http error: {response.json()}')
 
-        refresh_data = json.loads(response.text)["value"]
+        refresh_data = self.client.json_codec.loads(response.content)["value"]
 
         # Convert the date strings into datetime objects
         time_fields = ['startTime', 'endTime']
@@ -483,13 +568,13 @@ class Datasets:
         url = f'{self.base_url}{groups_part}/{self.datasets_snippet}/{dataset_id}/{self.refresh_schedule_snippet}'
 
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
 
         # form the body
         body = RefreshScheduleRequest(refresh_schedule).as_dict()
 
         # get the response
-        response = requests.patch(url, headers=headers, json=body)
+        response = self.client.request('PATCH', url, headers=headers, data=self.client.json_codec.dumps(body))
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -513,40 +598,39 @@ class Datasets:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(f'Get refresh schedule request returned the following http error:{response.json()}')
 
-        return self.refresh_schedule_from_get_refresh_schedule_response(response)
+        return self.refresh_schedule_from_get_refresh_schedule_response(response, self.client.json_codec)
 
 
     @classmethod
-    def datasets_from_get_datasets_response(cls, response):
+    def datasets_from_get_datasets_response(cls, response, json_codec=None):
         """
         Creates a list of datasets from a http response object
         :param response: The http response object
-        :return: A list of datasets created from the given http response object
+        :param json_codec: The json codec to decode the response with; defaults to the fastest installed backend
+        :return: A lazily built list of datasets created from the given http response object
         """
         # load the response into a dict
-        response_dict = json.loads(response.text)
-        datasets = []
-        # go through entries returned from API
-        for entry in response_dict[cls.get_datasets_value_key]:
-            datasets.append(Dataset.from_dict(entry))
+        response_dict = (json_codec or default_codec).loads(response.content)
 
-        return datasets
+        # datasets are built from the entries as they are accessed
+        return ModelList(response_dict[cls.get_datasets_value_key], Dataset)
 
     @classmethod
-    def tables_from_get_tables_response(cls, response):
+    def tables_from_get_tables_response(cls, response, json_codec=None):
         """
         Creates a list of tables from a http response object
         :param response: The http response object
+        :param json_codec: The json codec to decode the response with; defaults to the fastest installed backend
         :return: A list of tables created from the given http response object
         """
         # load the response into a dict
-        response_dict = json.loads(response.text)
+        response_dict = (json_codec or default_codec).loads(response.content)
         tables = []
         # go through entries returned from API
         for entry in response_dict[cls.get_datasets_value_key]:
@@ -555,6 +639,6 @@ class Datasets:
         return tables
 
     @classmethod
-    def refresh_schedule_from_get_refresh_schedule_response(cls, response: requests.Response):
-        response_dict = json.loads(response.text)
+    def refresh_schedule_from_get_refresh_schedule_response(cls, response: requests.Response, json_codec=None):
+        response_dict = (json_codec or default_codec).loads(response.content)
         return RefreshSchedule.from_dict(response_dict)
@@ -0,0 +1,237 @@
+# -*- coding: future_fstrings -*-
+import calendar
+import collections
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, List, Optional, Tuple
+
+from .concurrency import SingleFlight
+from .client import EffectiveIdentity, EmbedToken, MultiResourceTokenRequest, TokenRequest
+
+
+"""
+This file contains the embed token cache, which hands out an embed token until shortly before it expires instead of
+generating one per page view.
+"""
+
+
+def _identities_key(identities: Optional[List[EffectiveIdentity]]) -> Tuple:
+    return tuple((identity.username, tuple(identity.roles or ()), tuple(identity.datasets or ()))
+                 for identity in identities or ())
+
+
+def token_expiry(token: EmbedToken) -> float:
+    """The expiration of an embed token as a time.time() timestamp"""
+    return float(calendar.timegm(token.expiration_as_datetime.timetuple()))
+
+
+class EmbedTokenCacheStats:
+    """Counters of an EmbedTokenCache"""
+    __slots__ = ('hits', 'misses', 'refreshes', 'refresh_failures', 'evictions')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return f'<EmbedTokenCacheStats hits={self.hits} misses={self.misses} refreshes={self.refreshes} ' \
+               f'evictions={self.evictions}>'
+
+
+class _Entry:
+    __slots__ = ('token', 'expires', 'refreshing')
+
+    def __init__(self, token: EmbedToken, expires: float):
+        self.token = token
+        self.expires = expires
+        self.refreshing = False
+
+
+class EmbedTokenCache:
+    """Caches report embed tokens by report, dataset, access level and effective identities
+
+    A token is handed out until expiry_margin seconds before it expires. A token requested within refresh_ahead
+    seconds of that point is regenerated in the background, so tokens in use are renewed before any caller has to
+    wait for one. Concurrent requests for a key that is not cached wait for a single generate token request. The
+    least recently used tokens are evicted beyond max_size entries.
+    """
+    def __init__(
+        self,
+        reports,
+        max_size: int = 1024,
+        expiry_margin: float = 300.0,
+        refresh_ahead: float = 600.0,
+        max_workers: int = 2,
+        clock: Callable[[], float] = time.time
+    ):
+        """Constructs an EmbedTokenCache
+
+        :param reports: The Reports operations of a client
+        :param max_size: The number of tokens kept
+        :param expiry_margin: Seconds before its expiration a token is no longer handed out
+        :param refresh_ahead: Seconds before the expiry margin a requested token is regenerated in the background
+        :param max_workers: The number of concurrent background refreshes
+        :param clock: The time.time() compatible clock the token expirations are compared to
+        """
+        self.reports = reports
+        self.max_size = max_size
+        self.expiry_margin = expiry_margin
+        self.refresh_ahead = refresh_ahead
+        self.max_workers = max_workers
+        self.stats = EmbedTokenCacheStats()
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: 'collections.OrderedDict[Hashable, _Entry]' = collections.OrderedDict()
+        self._flight = SingleFlight()
+        self._executor = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def coalesced(self) -> int:
+        """The misses that waited for a request another thread made for the same key"""
+        return self._flight.coalesced
+
+    def get_token(
+        self,
+        report_id: str,
+        group_id: str,
+        access_level: str = 'View',
+        dataset_id: Optional[str] = None,
+        allow_saveas: Optional[bool] = None,
+        identities: Optional[List[EffectiveIdentity]] = None
+    ) -> EmbedToken:
+        """Gets an embed token for a report, generating one only if no cached token is usable
+
+        :param report_id: The id of the report
+        :param group_id: The id of the group of the report
+        :param access_level: The access level, e.g. View or Edit
+        :param dataset_id: The optional id of the dataset, when the report is embedded with another dataset
+        :param allow_saveas: Whether the embedded report may be saved as a new report
+        :param identities: The optional effective identities, for row level security
+        :return: The embed token
+        """
+        key = (group_id, report_id, access_level, dataset_id, allow_saveas, _identities_key(identities))
+
+        def generate():
+            token_request = TokenRequest(access_level, dataset_id, allow_saveas, identities)
+            return self.reports.generate_token(report_id, token_request, group_id)
+
+        return self.get(key, generate)
+
+    def get_multi_resource_token(self, token_request: MultiResourceTokenRequest) -> EmbedToken:
+        """Gets an embed token for several reports, datasets and target workspaces, generating one only if no cached
+        token is usable
+
+        :param token_request: The token request; equal requests share a token
+        :return: The embed token
+        """
+        key = ('GenerateToken', json.dumps(token_request.to_dict(), sort_keys=True))
+
+        return self.get(key, lambda: self.reports.generate_multi_resource_token(token_request))
+
+    def get(self, key: Hashable, generate: Callable[[], EmbedToken]) -> EmbedToken:
+        """Gets the token cached for a key, generating one only if no cached token is usable
+
+        :param key: The key, which must identify everything the token grants
+        :param generate: Generates a token for the key
+        :return: The embed token
+        """
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.expires - self.expiry_margin:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+
+                refresh = not entry.refreshing and now >= entry.expires - self.expiry_margin - self.refresh_ahead
+                if refresh:
+                    entry.refreshing = True
+            else:
+                entry = None
+                self.stats.misses += 1
+
+        if entry is None:
+            return self._load(key, generate)
+
+        if refresh:
+            self._submit_refresh(key, generate)
+
+        return entry.token
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drops the token of a key, or all tokens
+
+        :param key: The key; None drops all tokens
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def close(self) -> None:
+        """Waits for background refreshes and stops their threads"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _load(self, key: Hashable, generate: Callable[[], EmbedToken]) -> EmbedToken:
+        """Generates the token of a key, or waits for the request already made for it"""
+        def load():
+            token = generate()
+            self._store(key, token)
+            return token
+
+        return self._flight.do(key, load)
+
+    def _store(self, key: Hashable, token: EmbedToken) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(token, token_expiry(token))
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def _submit_refresh(self, key: Hashable, generate: Callable[[], EmbedToken]) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='pypowerbi-embed-tokens')
+            executor = self._executor
+
+        executor.submit(self._refresh, key, generate)
+
+    def _refresh(self, key: Hashable, generate: Callable[[], EmbedToken]) -> None:
+        try:
+            self._load(key, generate)
+        except Exception:
+            with self._lock:
+                self.stats.refresh_failures += 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    # let the next hit try again
+                    entry.refreshing = False
+        else:
+            with self._lock:
+                self.stats.refreshes += 1
+
+    def __repr__(self):
+        return f'<EmbedTokenCache size={len(self._entries)}/{self.max_size}>'
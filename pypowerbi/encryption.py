@@ -0,0 +1,201 @@
+# -*- coding: future_fstrings -*-
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from cryptography.hazmat.primitives import hashes, padding as symmetric_padding
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:
+    rsa = None
+
+from .concurrency import SingleFlight
+from .enums import EncryptedConnection, EncryptionAlgorithm, PrivacyLevel
+from .gateway import CredentialDetails, GatewayPublicKey
+
+
+"""
+This file contains the encryption of datasource credentials for on-premises gateways, following the scheme of the
+Power BI SDKs: credentials are encrypted with the gateway's RSA public key, in 60 byte OAEP-SHA1 segments for 1024 bit
+keys, and with ephemeral AES-256-CBC and HMAC-SHA256 keys that are themselves encrypted with OAEP-SHA256 for larger
+keys.
+"""
+
+# the modulus size of 1024 bit keys, which encrypt the credentials themselves
+_segmented_modulus_size = 128
+_segment_size = 60
+
+_aes_key_size = 32
+_hmac_key_size = 64
+# the key length prefixes: 0 for the 32 byte AES key, 1 for the 64 byte HMAC key
+_key_lengths = bytes((0, 1))
+# the algorithm choices of the authenticated encryption: AES-256-CBC with PKCS7 padding, HMAC-SHA256
+_algorithm_choices = bytes((0, 0))
+
+
+def _require_cryptography():
+    if rsa is None:
+        raise ImportError('Credential encryption requires the cryptography package')
+
+
+class _PublicKey:
+    """A gateway public key, loaded once for any number of encryptions"""
+    __slots__ = ('key', 'size')
+
+    def __init__(self, public_key: GatewayPublicKey):
+        _require_cryptography()
+
+        modulus = base64.b64decode(public_key.modulus)
+        exponent = base64.b64decode(public_key.exponent)
+        self.key = rsa.RSAPublicNumbers(int.from_bytes(exponent, 'big'), int.from_bytes(modulus, 'big')).public_key()
+        self.size = len(modulus)
+
+    def encrypt(self, plain: bytes) -> str:
+        if self.size == _segmented_modulus_size:
+            return self._encrypt_segments(plain)
+
+        return self._encrypt_hybrid(plain)
+
+    def _encrypt_segments(self, plain: bytes) -> str:
+        oaep = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA1()), algorithm=hashes.SHA1(), label=None)
+        encrypted = b''.join(self.key.encrypt(plain[start:start + _segment_size], oaep)
+                             for start in range(0, len(plain), _segment_size))
+
+        return base64.b64encode(encrypted).decode()
+
+    def _encrypt_hybrid(self, plain: bytes) -> str:
+        aes_key = os.urandom(_aes_key_size)
+        hmac_key = os.urandom(_hmac_key_size)
+        iv = os.urandom(16)
+
+        padder = symmetric_padding.PKCS7(algorithms.AES.block_size).padder()
+        encryptor = Cipher(algorithms.AES(aes_key), modes.CBC(iv)).encryptor()
+        cipher_text = encryptor.update(padder.update(plain) + padder.finalize()) + encryptor.finalize()
+        tag = hmac.new(hmac_key, _algorithm_choices + iv + cipher_text, hashlib.sha256).digest()
+
+        oaep = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+        encrypted_keys = self.key.encrypt(_key_lengths + aes_key + hmac_key, oaep)
+
+        return base64.b64encode(encrypted_keys).decode() + \
+            base64.b64encode(_algorithm_choices + tag + iv + cipher_text).decode()
+
+
+def encrypt_credentials(credentials, public_key: GatewayPublicKey) -> str:
+    """Encrypts credentials with a gateway's public key
+
+    :param credentials: The credentials, a CredentialsBase or its json
+    :param public_key: The public key of the gateway
+    :return: The encrypted credentials, as CredentialDetails expects them for on-premises gateways
+    """
+    if not isinstance(credentials, str):
+        credentials = credentials.to_json()
+
+    return _PublicKey(public_key).encrypt(credentials.encode('utf-8'))
+
+
+class GatewayCredentialEncryptor:
+    """Encrypts credentials for on-premises gateways, reading and loading each gateway's public key once
+
+    Concurrent first uses of a gateway share a single get gateway request. Keys stay cached until invalidated, e.g.
+    after a gateway's key was rotated.
+    """
+    def __init__(self, gateways, max_workers: int = 8):
+        """Constructs a GatewayCredentialEncryptor
+
+        :param gateways: The Gateways operations of a client
+        :param max_workers: The number of gateways read concurrently by encrypt_many
+        """
+        _require_cryptography()
+
+        self.gateways = gateways
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._keys: Dict[str, _PublicKey] = {}
+        self._flight = SingleFlight()
+
+    def _key(self, gateway_id: str) -> _PublicKey:
+        key = self._keys.get(gateway_id)
+        if key is not None:
+            return key
+
+        def load():
+            loaded = _PublicKey(self.gateways.get_gateway(gateway_id).public_key)
+            with self._lock:
+                self._keys[gateway_id] = loaded
+            return loaded
+
+        return self._flight.do(gateway_id, load)
+
+    def add_public_key(self, gateway_id: str, public_key: GatewayPublicKey) -> None:
+        """Caches a gateway's public key that was read elsewhere, e.g. with get_gateways
+
+        :param gateway_id: The gateway id
+        :param public_key: The public key of the gateway
+        """
+        loaded = _PublicKey(public_key)
+        with self._lock:
+            self._keys[gateway_id] = loaded
+
+    def invalidate(self, gateway_id: Optional[str] = None) -> None:
+        """Drops the cached public key of a gateway, or of all gateways
+
+        :param gateway_id: The gateway id; None drops all keys
+        """
+        with self._lock:
+            if gateway_id is None:
+                self._keys.clear()
+            else:
+                self._keys.pop(gateway_id, None)
+
+    def encrypt(self, gateway_id: str, credentials) -> str:
+        """Encrypts credentials with a gateway's public key
+
+        :param gateway_id: The gateway id
+        :param credentials: The credentials, a CredentialsBase or its json
+        :return: The encrypted credentials
+        """
+        if not isinstance(credentials, str):
+            credentials = credentials.to_json()
+
+        return self._key(gateway_id).encrypt(credentials.encode('utf-8'))
+
+    def encrypt_many(self, items: Iterable[Tuple[str, Any]]) -> List[str]:
+        """Encrypts many credentials, reading the public keys of their gateways concurrently first
+
+        :param items: (gateway id, credentials) pairs
+        :return: The encrypted credentials, in the order of items
+        """
+        items = list(items)
+        missing = list(dict.fromkeys(gateway_id for gateway_id, _ in items if gateway_id not in self._keys))
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pypowerbi-keys') as executor:
+                list(executor.map(self._key, missing))
+
+        return [self.encrypt(gateway_id, credentials) for gateway_id, credentials in items]
+
+    def credential_details(
+        self,
+        gateway_id: str,
+        credentials,
+        privacy_level: PrivacyLevel = PrivacyLevel.NONE,
+        encrypted_connection: EncryptedConnection = EncryptedConnection.ENCRYPTED
+    ) -> CredentialDetails:
+        """Builds the credential details of a datasource on an on-premises gateway
+
+        :param gateway_id: The gateway id
+        :param credentials: The credentials, a CredentialsBase
+        :param privacy_level: The privacy level of the datasource
+        :param encrypted_connection: Whether the connection to the datasource is encrypted
+        :return: The credential details, with the encrypted credentials
+        """
+        return CredentialDetails(self.encrypt(gateway_id, credentials), credentials.CREDENTIAL_TYPE,
+                                 encrypted_connection, EncryptionAlgorithm.RSA_OAEP, privacy_level)
+
+    def __repr__(self):
+        return f'<GatewayCredentialEncryptor keys={len(self._keys)}>'
@@ -49,3 +49,12 @@ class PrivacyLevel(Enum):
     PUBLIC = 'Public'
     ORGANIZATIONAL = 'Organizational'
     PRIVATE = 'Private'
+
+
+class ColumnDataType(Enum):
+    INT64 = 'Int64'
+    DOUBLE = 'Double'
+    DECIMAL = 'Decimal'
+    BOOLEAN = 'Boolean'
+    DATETIME = 'DateTime'
+    STRING = 'String'
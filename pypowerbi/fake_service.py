@@ -0,0 +1,1133 @@
+# -*- coding: future_fstrings -*-
+import collections
+import datetime
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import BaseAdapter
+
+from .instrumentation import endpoint_template
+from .json_codec import JsonCodec
+
+
+"""
+This file contains an in-process fake of the Power BI REST API, for testing and benchmarking without a tenant. It keeps
+workspaces, datasets, tables, rows, refreshes, reports, imports, groups, gateways and activity events in memory and
+answers the endpoints the library uses, with configurable latency, throttling and failure injection.
+
+The service can be mounted on a client's requests session through FakeServiceAdapter, or served as a WSGI app.
+"""
+
+# the format of the datetimes in refresh histories
+_refresh_date_fmt_str = '%Y-%m-%dT%H:%M:%S.%fZ'
+# the format of embed token expirations, as parsed by EmbedToken.expiration_as_datetime
+_expiration_date_fmt_str = '%Y-%m-%dT%H:%M:%SZ'
+
+_status_reasons = {
+    200: 'OK',
+    201: 'Created',
+    202: 'Accepted',
+    400: 'Bad Request',
+    404: 'Not Found',
+    409: 'Conflict',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class FakeServiceError(Exception):
+    """Raised by route handlers to answer with an error response"""
+    def __init__(self, status_code: int, code: str, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+class _Fault:
+    __slots__ = ('status_code', 'method', 'endpoint', 'times', 'retry_after')
+
+    def __init__(self, status_code, method, endpoint, times, retry_after):
+        self.status_code = status_code
+        self.method = method
+        self.endpoint = endpoint
+        self.times = times
+        self.retry_after = retry_after
+
+    def matches(self, method: str, endpoint: str) -> bool:
+        return (self.method is None or self.method == method) and (self.endpoint is None or self.endpoint == endpoint)
+
+
+class _Workspace:
+    """The items of a single workspace, 'My workspace' or a group"""
+    __slots__ = ('datasets', 'tables', 'rows', 'parameters', 'datasources', 'refreshes', 'refresh_schedules',
+                 'reports', 'report_files', 'imports')
+
+    def __init__(self):
+        self.datasets: Dict[str, Dict[str, Any]] = {}
+        # keyed by dataset id, then table name
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.rows: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self.parameters: Dict[str, List[Dict[str, Any]]] = {}
+        self.datasources: Dict[str, List[Dict[str, Any]]] = {}
+        self.refreshes: Dict[str, List[Dict[str, Any]]] = {}
+        self.refresh_schedules: Dict[str, Dict[str, Any]] = {}
+        self.reports: Dict[str, Dict[str, Any]] = {}
+        self.report_files: Dict[str, bytes] = {}
+        self.imports: Dict[str, Dict[str, Any]] = {}
+
+
+# (method, path pattern, handler name); paths are relative to /v1.0/myorg, workspace scoped paths to the workspace
+_routes = [
+    ('GET', r'groups', '_get_groups'),
+    ('POST', r'groups', '_post_group'),
+    ('POST', r'groups/(?P<group_id>[^/]+)/users', '_post_group_user'),
+    ('GET', r'gateways', '_get_gateways'),
+    ('GET', r'gateways/(?P<gateway_id>[^/]+)', '_get_gateway'),
+    ('GET', r'gateways/(?P<gateway_id>[^/]+)/datasources', '_get_gateway_datasources'),
+    ('POST', r'gateways/(?P<gateway_id>[^/]+)/datasources', '_post_gateway_datasource'),
+    ('PATCH', r'gateways/(?P<gateway_id>[^/]+)/datasources/(?P<datasource_id>[^/]+)', '_patch_gateway_datasource'),
+    ('DELETE', r'gateways/(?P<gateway_id>[^/]+)/datasources/(?P<datasource_id>[^/]+)', '_delete_gateway_datasource'),
+    ('GET', r'gateways/(?P<gateway_id>[^/]+)/datasources/(?P<datasource_id>[^/]+)/users', '_get_datasource_users'),
+    ('POST', r'gateways/(?P<gateway_id>[^/]+)/datasources/(?P<datasource_id>[^/]+)/users', '_post_datasource_user'),
+    ('POST', r'GenerateToken', '_generate_token'),
+    ('GET', r'admin/activityevents', '_get_activity_events'),
+    ('GET', r"availableFeatures(?:\(featureName='(?P<feature_name>[^']*)'\))?", '_get_features'),
+]
+
+_workspace_routes = [
+    ('GET', r'datasets', '_get_datasets'),
+    ('POST', r'datasets', '_post_dataset'),
+    ('GET', r'datasets/(?P<dataset_id>[^/]+)', '_get_dataset'),
+    ('DELETE', r'datasets/(?P<dataset_id>[^/]+)', '_delete_dataset'),
+    ('GET', r'datasets/(?P<dataset_id>[^/]+)/tables', '_get_tables'),
+    ('PUT', r'datasets/(?P<dataset_id>[^/]+)/tables/(?P<table_name>[^/]+)', '_put_table'),
+    ('POST', r'datasets/(?P<dataset_id>[^/]+)/tables/(?P<table_name>[^/]+)/rows', '_post_rows'),
+    ('DELETE', r'datasets/(?P<dataset_id>[^/]+)/tables/(?P<table_name>[^/]+)/rows', '_delete_rows'),
+    ('GET', r'datasets/(?P<dataset_id>[^/]+)/parameters', '_get_parameters'),
+    ('POST', r'datasets/(?P<dataset_id>[^/]+)/Default\.UpdateParameters', '_update_parameters'),
+    ('GET', r'datasets/(?P<dataset_id>[^/]+)/datasources', '_get_dataset_datasources'),
+    ('POST', r'datasets/(?P<dataset_id>[^/]+)/Default\.BindToGateway', '_bind_to_gateway'),
+    ('GET', r'datasets/(?P<dataset_id>[^/]+)/refreshes', '_get_refreshes'),
+    ('POST', r'datasets/(?P<dataset_id>[^/]+)/refreshes', '_post_refresh'),
+    ('GET', r'datasets/(?P<dataset_id>[^/]+)/refreshSchedule', '_get_refresh_schedule'),
+    ('PATCH', r'datasets/(?P<dataset_id>[^/]+)/refreshSchedule', '_patch_refresh_schedule'),
+    ('GET', r'reports', '_get_reports'),
+    ('DELETE', r'reports/(?P<report_id>[^/]+)', '_delete_report'),
+    ('POST', r'reports/(?P<report_id>[^/]+)/clone', '_clone_report'),
+    ('POST', r'reports/(?P<report_id>[^/]+)/rebind', '_rebind_report'),
+    ('GET', r'reports/(?P<report_id>[^/]+)/Export', '_export_report'),
+    ('POST', r'reports/(?P<report_id>[^/]+)/generatetoken', '_generate_report_token'),
+    ('GET', r'imports', '_get_imports'),
+    ('POST', r'imports', '_post_import'),
+    ('GET', r'imports/(?P<import_id>[^/]+)', '_get_import'),
+]
+
+_api_prefix_regex = re.compile(r'^/v1\.0/myorg(?=/|$)')
+_workspace_regex = re.compile(r'^groups/(?P<group_id>[^/]+)/(?=datasets|reports|imports)')
+_slashes_regex = re.compile(r'/{2,}')
+
+
+def _compile_routes(routes):
+    return [(method, re.compile(f'^{pattern}$'), handler) for method, pattern, handler in routes]
+
+
+class FakePowerBIService:
+    """An in-memory fake of the Power BI REST API
+
+    Items are added through the API or seeded with the add_* methods. Every request first waits for the configured
+    latency, then may be answered with an injected fault, a throttled (429) response or a random failure before it is
+    routed.
+    """
+    default_api_url = 'https://api.powerbi.com'
+
+    # the push datasets limit on rows per post rows request
+    max_rows_per_post = 10000
+    # the number of activity events per page of a continuation chain
+    activity_events_page_size = 1000
+    # embed token lifetime in seconds
+    token_lifetime = 3600
+
+    _compiled_routes = _compile_routes(_routes)
+    _compiled_workspace_routes = _compile_routes(_workspace_routes)
+
+    def __init__(
+        self,
+        latency: Union[float, Callable[[str, str], float]] = 0.0,
+        throttle_limit: Optional[int] = None,
+        throttle_window: float = 60.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """Constructs a FakePowerBIService
+
+        :param latency: Seconds to wait before answering each request, or a callable taking the method and endpoint
+         template and returning the seconds to wait
+        :param throttle_limit: The number of requests per endpoint template allowed within throttle_window seconds;
+         requests over the limit are answered with 429 and a Retry-After header. None disables throttling.
+        :param throttle_window: The throttling window in seconds
+        :param failure_rate: The probability of answering a request with a 500 error
+        :param seed: Seed for the generated ids and the random failures, for reproducible runs
+        """
+        self.latency = latency
+        self.throttle_limit = throttle_limit
+        self.throttle_window = throttle_window
+        self.failure_rate = failure_rate
+
+        self.json_codec = JsonCodec()
+        # (method, endpoint template, status code) of every answered request
+        self.request_log: List[Tuple[str, str, int]] = []
+
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._faults: List[_Fault] = []
+        self._throttle_windows: Dict[str, collections.deque] = collections.defaultdict(collections.deque)
+
+        self._workspaces: Dict[Optional[str], _Workspace] = {None: _Workspace()}
+        self._groups: Dict[str, Dict[str, Any]] = {}
+        self._group_users: Dict[str, List[Dict[str, Any]]] = {}
+        self._gateways: Dict[str, Dict[str, Any]] = {}
+        self._gateway_datasources: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._datasource_users: Dict[str, List[Dict[str, Any]]] = {}
+        self._activity_events: List[Dict[str, Any]] = []
+        self._continuations: Dict[str, int] = {}
+        self._features: List[Dict[str, Any]] = []
+
+    # ---- clients and transports ----
+
+    def adapter(self) -> 'FakeServiceAdapter':
+        """Returns a requests transport adapter answering requests from this service"""
+        return FakeServiceAdapter(self)
+
+    def client(self, api_url: Optional[str] = None, **kwargs):
+        """Returns a PowerBIClient whose requests are answered by this service
+
+        :param api_url: The api url the client uses; defaults to 'https://api.powerbi.com'
+        :param kwargs: Further PowerBIClient arguments, e.g. json_codec or max_retry_wait. A session other than a
+         requests.Session has to be wired to the service already, e.g. an HttpxSession over httpx.WSGITransport(self).
+        :return: The client
+        """
+        from .client import PowerBIClient
+
+        if api_url is None:
+            api_url = self.default_api_url
+
+        client = PowerBIClient(api_url, {'accessToken': 'fake-access-token'}, **kwargs)
+        if isinstance(client.session, requests.Session):
+            client.session.mount(api_url, self.adapter())
+
+        return client
+
+    def __call__(self, environ, start_response):
+        """Serves the service as a WSGI app"""
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        body = environ['wsgi.input'].read(length) if length > 0 else b''
+
+        base_url = f'{environ.get("wsgi.url_scheme", "http")}://{environ.get("HTTP_HOST") or environ["SERVER_NAME"]}'
+        path = urllib.parse.quote(environ.get('PATH_INFO', ''))
+        query = environ.get('QUERY_STRING', '')
+
+        status_code, headers, content = self.handle(environ['REQUEST_METHOD'], f'{base_url}{path}?{query}', body)
+
+        start_response(f'{status_code} {_status_reasons.get(status_code, "")}', list(headers.items()))
+        return [content]
+
+    # ---- fault injection ----
+
+    def inject_fault(
+        self,
+        status_code: int,
+        method: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        times: int = 1,
+        retry_after: Optional[float] = None
+    ) -> None:
+        """Answers the next matching requests with an error
+
+        :param status_code: The status code to answer with, e.g. 429, 500 or 503
+        :param method: The http method to match; None matches any method
+        :param endpoint: The endpoint template to match, e.g. '/v1.0/myorg/datasets/{id}/tables/{name}/rows'; None
+         matches any endpoint
+        :param times: The number of requests to answer with the error
+        :param retry_after: The Retry-After header value in seconds, if any
+        """
+        with self._lock:
+            self._faults.append(_Fault(status_code, method and method.upper(), endpoint, times, retry_after))
+
+    def clear_faults(self) -> None:
+        """Discards injected faults which have not been answered yet"""
+        with self._lock:
+            self._faults.clear()
+
+    # ---- request handling ----
+
+    def handle(self, method: str, url: str, body: Optional[bytes] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Answers a single request
+
+        :param method: The http method
+        :param url: The request url, including the query string
+        :param body: The request body
+        :return: The status code, headers and body of the response
+        """
+        method = method.upper()
+        endpoint = endpoint_template(url)
+
+        latency = self.latency(method, endpoint) if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+        with self._lock:
+            response = self._faulted(method, endpoint)
+            if response is None:
+                response = self._route(method, url, body or b'')
+
+            self.request_log.append((method, endpoint, response[0]))
+
+        return response
+
+    def _faulted(self, method: str, endpoint: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        for fault in self._faults:
+            if fault.matches(method, endpoint):
+                fault.times -= 1
+                if fault.times <= 0:
+                    self._faults.remove(fault)
+
+                headers = {}
+                if fault.retry_after is not None:
+                    headers['Retry-After'] = str(fault.retry_after)
+
+                return self._error(fault.status_code, 'InjectedFault', f'Injected {fault.status_code} fault', headers)
+
+        if self.throttle_limit is not None:
+            now = time.monotonic()
+            window = self._throttle_windows[f'{method} {endpoint}']
+            while window and window[0] <= now - self.throttle_window:
+                window.popleft()
+
+            if len(window) >= self.throttle_limit:
+                retry_after = max(window[0] + self.throttle_window - now, 0.0)
+                return self._error(429, 'TooManyRequests', 'Request rate limit exceeded',
+                                   {'Retry-After': f'{retry_after:.3f}'})
+
+            window.append(now)
+
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            return self._error(500, 'InternalServerError', 'Injected random failure')
+
+        return None
+
+    def _route(self, method: str, url: str, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urllib.parse.urlsplit(url)
+        path = _slashes_regex.sub('/', parts.path)
+        query = dict(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+
+        match = _api_prefix_regex.match(path)
+        if match is None:
+            return self._error(404, 'NotFound', f'No route for {path}')
+        path = urllib.parse.unquote(path[match.end():].strip('/'))
+
+        workspace_id = None
+        routes = self._compiled_routes
+        match = _workspace_regex.match(path)
+        if match is not None or path.startswith(('datasets', 'reports', 'imports')):
+            if match is not None:
+                workspace_id = match.group('group_id')
+                path = path[match.end():]
+            routes = self._compiled_workspace_routes
+
+        for route_method, pattern, handler in routes:
+            match = pattern.match(path)
+            if match is None or route_method != method:
+                continue
+
+            request = _FakeRequest(f'{parts.scheme}://{parts.netloc}', workspace_id, match.groupdict(), query, body,
+                                   self.json_codec)
+            try:
+                if workspace_id is not None:
+                    request.workspace = self._workspace(workspace_id)
+                else:
+                    request.workspace = self._workspaces[None]
+
+                return getattr(self, handler)(request)
+            except FakeServiceError as error:
+                return self._error(error.status_code, error.code, str(error))
+
+        return self._error(404, 'NotFound', f'No route for {method} {path}')
+
+    def _response(self, status_code: int, obj: Any = None, headers: Optional[Dict[str, str]] = None):
+        response_headers = {'Content-Type': 'application/json; charset=utf-8'}
+        if headers:
+            response_headers.update(headers)
+
+        content = b'' if obj is None else self.json_codec.dumps(obj)
+        response_headers['Content-Length'] = str(len(content))
+
+        return status_code, response_headers, content
+
+    def _error(self, status_code: int, code: str, message: str, headers: Optional[Dict[str, str]] = None):
+        headers = dict(headers or {})
+        headers['x-powerbi-error-info'] = code
+
+        return self._response(status_code, {'error': {'code': code, 'message': message}}, headers)
+
+    def _new_id(self) -> str:
+        return str(uuid.UUID(int=self._random.getrandbits(128), version=4))
+
+    # ---- lookups ----
+
+    def _workspace(self, group_id: str) -> _Workspace:
+        workspace = self._workspaces.get(group_id)
+        if workspace is None:
+            raise FakeServiceError(404, 'PowerBIEntityNotFound', f'Group {group_id} not found')
+
+        return workspace
+
+    @staticmethod
+    def _dataset(workspace: _Workspace, dataset_id: str) -> Dict[str, Any]:
+        dataset = workspace.datasets.get(dataset_id)
+        if dataset is None:
+            raise FakeServiceError(404, 'ItemNotFound', f'Dataset {dataset_id} not found')
+
+        return dataset
+
+    def _table(self, workspace: _Workspace, dataset_id: str, table_name: str) -> Dict[str, Any]:
+        self._dataset(workspace, dataset_id)
+        table = workspace.tables[dataset_id].get(table_name)
+        if table is None:
+            raise FakeServiceError(404, 'ItemNotFound', f'Table {table_name} not found')
+
+        return table
+
+    @staticmethod
+    def _report(workspace: _Workspace, report_id: str) -> Dict[str, Any]:
+        report = workspace.reports.get(report_id)
+        if report is None:
+            raise FakeServiceError(404, 'ItemNotFound', f'Report {report_id} not found')
+
+        return report
+
+    def _gateway(self, gateway_id: str) -> Dict[str, Any]:
+        gateway = self._gateways.get(gateway_id)
+        if gateway is None:
+            raise FakeServiceError(404, 'ItemNotFound', f'Gateway {gateway_id} not found')
+
+        return gateway
+
+    def _gateway_datasource(self, gateway_id: str, datasource_id: str) -> Dict[str, Any]:
+        datasource = self._gateway_datasources[self._gateway(gateway_id)['id']].get(datasource_id)
+        if datasource is None:
+            raise FakeServiceError(404, 'ItemNotFound', f'Datasource {datasource_id} not found')
+
+        return datasource
+
+    # ---- seeding and inspection ----
+
+    def add_group(self, name: str, group_id: Optional[str] = None) -> Dict[str, Any]:
+        """Adds a workspace
+
+        :param name: The workspace name
+        :param group_id: The workspace id; generated if None
+        :return: The group as returned by the API
+        """
+        with self._lock:
+            group = {
+                'id': group_id or self._new_id(),
+                'name': name,
+                'isReadOnly': False,
+                'isOnDedicatedCapacity': False,
+            }
+            self._groups[group['id']] = group
+            self._group_users[group['id']] = []
+            self._workspaces[group['id']] = _Workspace()
+
+            return group
+
+    def add_dataset(
+        self,
+        name: str,
+        tables: Optional[List[Dict[str, Any]]] = None,
+        group_id: Optional[str] = None,
+        parameters: Optional[Dict[str, str]] = None,
+        datasources: Optional[List[Dict[str, Any]]] = None,
+        dataset_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Adds a dataset
+
+        :param name: The dataset name
+        :param tables: The table dicts, as posted with a push dataset
+        :param group_id: The workspace id; None for 'My workspace'
+        :param parameters: The dataset parameters, by name
+        :param datasources: The dataset datasource dicts
+        :param dataset_id: The dataset id; generated if None
+        :return: The dataset as returned by the API
+        """
+        with self._lock:
+            workspace = self._workspace(group_id) if group_id is not None else self._workspaces[None]
+            dataset = {
+                'id': dataset_id or self._new_id(),
+                'name': name,
+                'addRowsAPIEnabled': tables is not None,
+                'configuredBy': 'fake@contoso.com',
+                'isRefreshable': tables is None,
+                'isEffectiveIdentityRequired': False,
+                'isEffectiveIdentityRolesRequired': False,
+                'isOnPremGatewayRequired': False,
+            }
+            workspace.datasets[dataset['id']] = dataset
+            workspace.tables[dataset['id']] = {table['name']: dict(table) for table in tables or ()}
+            workspace.rows[dataset['id']] = {table['name']: [] for table in tables or ()}
+            workspace.parameters[dataset['id']] = [
+                {'name': key, 'type': 'Text', 'isRequired': True, 'currentValue': value}
+                for key, value in (parameters or {}).items()
+            ]
+            workspace.datasources[dataset['id']] = [dict(datasource) for datasource in datasources or ()]
+            workspace.refreshes[dataset['id']] = []
+
+            return dataset
+
+    def add_report(
+        self,
+        name: str,
+        dataset_id: str,
+        group_id: Optional[str] = None,
+        content: Optional[bytes] = None,
+        report_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Adds a report
+
+        :param name: The report name
+        :param dataset_id: The id of the dataset the report is bound to
+        :param group_id: The workspace id; None for 'My workspace'
+        :param content: The pbix content returned when the report is exported
+        :param report_id: The report id; generated if None
+        :return: The report as returned by the API
+        """
+        with self._lock:
+            workspace = self._workspace(group_id) if group_id is not None else self._workspaces[None]
+            report_id = report_id or self._new_id()
+            groups_part = f'groups/{group_id}' if group_id is not None else 'groups/me'
+            report = {
+                'id': report_id,
+                'name': name,
+                'webUrl': f'https://app.powerbi.com/{groups_part}/reports/{report_id}',
+                'embedUrl': f'https://app.powerbi.com/reportEmbed?reportId={report_id}',
+                'datasetId': dataset_id,
+            }
+            workspace.reports[report_id] = report
+            workspace.report_files[report_id] = content if content is not None else b'PK\x03\x04' + name.encode()
+
+            return report
+
+    def add_gateway(self, name: str, public_key: Optional[Dict[str, str]] = None,
+                    gateway_id: Optional[str] = None) -> Dict[str, Any]:
+        """Adds a gateway
+
+        :param name: The gateway name
+        :param public_key: The gateway public key dict, with exponent and modulus
+        :param gateway_id: The gateway id; generated if None
+        :return: The gateway as returned by the API
+        """
+        with self._lock:
+            gateway = {
+                'id': gateway_id or self._new_id(),
+                'name': name,
+                'type': 'Resource',
+                'publicKey': public_key or {'exponent': 'AQAB', 'modulus': 'o6j2kNjv'},
+                'gatewayAnnotation': '{"gatewayVersion":"3000.0.0"}',
+                'gatewayStatus': 'Live',
+            }
+            self._gateways[gateway['id']] = gateway
+            self._gateway_datasources[gateway['id']] = {}
+
+            return gateway
+
+    def add_gateway_datasource(
+        self,
+        gateway_id: str,
+        name: str,
+        datasource_type: str = 'Sql',
+        connection_details: Optional[Dict[str, str]] = None,
+        credential_type: str = 'Windows',
+        users: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Adds a datasource to a gateway
+
+        :param gateway_id: The gateway id
+        :param name: The datasource name
+        :param datasource_type: The datasource type
+        :param connection_details: The connection details dict
+        :param credential_type: The credential type
+        :param users: The datasource user dicts
+        :return: The datasource as returned by the API
+        """
+        with self._lock:
+            self._gateway(gateway_id)
+            datasource = {
+                'id': self._new_id(),
+                'gatewayId': gateway_id,
+                'datasourceType': datasource_type,
+                'datasourceName': name,
+                'connectionDetails': self.json_codec.dumps(connection_details or {}).decode('utf-8'),
+                'credentialType': credential_type,
+            }
+            self._gateway_datasources[gateway_id][datasource['id']] = datasource
+            self._datasource_users[datasource['id']] = [dict(user) for user in users or ()]
+
+            return datasource
+
+    def add_activity_events(self, events: List[Dict[str, Any]]) -> None:
+        """Adds activity events, returned in pages of activity_events_page_size events by the activity events API
+
+        :param events: The event dicts; CreationTime values are formatted as '%Y-%m-%dT%H:%M:%S'
+        """
+        with self._lock:
+            self._activity_events.extend(events)
+
+    def add_feature(self, name: str, state: str = 'Enabled', extended_state: str = 'Enabled',
+                    additional_info: Optional[Dict[str, Any]] = None) -> None:
+        """Adds an available feature"""
+        with self._lock:
+            feature = {'name': name, 'state': state, 'extendedState': extended_state}
+            if additional_info is not None:
+                feature['additionalInfo'] = additional_info
+            self._features.append(feature)
+
+    def rows(self, dataset_id: str, table_name: str, group_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Returns the rows pushed to a table
+
+        :param dataset_id: The dataset id
+        :param table_name: The table name
+        :param group_id: The workspace id; None for 'My workspace'
+        :return: The row dicts
+        """
+        with self._lock:
+            workspace = self._workspace(group_id) if group_id is not None else self._workspaces[None]
+            self._table(workspace, dataset_id, table_name)
+
+            return list(workspace.rows[dataset_id][table_name])
+
+    # ---- groups ----
+
+    def _get_groups(self, request):
+        groups = list(self._groups.values())
+
+        name_filter = re.match(r"^name eq '(?P<name>.*)'$", request.query.get('$filter', ''))
+        if name_filter is not None:
+            groups = [group for group in groups if group['name'] == name_filter.group('name')]
+
+        skip = int(request.query.get('$skip', 0))
+        top = int(request.query['$top']) if '$top' in request.query else None
+        groups = groups[skip:] if top is None else groups[skip:skip + top]
+
+        return self._response(200, {'value': groups})
+
+    def _post_group(self, request):
+        body = request.json()
+        if not body.get('name'):
+            raise FakeServiceError(400, 'InvalidRequest', 'Group name is required')
+        if any(group['name'] == body['name'] for group in self._groups.values()):
+            raise FakeServiceError(409, 'PowerBIEntityAlreadyExists', f'Group {body["name"]} already exists')
+
+        return self._response(200, self.add_group(body['name']))
+
+    def _post_group_user(self, request):
+        group_id = request.arguments['group_id']
+        self._workspace(group_id)
+        self._group_users[group_id].append(request.json())
+
+        return self._response(200)
+
+    # ---- datasets ----
+
+    def _get_datasets(self, request):
+        return self._response(200, {'value': list(request.workspace.datasets.values())})
+
+    def _post_dataset(self, request):
+        body = request.json()
+        if not body.get('name'):
+            raise FakeServiceError(400, 'InvalidRequest', 'Dataset name is required')
+
+        dataset = self.add_dataset(body['name'], body.get('tables') or [], request.workspace_id)
+
+        return self._response(201, dataset)
+
+    def _get_dataset(self, request):
+        return self._response(200, self._dataset(request.workspace, request.arguments['dataset_id']))
+
+    def _delete_dataset(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        workspace = request.workspace
+        for items in (workspace.datasets, workspace.tables, workspace.rows, workspace.parameters,
+                      workspace.datasources, workspace.refreshes, workspace.refresh_schedules):
+            items.pop(dataset_id, None)
+
+        return self._response(200)
+
+    def _get_tables(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        return self._response(200, {'value': list(request.workspace.tables[dataset_id].values())})
+
+    def _put_table(self, request):
+        dataset_id = request.arguments['dataset_id']
+        table_name = request.arguments['table_name']
+        self._dataset(request.workspace, dataset_id)
+
+        body = request.json()
+        if body.get('name') != table_name:
+            raise FakeServiceError(400, 'InvalidRequest', 'The table name cannot be changed')
+
+        # putting a table the dataset does not have yet adds it
+        request.workspace.tables[dataset_id][table_name] = {key: value for key, value in body.items()
+                                                            if key != 'rows'}
+        request.workspace.rows[dataset_id].setdefault(table_name, [])
+
+        return self._response(200, request.workspace.tables[dataset_id][table_name])
+
+    def _post_rows(self, request):
+        dataset_id = request.arguments['dataset_id']
+        table = self._table(request.workspace, dataset_id, request.arguments['table_name'])
+
+        rows = request.json().get('rows')
+        if not isinstance(rows, list):
+            raise FakeServiceError(400, 'InvalidRequest', 'The request body has no rows')
+        if len(rows) > self.max_rows_per_post:
+            raise FakeServiceError(400, 'InvalidRequest',
+                                   f'{len(rows)} rows exceeds the limit of {self.max_rows_per_post} rows per request')
+
+        request.workspace.rows[dataset_id][table['name']].extend(rows)
+
+        return self._response(200, {})
+
+    def _delete_rows(self, request):
+        dataset_id = request.arguments['dataset_id']
+        table = self._table(request.workspace, dataset_id, request.arguments['table_name'])
+        request.workspace.rows[dataset_id][table['name']] = []
+
+        return self._response(200, {})
+
+    def _get_parameters(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        return self._response(200, {'value': request.workspace.parameters[dataset_id]})
+
+    def _update_parameters(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        parameters = {parameter['name']: parameter for parameter in request.workspace.parameters[dataset_id]}
+        update_details = request.json().get('updateDetails') or []
+        for detail in update_details:
+            if detail.get('name') not in parameters:
+                raise FakeServiceError(400, 'InvalidRequest', f'Dataset has no parameter {detail.get("name")}')
+
+        for detail in update_details:
+            parameters[detail['name']]['currentValue'] = detail.get('newValue')
+
+        return self._response(200)
+
+    def _get_dataset_datasources(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        return self._response(200, {'value': request.workspace.datasources[dataset_id]})
+
+    def _bind_to_gateway(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        gateway = self._gateway(request.json().get('gatewayObjectId'))
+        for datasource in request.workspace.datasources[dataset_id]:
+            datasource['gatewayId'] = gateway['id']
+
+        return self._response(200)
+
+    def _get_refreshes(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        # most recent first
+        refreshes = request.workspace.refreshes[dataset_id][::-1]
+        if '$top' in request.query:
+            refreshes = refreshes[:int(request.query['$top'])]
+
+        return self._response(200, {'value': refreshes})
+
+    def _post_refresh(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        now = datetime.datetime.utcnow().strftime(_refresh_date_fmt_str)
+        request.workspace.refreshes[dataset_id].append({
+            'requestId': self._new_id(),
+            'id': len(request.workspace.refreshes[dataset_id]) + 1,
+            'refreshType': 'ViaApi',
+            'startTime': now,
+            'endTime': now,
+            'status': 'Completed',
+        })
+
+        return self._response(202)
+
+    def _get_refresh_schedule(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        schedule = request.workspace.refresh_schedules.get(dataset_id) or {
+            'days': [], 'times': [], 'enabled': False, 'localTimeZoneId': 'UTC', 'notifyOption': 'NoNotification',
+        }
+
+        return self._response(200, schedule)
+
+    def _patch_refresh_schedule(self, request):
+        dataset_id = request.arguments['dataset_id']
+        self._dataset(request.workspace, dataset_id)
+
+        schedule = request.workspace.refresh_schedules.setdefault(dataset_id, {
+            'days': [], 'times': [], 'enabled': False, 'localTimeZoneId': 'UTC', 'notifyOption': 'NoNotification',
+        })
+        schedule.update(request.json().get('value') or {})
+
+        return self._response(200)
+
+    # ---- reports ----
+
+    def _get_reports(self, request):
+        return self._response(200, {'value': list(request.workspace.reports.values())})
+
+    def _delete_report(self, request):
+        report_id = request.arguments['report_id']
+        self._report(request.workspace, report_id)
+        del request.workspace.reports[report_id]
+        del request.workspace.report_files[report_id]
+
+        return self._response(200)
+
+    def _clone_report(self, request):
+        report_id = request.arguments['report_id']
+        report = self._report(request.workspace, report_id)
+
+        body = request.json()
+        if not body.get('name'):
+            raise FakeServiceError(400, 'InvalidRequest', 'Report name is required')
+
+        target_group_id = body.get('targetWorkspaceId', request.workspace_id)
+        target_workspace = self._workspace(target_group_id) if target_group_id is not None else \
+            self._workspaces[None]
+        dataset_id = body.get('targetModelId') or report['datasetId']
+        self._dataset(target_workspace, dataset_id)
+
+        clone = self.add_report(body['name'], dataset_id, target_group_id,
+                                request.workspace.report_files[report_id])
+
+        return self._response(200, clone)
+
+    def _rebind_report(self, request):
+        report = self._report(request.workspace, request.arguments['report_id'])
+
+        dataset_id = request.json().get('datasetId')
+        self._dataset(request.workspace, dataset_id)
+        report['datasetId'] = dataset_id
+
+        return self._response(200)
+
+    def _export_report(self, request):
+        report_id = request.arguments['report_id']
+        self._report(request.workspace, report_id)
+        content = request.workspace.report_files[report_id]
+
+        return 200, {'Content-Type': 'application/zip', 'Content-Length': str(len(content))}, content
+
+    def _generate_report_token(self, request):
+        self._report(request.workspace, request.arguments['report_id'])
+
+        expiration = datetime.datetime.utcnow() + datetime.timedelta(seconds=self.token_lifetime)
+
+        return self._response(200, {
+            'token': f'H4sI{self._new_id().replace("-", "")}',
+            'tokenId': self._new_id(),
+            'expiration': expiration.strftime(_expiration_date_fmt_str),
+        })
+
+    # ---- embed tokens ----
+
+    def _generate_token(self, request):
+        body = request.json()
+        dataset_ids = {dataset.get('id') for dataset in body.get('datasets') or ()}
+        reports = body.get('reports') or ()
+        if not dataset_ids and not reports:
+            raise FakeServiceError(400, 'InvalidRequest', 'The token request lists no datasets or reports')
+
+        datasets = {}
+        all_reports = {}
+        for workspace in self._workspaces.values():
+            datasets.update(workspace.datasets)
+            all_reports.update(workspace.reports)
+
+        for dataset_id in dataset_ids:
+            if dataset_id not in datasets:
+                raise FakeServiceError(404, 'ItemNotFound', f'Dataset {dataset_id} not found')
+
+        for item in reports:
+            report = all_reports.get(item.get('id'))
+            if report is None:
+                raise FakeServiceError(404, 'ItemNotFound', f'Report {item.get("id")} not found')
+            # a report's dataset has to be part of the token
+            if report['datasetId'] not in dataset_ids:
+                raise FakeServiceError(400, 'InvalidRequest', f'The dataset of report {report["id"]} is not listed')
+
+        for item in body.get('targetWorkspaces') or ():
+            self._workspace(item.get('id'))
+
+        lifetime = self.token_lifetime
+        if body.get('lifetimeInMinutes'):
+            lifetime = min(lifetime, int(body['lifetimeInMinutes']) * 60)
+        expiration = datetime.datetime.utcnow() + datetime.timedelta(seconds=lifetime)
+
+        return self._response(200, {
+            'token': f'H4sI{self._new_id().replace("-", "")}',
+            'tokenId': self._new_id(),
+            'expiration': expiration.strftime(_expiration_date_fmt_str),
+        })
+
+    # ---- imports ----
+
+    def _get_imports(self, request):
+        return self._response(200, {'value': list(request.workspace.imports.values())})
+
+    def _get_import(self, request):
+        pbix_import = request.workspace.imports.get(request.arguments['import_id'])
+        if pbix_import is None:
+            raise FakeServiceError(404, 'ItemNotFound', f'Import {request.arguments["import_id"]} not found')
+
+        return self._response(200, pbix_import)
+
+    def _post_import(self, request):
+        display_name = request.query.get('datasetDisplayName')
+        if not display_name:
+            raise FakeServiceError(400, 'InvalidRequest', 'datasetDisplayName is required')
+        if not request.body:
+            raise FakeServiceError(400, 'InvalidRequest', 'The request has no file')
+
+        name = display_name[:-len('.pbix')] if display_name.endswith('.pbix') else display_name
+        name_conflict = request.query.get('nameConflict', 'Abort')
+
+        existing = [dataset for dataset in request.workspace.datasets.values() if dataset['name'] == name]
+        if existing and name_conflict == 'Abort':
+            raise FakeServiceError(409, 'DuplicatePackageNotFoundError', f'A dataset named {name} already exists')
+
+        if existing and name_conflict in ('Overwrite', 'CreateOrOverwrite'):
+            dataset = existing[0]
+            reports = [report for report in request.workspace.reports.values()
+                       if report['datasetId'] == dataset['id']]
+        else:
+            dataset = self.add_dataset(name, group_id=request.workspace_id)
+            reports = [self.add_report(name, dataset['id'], request.workspace_id, request.body)]
+
+        now = datetime.datetime.utcnow().strftime(_refresh_date_fmt_str)
+        pbix_import = {
+            'id': self._new_id(),
+            'name': name,
+            'importState': 'Succeeded',
+            'createdDateTime': now,
+            'updatedDateTime': now,
+            'datasets': [dataset],
+            'reports': reports,
+        }
+        request.workspace.imports[pbix_import['id']] = pbix_import
+
+        return self._response(202, pbix_import)
+
+    # ---- gateways ----
+
+    def _get_gateways(self, request):
+        return self._response(200, {'value': list(self._gateways.values())})
+
+    def _get_gateway(self, request):
+        return self._response(200, self._gateway(request.arguments['gateway_id']))
+
+    def _get_gateway_datasources(self, request):
+        gateway = self._gateway(request.arguments['gateway_id'])
+
+        return self._response(200, {'value': list(self._gateway_datasources[gateway['id']].values())})
+
+    def _post_gateway_datasource(self, request):
+        gateway = self._gateway(request.arguments['gateway_id'])
+
+        body = request.json()
+        for key in ('dataSourceType', 'connectionDetails', 'credentialDetails', 'datasourceName'):
+            if key not in body:
+                raise FakeServiceError(400, 'InvalidRequest', f'{key} is required')
+
+        if any(datasource['datasourceName'] == body['datasourceName']
+               for datasource in self._gateway_datasources[gateway['id']].values()):
+            raise FakeServiceError(409, 'DMTS_DatasourceAlreadyExists',
+                                   f'Datasource {body["datasourceName"]} already exists')
+
+        datasource = self.add_gateway_datasource(gateway['id'], body['datasourceName'], body['dataSourceType'],
+                                                 credential_type=body['credentialDetails'].get('credentialType'))
+        datasource['connectionDetails'] = body['connectionDetails']
+
+        return self._response(201, datasource)
+
+    def _patch_gateway_datasource(self, request):
+        datasource = self._gateway_datasource(request.arguments['gateway_id'], request.arguments['datasource_id'])
+
+        credential_details = request.json().get('credentialDetails')
+        if not credential_details or 'credentialType' not in credential_details:
+            raise FakeServiceError(400, 'InvalidRequest', 'credentialDetails with a credentialType are required')
+
+        datasource['credentialType'] = credential_details['credentialType']
+
+        return self._response(200)
+
+    def _delete_gateway_datasource(self, request):
+        gateway_id = request.arguments['gateway_id']
+        datasource_id = request.arguments['datasource_id']
+        self._gateway_datasource(gateway_id, datasource_id)
+
+        del self._gateway_datasources[gateway_id][datasource_id]
+        self._datasource_users.pop(datasource_id, None)
+
+        return self._response(200)
+
+    def _get_datasource_users(self, request):
+        datasource = self._gateway_datasource(request.arguments['gateway_id'], request.arguments['datasource_id'])
+
+        return self._response(200, {'value': self._datasource_users[datasource['id']]})
+
+    def _post_datasource_user(self, request):
+        datasource = self._gateway_datasource(request.arguments['gateway_id'], request.arguments['datasource_id'])
+
+        body = request.json()
+        identifier = body.get('identifier') or body.get('emailAddress')
+        if not identifier or 'datasourceAccessRight' not in body:
+            raise FakeServiceError(400, 'InvalidRequest', 'An identifier and datasourceAccessRight are required')
+
+        user = dict(body, identifier=identifier)
+        users = self._datasource_users[datasource['id']]
+        for index, existing in enumerate(users):
+            if existing['identifier'] == identifier:
+                users[index] = user
+                break
+        else:
+            users.append(user)
+
+        return self._response(200)
+
+    # ---- activity events ----
+
+    def _get_activity_events(self, request):
+        token = request.query.get('continuationToken')
+        if token is not None:
+            offset = self._continuations.pop(token.strip("'"), None)
+            if offset is None:
+                raise FakeServiceError(400, 'InvalidContinuationToken', 'Unknown continuation token')
+        else:
+            if 'startDateTime' not in request.query or 'endDateTime' not in request.query:
+                raise FakeServiceError(400, 'InvalidRequest', 'startDateTime and endDateTime are required')
+            offset = 0
+
+        end = offset + self.activity_events_page_size
+        page = self._activity_events[offset:end]
+        last_result_set = end >= len(self._activity_events)
+
+        if last_result_set:
+            continuation_token = None
+            continuation_uri = None
+        else:
+            continuation_token = self._new_id()
+            self._continuations[continuation_token] = end
+            quoted = urllib.parse.quote(f"'{continuation_token}'")
+            continuation_uri = f'{request.base_url}/v1.0/myorg/admin/activityevents?continuationToken={quoted}'
+
+        return self._response(200, {
+            'activityEventEntities': page,
+            'continuationUri': continuation_uri,
+            'continuationToken': continuation_token,
+            'lastResultSet': last_result_set,
+        })
+
+    # ---- features ----
+
+    def _get_features(self, request):
+        feature_name = request.arguments.get('feature_name')
+        if feature_name is None:
+            return self._response(200, {'features': self._features})
+
+        for feature in self._features:
+            if feature['name'] == feature_name:
+                return self._response(200, feature)
+
+        raise FakeServiceError(404, 'FeatureNotAvailableError', f'Feature {feature_name} not found')
+
+
+class _FakeRequest:
+    __slots__ = ('base_url', 'workspace_id', 'workspace', 'arguments', 'query', 'body', '_json_codec')
+
+    def __init__(self, base_url, workspace_id, arguments, query, body, json_codec):
+        self.base_url = base_url
+        self.workspace_id = workspace_id
+        self.workspace = None
+        self.arguments = arguments
+        self.query = query
+        self.body = body
+        self._json_codec = json_codec
+
+    def json(self) -> Dict[str, Any]:
+        if not self.body:
+            return {}
+
+        try:
+            body = self._json_codec.loads(self.body)
+        except ValueError:
+            raise FakeServiceError(400, 'InvalidRequest', 'The request body is not valid json') from None
+
+        if not isinstance(body, dict):
+            raise FakeServiceError(400, 'InvalidRequest', 'The request body is not a json object')
+
+        return body
+
+
+class FakeServiceAdapter(BaseAdapter):
+    """A requests transport adapter answering requests from a FakePowerBIService"""
+    def __init__(self, service: FakePowerBIService):
+        super().__init__()
+        self.service = service
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        elif body is not None and not isinstance(body, bytes):
+            # streamed bodies, e.g. file uploads
+            body = body.read() if hasattr(body, 'read') else b''.join(body)
+
+        status_code, headers, content = self.service.handle(request.method, request.url, body)
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = _status_reasons.get(status_code, '')
+        response.headers.update(headers)
+        response._content = content
+        response.encoding = 'utf-8'
+        response.request = request
+        response.url = request.url
+
+        return response
+
+    def close(self):
+        pass
@@ -1,10 +1,12 @@
 # -*- coding: future_fstrings -*-
-import requests
-import json
 
 from requests.exceptions import HTTPError
 
+from .json_codec import default_codec
+from .tracing import traced_operations
 
+
+@traced_operations
 class Features:
     # url snippets
     features_snippet = 'availableFeatures'
@@ -40,17 +42,17 @@ class Features:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Datasets request returned http error: {response.json()}')
 
-        return Features.features_from_get_available_features_response(response)
+        return Features.features_from_get_available_features_response(response, self.client.json_codec)
 
     @staticmethod
-    def features_from_get_available_features_response(response):
-        response_dict = json.loads(response.text)
+    def features_from_get_available_features_response(response, json_codec=None):
+        response_dict = (json_codec or default_codec).loads(response.content)
 
         # check wether we are returning a single feature or a list of features
         if 'features' in response_dict:
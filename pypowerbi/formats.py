@@ -0,0 +1,16 @@
+# -*- coding: future_fstrings -*-
+import re
+
+
+"""
+This file contains the value formats shared by schema inference and row validation: the range of Int64 columns, and
+the integer, float and datetime strings that are read as values of those types.
+"""
+
+int64_min = -2 ** 63
+int64_max = 2 ** 63 - 1
+
+int_regex = re.compile(r'[+-]?\d+')
+float_regex = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+datetime_regex = re.compile(r'\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])'
+                            r'(?:[T ](?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?')
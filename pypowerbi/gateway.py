@@ -2,7 +2,8 @@
 import json
 from typing import Dict, Union, Optional
 
-from .base import Deserializable
+from .base import Deserializable, Field
+from .json_codec import wire_string
 from .enums import CredentialType, DatasourceUserAccessRight, PrincipalType, EncryptedConnection, EncryptionAlgorithm, \
     PrivacyLevel
 
@@ -11,6 +12,13 @@ class GatewayPublicKey(Deserializable):
     exponent_key = 'exponent'
     modulus_key = 'modulus'
 
+    __slots__ = ('exponent', 'modulus')
+
+    field_specs = (
+        Field(exponent_key, 'exponent'),
+        Field(modulus_key, 'modulus'),
+    )
+
     def __init__(
             self,
             exponent: str,
@@ -30,19 +38,6 @@ class GatewayPublicKey(Deserializable):
             self.modulus_key: self.modulus
         }
 
-    @classmethod
-    def from_dict(cls, dictionary: Dict[str, str]) -> 'GatewayPublicKey':
-        """Constructs a GatewayPublicKey from a dictionary
-
-        :param dictionary: the dictionary describing the GatewayPublicKey
-        :return: GatewayPublicKey based on the dictionary
-        :rtype: GatewayPublicKey
-        """
-        exponent = dictionary.get(cls.exponent_key)
-        modulus = dictionary.get(cls.modulus_key)
-
-        return cls(exponent, modulus)
-
     def __repr__(self) -> str:
         return f'<GatewayPublicKey exponent={self.exponent} modulus={self.modulus}>'
 
@@ -55,6 +50,17 @@ class Gateway(Deserializable):
     public_key_key = 'publicKey'
     status_key = 'gatewayStatus'
 
+    __slots__ = ('id', 'name', 'type', 'gateway_annotation', 'public_key', 'status')
+
+    field_specs = (
+        Field(id_key, 'id', required=True),
+        Field(name_key, 'name'),
+        Field(type_key, 'type'),
+        Field(gateway_annotation_key, 'gateway_annotation'),
+        Field(public_key_key, 'public_key', model=GatewayPublicKey),
+        Field(status_key, 'status'),
+    )
+
     def __init__(
             self,
             gateway_id: str,
@@ -80,26 +86,6 @@ class Gateway(Deserializable):
         self.public_key = public_key
         self.status = status
 
-    @classmethod
-    def from_dict(cls, dictionary: Dict[str, Union[str, Dict[str, str]]]) -> 'Gateway':
-        """Constructs a Gateway object from a dict
-
-        :param dictionary: Dictionary describing the gateway
-        :return: Gateway based on the dictionary
-        :rtype: Gateway
-        """
-        gateway_id = dictionary.get(cls.id_key)
-        if gateway_id is None:
-            raise RuntimeError("Gateway dictionary has no id key")
-
-        name = dictionary.get(cls.name_key)
-        gateway_type = dictionary.get(cls.type_key)
-        gateway_annotation = dictionary.get(cls.gateway_annotation_key)
-        public_key = GatewayPublicKey.from_dict(dictionary.get(cls.public_key_key))
-        status = dictionary.get(cls.status_key)
-
-        return cls(gateway_id, name, gateway_type, gateway_annotation, public_key, status)
-
     def __repr__(self) -> str:
         return f'<Gateway id={self.id} name={self.name}>'
 
@@ -112,6 +98,18 @@ class GatewayDatasource(Deserializable):
     datasource_type_key = 'datasourceType'
     connection_details_key = 'connectionDetails'
 
+    __slots__ = ('id', 'gateway_id', 'credential_type', 'datasource_name', 'datasource_type', 'connection_details')
+
+    field_specs = (
+        Field(gateway_datasource_id_key, 'id', required=True),
+        Field(gateway_id_key, 'gateway_id'),
+        Field(credential_type_key, 'credential_type', convert=CredentialType),
+        Field(datasource_name_key, 'datasource_name'),
+        Field(datasource_type_key, 'datasource_type'),
+        # connection details are kept as a json string
+        Field(connection_details_key, 'connection_details', convert=json.dumps),
+    )
+
     def __init__(
             self,
             gateway_datasource_id: str,
@@ -137,34 +135,6 @@ class GatewayDatasource(Deserializable):
         self.datasource_type = datasource_type
         self.connection_details = connection_details
 
-    @classmethod
-    def from_dict(cls, dictionary: Dict[str, str]) -> 'GatewayDatasource':
-        """Constructs a GatewayDatasource object from a dict
-
-        :param dictionary: Dictionary describing the gatewayDatasource
-        :return: GatewayDatasource based on the dictionary
-        :rtype: GatewayDatasource
-        """
-        gateway_datasource_id = dictionary.get(cls.gateway_datasource_id_key)
-        if gateway_datasource_id is None:
-            raise RuntimeError("GatewayDatasource dictionary has no id key")
-
-        gateway_id = dictionary.get(cls.gateway_id_key)
-        # use round brackets below to access enum by value
-        credential_type = CredentialType(dictionary.get(cls.credential_type_key))
-        datasource_name = dictionary.get(cls.datasource_name_key)
-        datasource_type = dictionary.get(cls.datasource_type_key)
-        connection_details = json.dumps(dictionary.get(cls.connection_details_key))
-
-        return cls(
-            gateway_datasource_id,
-            gateway_id,
-            credential_type,
-            datasource_name,
-            datasource_type,
-            connection_details
-        )
-
     def __repr__(self):
         return f'<GatewayDatasource id={self.id} name={self.datasource_name} type={self.datasource_type}>'
 
@@ -176,6 +146,16 @@ class DatasourceUser(Deserializable):
     identifier_key = 'identifier'
     principal_type_key = 'principalType'
 
+    __slots__ = ('datasource_access_right', 'email_address', 'display_name', 'identifier', 'principal_type')
+
+    field_specs = (
+        Field(datasource_access_right_key, 'datasource_access_right', convert=DatasourceUserAccessRight),
+        Field(email_address_key, 'email_address', default=""),
+        Field(display_name_key, 'display_name', default=""),
+        Field(identifier_key, 'identifier', required=True),
+        Field(principal_type_key, 'principal_type', convert=PrincipalType),
+    )
+
     def __init__(
         self,
         datasource_access_right: DatasourceUserAccessRight,
@@ -198,21 +178,6 @@ class DatasourceUser(Deserializable):
         self.identifier = identifier
         self.principal_type = principal_type
 
-    @classmethod
-    def from_dict(cls, dictionary: Dict[str, str]) -> 'DatasourceUser':
-        datasource_user_id = dictionary.get(cls.identifier_key)
-        if datasource_user_id is None:
-            raise RuntimeError("DatasourceUser dictionary has no identifier key")
-
-        datasource_user_access_right = DatasourceUserAccessRight(dictionary.get(cls.datasource_access_right_key))
-        email_address = dictionary.get(cls.email_address_key, "")
-        display_name = dictionary.get(cls.display_name_key, "")
-        principal_type_value = dictionary.get(cls.principal_type_key, None)
-        principal_type = PrincipalType(principal_type_value) if principal_type_value is not None \
-            else principal_type_value
-
-        return cls(datasource_user_access_right, email_address, display_name, datasource_user_id, principal_type)
-
     def as_set_values_dict(self) -> Dict[str, str]:
         set_values_dict = dict()
 
@@ -287,15 +252,10 @@ class DatasourceConnectionDetails:
 
         :return: json string of set values
         """
-        json_dict = self.as_set_values_dict()
-
-        # dump to json string
-        # remove spaces between object keys and values
-        # replace double backslashes with single slashes
-        # remove double quotes at start and end of str
-        return json.dumps(json_dict) \
-            .replace(r'": ', r'":') \
-            .replace('\\\\', '\\')
+        # compact between keys and values but not between items, with backslashes left unescaped
+        return '{' + ', '.join(f'"{key}":' + (wire_string(value, drop_colon_space=True) if isinstance(value, str)
+                                               else json.dumps(value))
+                               for key, value in self.as_set_values_dict().items()) + '}'
 
 
 class CredentialDetails:
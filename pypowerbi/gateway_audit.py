@@ -0,0 +1,132 @@
+# -*- coding: future_fstrings -*-
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .concurrency import RateLimiter
+from .gateway import DatasourceUser, Gateway, GatewayDatasource
+from .utils import is_transient_error
+
+
+"""
+This file contains the gateway audit, which lists the datasources of many gateways and the users of every datasource
+concurrently, yielding each datasource with its users as soon as they are read.
+"""
+
+
+class GatewayAudit:
+    """Enumerates the users of every datasource of a set of gateways
+
+    Iterating yields a (gateway, datasource, users) tuple per datasource, in the order the requests complete. The
+    datasources of a gateway are listed as soon as the gateways are, and the users of a datasource as soon as its
+    gateway's datasources are, with at most max_workers requests in flight. A request failing on a connection error,
+    timeout, throttling or server error is retried on its own, without holding back other branches; a branch that
+    keeps failing, or fails on any other error, is recorded in errors and skipped.
+
+        audit = GatewayAudit(client.gateways)
+        for gateway, datasource, users in audit:
+            ...
+        if audit.errors:
+            ...
+    """
+    def __init__(
+        self,
+        gateways,
+        gateway_ids: Optional[Iterable[str]] = None,
+        max_workers: int = 8,
+        requests_per_second: Optional[float] = None,
+        max_attempts: int = 3,
+        retry_wait: float = 1.0
+    ):
+        """Constructs a GatewayAudit
+
+        :param gateways: The Gateways operations of a client
+        :param gateway_ids: The ids of the gateways to audit; None audits all gateways
+        :param max_workers: The number of concurrent requests
+        :param requests_per_second: The rate requests are started at across workers; None does not pace them
+        :param max_attempts: The attempts made per request failing on transient errors before its branch is given up
+        :param retry_wait: The seconds waited before the first retry of a request, doubling with each retry
+        """
+        self.gateways = gateways
+        self.gateway_ids = None if gateway_ids is None else list(gateway_ids)
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_wait = retry_wait
+        # the exceptions of the branches given up, by ('gateway', gateway id) or ('datasource', gateway id,
+        # datasource id)
+        self.errors: Dict[Tuple[str, ...], BaseException] = {}
+        # the requests that were retried
+        self.retries = 0
+
+        self._limiter = RateLimiter(requests_per_second) if requests_per_second else None
+        self._lock = threading.Lock()
+
+    def _call(self, func: Callable, *args):
+        """Calls func, retrying it with exponential backoff while it fails on transient errors"""
+        for attempt in range(self.max_attempts):
+            if self._limiter is not None:
+                self._limiter.acquire()
+
+            try:
+                return func(*args)
+            except Exception as error:
+                if attempt + 1 == self.max_attempts or not is_transient_error(error):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self.retry_wait * 2 ** attempt)
+
+    def _list_gateways(self) -> List[Gateway]:
+        if self.gateway_ids is None:
+            return list(self._call(self.gateways.get_gateways))
+
+        # gateways that cannot be read are given up individually
+        gateways = []
+        for gateway_id in self.gateway_ids:
+            try:
+                gateways.append(self._call(self.gateways.get_gateway, gateway_id))
+            except Exception as error:
+                self.errors[('gateway', gateway_id)] = error
+
+        return gateways
+
+    def __iter__(self) -> Iterator[Tuple[Gateway, GatewayDatasource, List[DatasourceUser]]]:
+        self.errors = {}
+        self.retries = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pypowerbi-gateway-audit')
+        # the branch of each pending request: (gateway,) while listing datasources, (gateway, datasource) after
+        pending = {}
+
+        try:
+            for gateway in self._list_gateways():
+                pending[executor.submit(self._call, self.gateways.get_datasources, gateway.id)] = (gateway,)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    branch = pending.pop(future)
+                    gateway = branch[0]
+
+                    try:
+                        result = future.result()
+                    except Exception as error:
+                        key = ('gateway', gateway.id) if len(branch) == 1 else ('datasource', gateway.id,
+                                                                                 branch[1].id)
+                        self.errors[key] = error
+                        continue
+
+                    if len(branch) == 1:
+                        for datasource in result:
+                            future = executor.submit(self._call, self.gateways.get_datasource_users, gateway.id,
+                                                     datasource.id)
+                            pending[future] = (gateway, datasource)
+                    else:
+                        yield gateway, branch[1], list(result)
+        finally:
+            # stopping the iteration early drops the requests that have not started
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
@@ -1,15 +1,17 @@
 # -*- coding: future_fstrings -*-
-from typing import List, Type, Any
+from typing import Sequence, Type, Any, Optional
 
 import requests
-import json
 
 from requests.exceptions import HTTPError
 
-from .gateway import Gateway, GatewayDatasource, DatasourceUser, PublishDatasourceToGatewayRequest
-from .base import Deserializable
+from .gateway import Gateway, GatewayDatasource, DatasourceUser, PublishDatasourceToGatewayRequest, CredentialDetails
+from .base import Deserializable, ModelList
+from .json_codec import JsonCodec, default_codec
+from .tracing import traced_operations
 
 
+@traced_operations
 class Gateways:
     # url snippets
     gateways_snippet = 'gateways'
@@ -23,7 +25,7 @@ class Gateways:
         self.client = client
         self.base_url = f'{self.client.api_url}/{self.client.api_version_snippet}/{self.client.api_myorg_snippet}'
 
-    def get_gateways(self) -> List[Gateway]:
+    def get_gateways(self) -> Sequence[Gateway]:
         """Fetches all gateways the user is an admin for"""
 
         # form the url
@@ -33,13 +35,13 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Gateways request returned http error: {response.json()}')
 
-        return self._models_from_get_multiple_response(response, Gateway)
+        return self._models_from_get_multiple_response(response, Gateway, self.client.json_codec)
 
     def get_gateway(self, gateway_id: str) -> Gateway:
         """Return the specified gateway
@@ -54,15 +56,15 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Gateway request returned http error: {response.json()}')
 
-        return self._model_from_get_one_response(response, Gateway)
+        return self._model_from_get_one_response(response, Gateway, self.client.json_codec)
 
-    def get_datasources(self, gateway_id: str) -> List[GatewayDatasource]:
+    def get_datasources(self, gateway_id: str) -> Sequence[GatewayDatasource]:
         """Returns a list of datasources from the specified gateway
 
         :param gateway_id: The gateway id to return responses for
@@ -77,15 +79,15 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Gateway Datasources request returned http error: {response.json()}')
 
-        return self._models_from_get_multiple_response(response, GatewayDatasource)
+        return self._models_from_get_multiple_response(response, GatewayDatasource, self.client.json_codec)
 
-    def get_datasource_users(self, gateway_id: str, datasource_id: str) -> List[DatasourceUser]:
+    def get_datasource_users(self, gateway_id: str, datasource_id: str) -> Sequence[DatasourceUser]:
         """Returns a list of users who have access to the specified datasource
 
         :param gateway_id: The gateway id
@@ -99,13 +101,13 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Datasource Users request returned http error: {response.json()}')
 
-        return self._models_from_get_multiple_response(response, DatasourceUser)
+        return self._models_from_get_multiple_response(response, DatasourceUser, self.client.json_codec)
 
     def create_datasource(
         self,
@@ -124,16 +126,16 @@ class Gateways:
         body = datasource_to_gateway_request.to_dict()
 
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
 
         # get the response
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(body))
 
         # 201 is the only successful code, raise an exception on any other response code
         if response.status_code != 201:
             raise HTTPError(f'Create Datasource request returned the following http error: {response.json()}')
 
-        return self._model_from_get_one_response(response, GatewayDatasource)
+        return self._model_from_get_one_response(response, GatewayDatasource, self.client.json_codec)
 
     def delete_datasource(
         self,
@@ -153,7 +155,7 @@ class Gateways:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.delete(url, headers=headers)
+        response = self.client.request('DELETE', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -161,6 +163,38 @@ class Gateways:
 
         return None
 
+    def update_datasource(
+        self,
+        gateway_id: str,
+        datasource_id: str,
+        credential_details: CredentialDetails
+    ) -> None:
+        """Updates the credentials of the specified datasource on the specified gateway
+
+        :param gateway_id: The gateway id
+        :param datasource_id: The datasource id
+        :param credential_details: The new credentials to access the datasource
+        :return: None
+        """
+        # form the url
+        url = f'{self.base_url}/{self.gateways_snippet}/{gateway_id}/{self.datasources_snippet}/{datasource_id}'
+
+        # define request body
+        body = {'credentialDetails': credential_details.to_dict()}
+
+        # form the headers
+        headers = self.client.json_headers
+
+        # get the response
+        response = self.client.request('PATCH', url, headers=headers, data=self.client.json_codec.dumps(body))
+
+        # 200 is the only successful code, raise an exception on any other response code
+        if response.status_code != 200:
+            raise HTTPError(response, f'Update Datasource request returned the following http error: '
+                                      f'{response.json()}')
+
+        return None
+
     def add_datasource_user(
         self,
         gateway_id: str,
@@ -183,10 +217,10 @@ class Gateways:
         body = datasource_user.as_set_values_dict()
 
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
 
         # get the response
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(body))
 
         if response.status_code != 200:
             # add datasource user requests return an empty body; get the error from headers instead
@@ -199,35 +233,35 @@ class Gateways:
     def _models_from_get_multiple_response(
         cls,
         response: requests.Response,
-        model_class: Type[Deserializable]
-    ) -> List[Any]:
+        model_class: Type[Deserializable],
+        json_codec: Optional[JsonCodec] = None
+    ) -> ModelList:
         """Creates a list of models from a http response object
 
         :param response:
             The http response object
         :param model_class:
             The model to transform the response items into
-        :return: list
-            The list of model_class instances
+        :param json_codec:
+            The json codec to decode the response with; defaults to the fastest installed backend
+        :return: ModelList
+            The lazily built list of model_class instances
         """
 
         # parse json response into a dict
-        response_dict = json.loads(response.text)
-
-        # Add parsed Gateway objects to list
-        items = []
-        for entry in response_dict[cls.odata_response_wrapper_key]:
-            items.append(model_class.from_dict(entry))
+        response_dict = (json_codec or default_codec).loads(response.content)
 
-        return items
+        # models are built from the entries as they are accessed
+        return ModelList(response_dict[cls.odata_response_wrapper_key], model_class)
 
     @classmethod
     def _model_from_get_one_response(
         cls,
         response: requests.Response,
-        model_class: Type[Deserializable]
+        model_class: Type[Deserializable],
+        json_codec: Optional[JsonCodec] = None
     ) -> Any:
         # parse
-        response_dict = json.loads(response.text)
+        response_dict = (json_codec or default_codec).loads(response.content)
 
         return model_class.from_dict(response_dict)
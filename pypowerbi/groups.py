@@ -1,13 +1,16 @@
 # -*- coding: future_fstrings -*-
-import requests
 import json
 import urllib.parse
 
 from requests.exceptions import HTTPError
+from .base import ModelList
+from .json_codec import default_codec
+from .tracing import traced_operations
 from .group import Group
 from .group_user import GroupUser
 
 
+@traced_operations
 class Groups:
     # url snippets
     groups_snippet = 'groups'
@@ -49,27 +52,29 @@ class Groups:
             url += f'?{str.join("&", uri_parameters)}'
 
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
 
         # get the response
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(body))
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(f'Add group request returned the following http error: {response.json()}')
 
-        return self.create_group_from_create_group_response(response)
+        return self.create_group_from_create_group_response(response, self.client.json_codec)
 
     @staticmethod
-    def create_group_from_create_group_response(response):
+    def create_group_from_create_group_response(response, json_codec=None):
         """Creates a Group object from the response to a create_group call
 
         :param response:
             The http response object
+        :param json_codec:
+            The json codec to decode the response with; defaults to the fastest installed backend
         :return:
             Group object describing the newly created group
         """
-        group_dict = json.loads(response.text)
+        group_dict = (json_codec or default_codec).loads(response.content)
         return Group.from_dict(group_dict)
 
     def add_group_user(self, group_id, group_user):
@@ -94,10 +99,10 @@ class Groups:
         url = f'{self.base_url}/{self.groups_snippet}/{urllib.parse.quote(stripped_group_id)}/{self.users_snippet}'
 
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
 
         # get the response
-        response = requests.post(url, headers=headers, json=body)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(body))
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
@@ -122,11 +127,7 @@ class Groups:
         """
         groups = self.get_groups()
 
-        for group in groups:
-            if group.id == str(group_id):
-                return True
-
-        return False
+        return str(group_id) in groups.ids()
 
     def get_groups(self, filter_str=None, top=None, skip=None):
         """
@@ -160,29 +161,27 @@ class Groups:
         # form the headers
         headers = self.client.auth_header
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only successful code, raise an exception on any other response code
         if response.status_code != 200:
             raise HTTPError(response, f'Get Groups request returned http error: {response.json()}')
 
-        return self.groups_from_get_groups_response(response)
+        return self.groups_from_get_groups_response(response, self.client.json_codec)
 
     @classmethod
-    def groups_from_get_groups_response(cls, response):
+    def groups_from_get_groups_response(cls, response, json_codec=None):
         """
         Creates a list of groups from a http response object
         :param response:
             The http response object
-        :return: list
-            The list of groups
+        :param json_codec:
+            The json codec to decode the response with; defaults to the fastest installed backend
+        :return: ModelList
+            The lazily built list of groups
         """
         # load the response into a dict
-        response_dict = json.loads(response.text)
-        groups = []
-
-        # go through entries returned from API
-        for entry in response_dict[cls.get_reports_value_key]:
-            groups.append(Group.from_dict(entry))
+        response_dict = (json_codec or default_codec).loads(response.content)
 
-        return groups
+        # groups are built from the entries as they are accessed
+        return ModelList(response_dict[cls.get_reports_value_key], Group)
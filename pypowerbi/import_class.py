@@ -1,10 +1,11 @@
 # -*- coding: future_fstrings -*-
 
+from .base import Deserializable, Field, attributes_dict
 from .dataset import Dataset
 from .report import Report
 
 
-class Import:
+class Import(Deserializable):
     # json keys
     id_key = 'id'
     name_key = 'name'
@@ -21,6 +22,21 @@ class Import:
     import_state_succeeded = 'Succeeded'
     import_state_publishing = 'Publishing'
 
+    __slots__ = ('id', 'name', 'created_datetime', 'datasets', 'import_state', 'reports', 'updated_datetime',
+                 'source', 'connection_type')
+
+    field_specs = (
+        Field(id_key, 'id', required=True),
+        Field(name_key, 'name'),
+        Field(created_timedate_key, 'created_datetime'),
+        Field(datasets_key, 'datasets', model=Dataset, many=True),
+        Field(import_state_key, 'import_state'),
+        Field(reports_key, 'reports', model=Report, many=True),
+        Field(updated_datetime_key, 'updated_datetime'),
+        Field(source_key, 'source'),
+        Field(connection_type_key, 'connection_type'),
+    )
+
     def __init__(self, import_id, name=None, created_datetime=None, datasets=None, import_state=None,
                  reports=None, updated_datetime=None, source=None, connection_type=None):
         self.id = import_id
@@ -33,33 +49,5 @@ class Import:
         self.source = source
         self.connection_type = connection_type
 
-    @classmethod
-    def from_dict(cls, dictionary):
-        import_id = dictionary.get(cls.id_key)
-        if import_id is None:
-            raise RuntimeError("Import dictionary has no id key")
-
-        name = dictionary.get(cls.name_key)
-        created_datetime = dictionary.get(cls.created_timedate_key)
-
-        if cls.datasets_key in dictionary:
-            datasets = [Dataset.from_dict(x) for x in dictionary.get(cls.datasets_key)]
-        else:
-            datasets = None
-
-        import_state = dictionary.get(cls.import_state_key)
-
-        if cls.reports_key in dictionary:
-            reports = [Report.from_dict(x) for x in dictionary.get(cls.reports_key)]
-        else:
-            reports = None
-
-        updated_datetime = dictionary.get(cls.updated_datetime_key)
-        source = dictionary.get(cls.source_key)
-        connection_type = dictionary.get(cls.connection_type_key)
-
-        return cls(import_id, name, created_datetime, datasets, import_state,
-                   reports, updated_datetime, source, connection_type)
-
     def __repr__(self):
-        return f'<Import {str(self.__dict__)}>'
+        return f'<Import {str(attributes_dict(self))}>'
@@ -1,13 +1,15 @@
 # -*- coding: future_fstrings -*-
-import requests
-import json
 import urllib
 import re
 
 from requests.exceptions import HTTPError
+from .base import ModelList
+from .json_codec import default_codec
+from .tracing import traced_operations
 from .import_class import Import
 
 
+@traced_operations
 class Imports:
     # url snippets
     groups_snippet = 'groups'
@@ -21,14 +23,14 @@ class Imports:
         self.upload_file_replace_regex = re.compile('(?![A-z]|[0-9]).')
 
     @classmethod
-    def import_from_response(cls, response):
-        response_dict = json.loads(response.text)
+    def import_from_response(cls, response, json_codec=None):
+        response_dict = (json_codec or default_codec).loads(response.content)
         return Import.from_dict(response_dict)
 
     @classmethod
-    def imports_from_response(cls, response):
-        response_list = json.loads(response.text).get(Import.value_key)
-        return [Import.from_dict(x) for x in response_list]
+    def imports_from_response(cls, response, json_codec=None):
+        response_list = (json_codec or default_codec).loads(response.content).get(Import.value_key)
+        return ModelList(response_list, Import)
 
     def upload_file(self, filename, dataset_displayname, nameconflict=None, group_id=None):
         if group_id is None:
@@ -50,23 +52,17 @@ class Imports:
         headers = self.client.auth_header
         try:
             with open(filename, 'rb') as file_obj:
-                response = requests.post(url, headers=headers,
-                                        files={
-                                            'file': file_obj,
-                                        })
+                response = self.client.request('POST', url, headers=headers, files={'file': file_obj})
         except TypeError:
             # assume filename is a file-like object already
-            response = requests.post(url, headers=headers,
-                            files={
-                                'file': filename,
-                            })
+            response = self.client.request('POST', url, headers=headers, files={'file': filename})
 
         # 200 OK
         if response.status_code == 200:
-            import_object = self.import_from_response(response)
+            import_object = self.import_from_response(response, self.client.json_codec)
         # 202 Accepted
         elif response.status_code == 202:
-            import_object = self.import_from_response(response)
+            import_object = self.import_from_response(response, self.client.json_codec)
         # 490 Conflict (due to name)
         elif response.status_code == 409:
             raise NotImplementedError("Name conflict resolution not implemented yet")
@@ -84,11 +80,11 @@ class Imports:
         url = f'{self.base_url}{groups_part}{self.imports_snippet}/{import_id}'
 
         headers = self.client.auth_header
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 OK
         if response.status_code == 200:
-            import_object = self.import_from_response(response)
+            import_object = self.import_from_response(response, self.client.json_codec)
         else:
             raise HTTPError(response, f"Get import failed with status code: {response.json()}")
 
@@ -103,11 +99,11 @@ class Imports:
         url = f'{self.base_url}{groups_part}{self.imports_snippet}'
 
         headers = self.client.auth_header
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 OK
         if response.status_code == 200:
-            import_object = self.imports_from_response(response)
+            import_object = self.imports_from_response(response, self.client.json_codec)
         else:
             raise HTTPError(response, f"Get imports failed with status code: {response.json()}")
 
@@ -0,0 +1,260 @@
+# -*- coding: future_fstrings -*-
+import re
+import threading
+import urllib.parse
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+
+"""
+This file contains the request hooks and the metrics collector of the client. Every http request made by the library
+goes through PowerBIClient.request, which emits the hooks below.
+"""
+
+# guids, e.g. dataset, report, group and gateway ids
+_guid_regex = re.compile(r'(?<=/)[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}(?=/|$)')
+# table names, which are the only non-guid names in request paths
+_table_name_regex = re.compile(r'(?<=/tables/)[^/]+')
+# the library forms some urls with a double slash when no group is given
+_slashes_regex = re.compile(r'/{2,}')
+
+
+def endpoint_template(url: str) -> str:
+    """Reduces a request url to its endpoint template, e.g. /v1.0/myorg/groups/{id}/datasets/{id}/tables/{name}/rows
+
+    :param url: The request url
+    :return: The url path with ids and names replaced by placeholders
+    """
+    path = urllib.parse.urlsplit(url).path
+    path = _slashes_regex.sub('/', path)
+    path = _guid_regex.sub('{id}', path)
+    path = _table_name_regex.sub('{name}', path)
+
+    return path.rstrip('/') or '/'
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestContext:
+    """Describes a single http attempt, passed to every hook"""
+    __slots__ = ('method', 'url', 'endpoint', 'attempt', 'bytes_sent', 'bytes_received', 'status_code', 'elapsed')
+
+    def __init__(self, method: str, url: str, attempt: int = 0):
+        """Constructs a RequestContext
+
+        :param method: The http method
+        :param url: The request url
+        :param attempt: The attempt number, 0 for the first attempt and counting up with each retry
+        """
+        self.method = method.upper()
+        self.url = url
+        self.endpoint = endpoint_template(url)
+        self.attempt = attempt
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.status_code = None
+        self.elapsed = None
+
+    def __repr__(self):
+        return f'<RequestContext {self.method} {self.endpoint} attempt={self.attempt} status={self.status_code}>'
+
+
+class Hooks:
+    """Callbacks invoked around each http attempt
+
+    before_request(context) - before the request is sent
+    after_response(context, response) - once a response is received, whatever its status code
+    on_retry(context, response, wait) - before waiting `wait` seconds to retry a throttled request
+    on_error(context, error) - when sending the request raised, e.g. on connection errors
+    """
+    before_request = 'before_request'
+    after_response = 'after_response'
+    on_retry = 'on_retry'
+    on_error = 'on_error'
+
+    events = (before_request, after_response, on_retry, on_error)
+
+    def __init__(self):
+        self._callbacks: Dict[str, List[Callable]] = {event: [] for event in self.events}
+
+    def register(self, event: str, callback: Callable) -> Callable:
+        """Registers a callback for an event
+
+        :param event: One of Hooks.events
+        :param callback: The callback
+        :return: The callback
+        """
+        if event not in self._callbacks:
+            raise ValueError(f'Unknown hook event: {event}')
+
+        self._callbacks[event].append(callback)
+
+        return callback
+
+    def unregister(self, event: str, callback: Callable) -> None:
+        """Removes a previously registered callback
+
+        :param event: One of Hooks.events
+        :param callback: The callback
+        """
+        self._callbacks[event].remove(callback)
+
+    def emit(self, event: str, *args: Any) -> None:
+        for callback in self._callbacks[event]:
+            callback(*args)
+
+
+class MetricsCollector:
+    """Collects per endpoint latency histograms, status code counts, transferred bytes, retries and throttle waits"""
+    # latency histogram upper bounds in seconds
+    default_buckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets=None):
+        """Constructs a MetricsCollector
+
+        :param buckets: The latency histogram bucket upper bounds in seconds; defaults to MetricsCollector.default_buckets
+        """
+        self.buckets = tuple(sorted(buckets)) if buckets is not None else self.default_buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Discards everything collected so far"""
+        with self._lock:
+            self._endpoints: Dict[str, Dict[str, Any]] = {}
+
+    def attach(self, hooks: Hooks) -> None:
+        """Registers the collector's callbacks on hooks"""
+        hooks.register(Hooks.after_response, self.after_response)
+        hooks.register(Hooks.on_retry, self.on_retry)
+        hooks.register(Hooks.on_error, self.on_error)
+
+    def detach(self, hooks: Hooks) -> None:
+        """Removes the collector's callbacks from hooks"""
+        hooks.unregister(Hooks.after_response, self.after_response)
+        hooks.unregister(Hooks.on_retry, self.on_retry)
+        hooks.unregister(Hooks.on_error, self.on_error)
+
+    def _endpoint(self, context: RequestContext) -> Dict[str, Any]:
+        key = f'{context.method} {context.endpoint}'
+        endpoint = self._endpoints.get(key)
+
+        if endpoint is None:
+            endpoint = {
+                'method': context.method,
+                'endpoint': context.endpoint,
+                'requests': 0,
+                'latency_sum': 0.0,
+                # one count per bucket plus the overflow (+Inf) bucket, not cumulative
+                'latency_buckets': [0] * (len(self.buckets) + 1),
+                'status_codes': defaultdict(int),
+                'errors': 0,
+                'bytes_sent': 0,
+                'bytes_received': 0,
+                'retries': 0,
+                'throttle_waits': 0,
+                'throttle_wait_seconds': 0.0,
+            }
+            self._endpoints[key] = endpoint
+
+        return endpoint
+
+    def _observe_latency(self, endpoint: Dict[str, Any], elapsed: Optional[float]) -> None:
+        if elapsed is None:
+            return
+
+        endpoint['latency_sum'] += elapsed
+        for index, bound in enumerate(self.buckets):
+            if elapsed <= bound:
+                endpoint['latency_buckets'][index] += 1
+                return
+
+        endpoint['latency_buckets'][-1] += 1
+
+    def after_response(self, context: RequestContext, response) -> None:
+        with self._lock:
+            endpoint = self._endpoint(context)
+            endpoint['requests'] += 1
+            endpoint['status_codes'][context.status_code] += 1
+            endpoint['bytes_sent'] += context.bytes_sent
+            endpoint['bytes_received'] += context.bytes_received
+            self._observe_latency(endpoint, context.elapsed)
+
+    def on_retry(self, context: RequestContext, response, wait: float) -> None:
+        with self._lock:
+            endpoint = self._endpoint(context)
+            endpoint['retries'] += 1
+            if response is not None and response.status_code == 429:
+                endpoint['throttle_waits'] += 1
+                endpoint['throttle_wait_seconds'] += wait
+
+    def on_error(self, context: RequestContext, error: BaseException) -> None:
+        with self._lock:
+            endpoint = self._endpoint(context)
+            endpoint['requests'] += 1
+            endpoint['errors'] += 1
+            endpoint['bytes_sent'] += context.bytes_sent
+            self._observe_latency(endpoint, context.elapsed)
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the collected metrics keyed by '<METHOD> <endpoint template>'
+
+        Latency buckets are cumulative and keyed by their upper bound, as in Prometheus histograms.
+        """
+        with self._lock:
+            metrics = {}
+            for key, endpoint in self._endpoints.items():
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.buckets + (float('inf'),), endpoint['latency_buckets']):
+                    cumulative += count
+                    buckets[bound] = cumulative
+
+                metrics[key] = dict(endpoint, latency_buckets=buckets, status_codes=dict(endpoint['status_codes']))
+
+            return metrics
+
+    def to_prometheus(self, prefix: str = 'pypowerbi') -> str:
+        """Returns the collected metrics in the Prometheus text exposition format
+
+        :param prefix: The metric name prefix
+        """
+        metrics = self.as_dict()
+        lines = []
+
+        def labels(endpoint, **extra):
+            pairs = dict(method=endpoint['method'], endpoint=endpoint['endpoint'], **extra)
+            return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs.items()) + '}'
+
+        lines.append(f'# HELP {prefix}_request_duration_seconds Latency of http attempts')
+        lines.append(f'# TYPE {prefix}_request_duration_seconds histogram')
+        for endpoint in metrics.values():
+            for bound, count in endpoint['latency_buckets'].items():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_request_duration_seconds_bucket{labels(endpoint, le=le)} {count}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{labels(endpoint)} {endpoint["latency_sum"]}')
+            lines.append(f'{prefix}_request_duration_seconds_count{labels(endpoint)} {endpoint["requests"]}')
+
+        lines.append(f'# HELP {prefix}_responses_total Responses by status code')
+        lines.append(f'# TYPE {prefix}_responses_total counter')
+        for endpoint in metrics.values():
+            for status_code, count in endpoint['status_codes'].items():
+                lines.append(f'{prefix}_responses_total{labels(endpoint, status=status_code)} {count}')
+
+        counters = [
+            ('errors', 'request_errors_total', 'Requests that raised before a response was received'),
+            ('bytes_sent', 'sent_bytes_total', 'Request body bytes sent'),
+            ('bytes_received', 'received_bytes_total', 'Response body bytes received'),
+            ('retries', 'retries_total', 'Retried attempts'),
+            ('throttle_waits', 'throttle_waits_total', 'Waits caused by throttled (429) responses'),
+            ('throttle_wait_seconds', 'throttle_wait_seconds_total', 'Time spent waiting on throttled responses'),
+        ]
+        for key, name, description in counters:
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            for endpoint in metrics.values():
+                lines.append(f'{prefix}_{name}{labels(endpoint)} {endpoint[key]}')
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,404 @@
+# -*- coding: future_fstrings -*-
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from .snapshot import Snapshot
+
+
+"""
+This file contains the tenant inventory, a local SQLite snapshot of the workspaces, datasets, reports, gateways and
+gateway datasources a client can see. It is synced from list calls made concurrently and queried through indexes, and
+a re-sync only fetches what is older than a given age.
+"""
+
+_schema = '''
+CREATE TABLE IF NOT EXISTS workspaces (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    is_readonly INTEGER,
+    is_on_dedicated_capacity INTEGER,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS datasets (
+    id TEXT NOT NULL,
+    workspace_id TEXT NOT NULL,
+    name TEXT,
+    configured_by TEXT,
+    is_refreshable INTEGER,
+    add_rows_api_enabled INTEGER,
+    PRIMARY KEY (workspace_id, id)
+);
+CREATE TABLE IF NOT EXISTS reports (
+    id TEXT NOT NULL,
+    workspace_id TEXT NOT NULL,
+    name TEXT,
+    dataset_id TEXT,
+    web_url TEXT,
+    embed_url TEXT,
+    PRIMARY KEY (workspace_id, id)
+);
+CREATE TABLE IF NOT EXISTS gateways (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    status TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS datasources (
+    id TEXT NOT NULL,
+    gateway_id TEXT NOT NULL,
+    name TEXT,
+    datasource_type TEXT,
+    credential_type TEXT,
+    connection_details TEXT,
+    PRIMARY KEY (gateway_id, id)
+);
+CREATE TABLE IF NOT EXISTS dataset_datasources (
+    workspace_id TEXT NOT NULL,
+    dataset_id TEXT NOT NULL,
+    gateway_id TEXT,
+    datasource_id TEXT,
+    datasource_type TEXT,
+    connection_details TEXT
+);
+CREATE TABLE IF NOT EXISTS linked_datasets (
+    workspace_id TEXT NOT NULL,
+    dataset_id TEXT NOT NULL,
+    synced_at REAL,
+    PRIMARY KEY (workspace_id, dataset_id)
+);
+CREATE INDEX IF NOT EXISTS workspaces_name ON workspaces (name);
+CREATE INDEX IF NOT EXISTS datasets_id ON datasets (id);
+CREATE INDEX IF NOT EXISTS datasets_name ON datasets (name);
+CREATE INDEX IF NOT EXISTS reports_id ON reports (id);
+CREATE INDEX IF NOT EXISTS reports_name ON reports (name);
+CREATE INDEX IF NOT EXISTS reports_dataset_id ON reports (dataset_id);
+CREATE INDEX IF NOT EXISTS gateways_name ON gateways (name);
+CREATE INDEX IF NOT EXISTS datasources_id ON datasources (id);
+CREATE INDEX IF NOT EXISTS datasources_name ON datasources (name);
+CREATE INDEX IF NOT EXISTS dataset_datasources_dataset ON dataset_datasources (workspace_id, dataset_id);
+CREATE INDEX IF NOT EXISTS dataset_datasources_gateway ON dataset_datasources (gateway_id);
+'''
+
+
+def _json_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+
+    return json.dumps(value, sort_keys=True)
+
+
+class InventorySyncReport:
+    """What a sync fetched"""
+    __slots__ = ('workspaces_synced', 'gateways_synced', 'datasets_linked', 'errors', 'elapsed')
+
+    def __init__(self):
+        self.workspaces_synced = 0
+        self.gateways_synced = 0
+        self.datasets_linked = 0
+        # the exceptions by (kind, id), e.g. ('workspace', group_id)
+        self.errors: Dict[tuple, BaseException] = {}
+        self.elapsed = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.errors
+
+    def __repr__(self):
+        return f'<InventorySyncReport workspaces={self.workspaces_synced} gateways={self.gateways_synced} ' \
+               f'datasets_linked={self.datasets_linked} errors={len(self.errors)} elapsed={self.elapsed:.3f}s>'
+
+
+class Inventory:
+    """A local SQLite snapshot of a tenant's workspaces, datasets, reports, gateways and gateway datasources
+
+    Rows are returned as dicts. Datasets and reports of 'My workspace' have the workspace id ''.
+    """
+    my_workspace_id = ''
+
+    def __init__(self, path: str = ':memory:'):
+        """Constructs an Inventory, creating the store if needed
+
+        :param path: The path of the SQLite database file; ':memory:' keeps the inventory in memory only
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(_schema)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def sync(
+        self,
+        client,
+        workspaces: bool = True,
+        gateways: bool = True,
+        dataset_datasources: bool = False,
+        group_ids: Optional[Iterable[str]] = None,
+        include_my_workspace: bool = True,
+        max_age: Optional[float] = None,
+        max_workers: int = 8
+    ) -> InventorySyncReport:
+        """Syncs the inventory from the service
+
+        The list of workspaces is always fetched; the datasets and reports of a workspace, and the datasources of a
+        gateway, only when they were synced more than max_age seconds ago. Dataset datasources take a request per
+        dataset, so they are only fetched for datasets that have not been linked yet, or were linked more than
+        max_age seconds ago. Requests run concurrently; failures are reported per workspace, gateway or dataset and
+        leave what was synced before in place.
+
+        :param client: The PowerBIClient
+        :param workspaces: Whether to sync workspaces, with their datasets and reports
+        :param gateways: Whether to sync gateways, with their datasources
+        :param dataset_datasources: Whether to sync the gateway datasources of each dataset, for datasets_by_gateway
+        :param group_ids: The ids of the workspaces to sync; None syncs all
+        :param include_my_workspace: Whether to sync 'My workspace' as well, when syncing all workspaces
+        :param max_age: Seconds after which synced items are fetched again; None fetches everything again
+        :param max_workers: The number of concurrent requests
+        :return: What was fetched
+        """
+        report = InventorySyncReport()
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pypowerbi-inventory') as executor:
+            if workspaces:
+                self._sync_workspaces(client, executor, report, group_ids, include_my_workspace, max_age)
+            if gateways:
+                self._sync_gateways(client, executor, report, max_age)
+            if dataset_datasources:
+                self._sync_dataset_datasources(client, executor, report, group_ids, max_age)
+
+        report.elapsed = time.perf_counter() - started
+
+        return report
+
+    def _is_stale(self, synced_at: Optional[float], now: float, max_age: Optional[float]) -> bool:
+        return max_age is None or synced_at is None or now - synced_at > max_age
+
+    def _sync_workspaces(self, client, executor, report, group_ids, include_my_workspace, max_age):
+        now = time.time()
+        groups = client.groups.get_groups()
+        rows = groups.project('id', 'name', 'isReadOnly', 'isOnDedicatedCapacity')
+
+        synced_at = dict(self.connection.execute('SELECT id, synced_at FROM workspaces'))
+        with self.connection:
+            if group_ids is None:
+                # workspaces that are gone take their items with them
+                self._delete_missing('workspaces', 'id', [row[0] for row in rows] + [self.my_workspace_id])
+                self._delete_missing('datasets', 'workspace_id', [row[0] for row in rows] + [self.my_workspace_id])
+                self._delete_missing('reports', 'workspace_id', [row[0] for row in rows] + [self.my_workspace_id])
+            self.connection.executemany(
+                'INSERT INTO workspaces (id, name, is_readonly, is_on_dedicated_capacity) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET name = excluded.name, is_readonly = excluded.is_readonly, '
+                'is_on_dedicated_capacity = excluded.is_on_dedicated_capacity', rows)
+
+        if group_ids is None:
+            wanted = [row[0] for row in rows]
+            if include_my_workspace:
+                wanted.append(self.my_workspace_id)
+        else:
+            wanted = list(group_ids)
+
+        stale = [workspace_id for workspace_id in wanted
+                 if self._is_stale(synced_at.get(workspace_id), now, max_age)]
+
+        def fetch(workspace_id):
+            group_id = workspace_id or None
+            return client.datasets.get_datasets(group_id), client.reports.get_reports(group_id)
+
+        futures = [(workspace_id, executor.submit(fetch, workspace_id)) for workspace_id in stale]
+        for workspace_id, future in futures:
+            try:
+                datasets, reports = future.result()
+            except Exception as error:
+                report.errors[('workspace', workspace_id)] = error
+                continue
+
+            with self.connection:
+                self.connection.execute('DELETE FROM datasets WHERE workspace_id = ?', (workspace_id,))
+                self.connection.execute('DELETE FROM reports WHERE workspace_id = ?', (workspace_id,))
+                self.connection.executemany(
+                    'INSERT INTO datasets (workspace_id, id, name, configured_by, is_refreshable, '
+                    'add_rows_api_enabled) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(workspace_id,) + row for row in datasets.project('id', 'name', 'configuredBy', 'isRefreshable',
+                                                                      'addRowsAPIEnabled')])
+                self.connection.executemany(
+                    'INSERT INTO reports (workspace_id, id, name, dataset_id, web_url, embed_url) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(workspace_id,) + row for row in reports.project('id', 'name', 'datasetId', 'webUrl',
+                                                                     'embedUrl')])
+                self.connection.execute(
+                    'INSERT INTO workspaces (id, synced_at) VALUES (?, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET synced_at = excluded.synced_at', (workspace_id, now))
+
+            report.workspaces_synced += 1
+
+    def _sync_gateways(self, client, executor, report, max_age):
+        now = time.time()
+        gateways = client.gateways.get_gateways()
+        rows = gateways.project('id', 'name', 'type', 'gatewayStatus')
+
+        synced_at = dict(self.connection.execute('SELECT id, synced_at FROM gateways'))
+        with self.connection:
+            self._delete_missing('gateways', 'id', [row[0] for row in rows])
+            self._delete_missing('datasources', 'gateway_id', [row[0] for row in rows])
+            self.connection.executemany(
+                'INSERT INTO gateways (id, name, type, status) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET name = excluded.name, type = excluded.type, status = excluded.status',
+                rows)
+
+        stale = [row[0] for row in rows if self._is_stale(synced_at.get(row[0]), now, max_age)]
+        futures = [(gateway_id, executor.submit(client.gateways.get_datasources, gateway_id)) for gateway_id in stale]
+        for gateway_id, future in futures:
+            try:
+                datasources = future.result()
+            except Exception as error:
+                report.errors[('gateway', gateway_id)] = error
+                continue
+
+            with self.connection:
+                self.connection.execute('DELETE FROM datasources WHERE gateway_id = ?', (gateway_id,))
+                self.connection.executemany(
+                    'INSERT INTO datasources (gateway_id, id, name, datasource_type, credential_type, '
+                    'connection_details) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(gateway_id, datasource_id, name, datasource_type, credential_type, _json_text(details))
+                     for datasource_id, name, datasource_type, credential_type, details in datasources.project(
+                        'id', 'datasourceName', 'datasourceType', 'credentialType', 'connectionDetails')])
+                self.connection.execute('UPDATE gateways SET synced_at = ? WHERE id = ?', (now, gateway_id))
+
+            report.gateways_synced += 1
+
+    def _sync_dataset_datasources(self, client, executor, report, group_ids, max_age):
+        now = time.time()
+        query = 'SELECT d.workspace_id, d.id, l.synced_at FROM datasets d ' \
+                'LEFT JOIN linked_datasets l ON l.workspace_id = d.workspace_id AND l.dataset_id = d.id'
+        rows = self.connection.execute(query).fetchall()
+        if group_ids is not None:
+            wanted = set(group_ids)
+            rows = [row for row in rows if row[0] in wanted]
+
+        stale = [(row[0], row[1]) for row in rows if self._is_stale(row[2], now, max_age)]
+        futures = [(key, executor.submit(client.datasets.get_dataset_gateway_datasources, key[1], key[0] or None))
+                   for key in stale]
+        for (workspace_id, dataset_id), future in futures:
+            try:
+                datasources = future.result()
+            except Exception as error:
+                report.errors[('dataset', dataset_id)] = error
+                continue
+
+            with self.connection:
+                self.connection.execute('DELETE FROM dataset_datasources WHERE workspace_id = ? AND dataset_id = ?',
+                                        (workspace_id, dataset_id))
+                self.connection.executemany(
+                    'INSERT INTO dataset_datasources (workspace_id, dataset_id, gateway_id, datasource_id, '
+                    'datasource_type, connection_details) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(workspace_id, dataset_id, datasource.get('gatewayId'), datasource.get('datasourceId'),
+                      datasource.get('datasourceType'), _json_text(datasource.get('connectionDetails')))
+                     for datasource in datasources])
+                self.connection.execute(
+                    'INSERT INTO linked_datasets (workspace_id, dataset_id, synced_at) VALUES (?, ?, ?) '
+                    'ON CONFLICT (workspace_id, dataset_id) DO UPDATE SET synced_at = excluded.synced_at',
+                    (workspace_id, dataset_id, now))
+
+            report.datasets_linked += 1
+
+        # links of datasets that are gone
+        with self.connection:
+            for table in ('dataset_datasources', 'linked_datasets'):
+                self.connection.execute(
+                    f'DELETE FROM {table} WHERE NOT EXISTS (SELECT 1 FROM datasets d '
+                    f'WHERE d.workspace_id = {table}.workspace_id AND d.id = {table}.dataset_id)')
+
+    def _delete_missing(self, table: str, column: str, keep: List[str]) -> None:
+        self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS keep_ids (id TEXT PRIMARY KEY)')
+        self.connection.execute('DELETE FROM keep_ids')
+        self.connection.executemany('INSERT OR IGNORE INTO keep_ids VALUES (?)', ((value,) for value in keep))
+        self.connection.execute(f'DELETE FROM {table} WHERE {column} NOT IN (SELECT id FROM keep_ids)')
+
+    def _query(self, sql: str, parameters=()) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+    def _select(self, table: str, **conditions) -> List[Dict[str, Any]]:
+        conditions = {column: value for column, value in conditions.items() if value is not None}
+        where = ' AND '.join(f'{column} = ?' for column in conditions)
+        sql = f'SELECT * FROM {table}' + (f' WHERE {where}' if where else '')
+
+        return self._query(sql, tuple(conditions.values()))
+
+    def workspaces(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The workspaces, optionally only those of a name"""
+        return self._select('workspaces', name=name)
+
+    def datasets(self, workspace_id: Optional[str] = None, name: Optional[str] = None,
+                 dataset_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The datasets, optionally only those of a workspace, name or id"""
+        return self._select('datasets', workspace_id=workspace_id, name=name, id=dataset_id)
+
+    def reports(self, workspace_id: Optional[str] = None, name: Optional[str] = None,
+                dataset_id: Optional[str] = None, report_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The reports, optionally only those of a workspace, name, dataset or id"""
+        return self._select('reports', workspace_id=workspace_id, name=name, dataset_id=dataset_id, id=report_id)
+
+    def gateways(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The gateways, optionally only those of a name"""
+        return self._select('gateways', name=name)
+
+    def datasources(self, gateway_id: Optional[str] = None, name: Optional[str] = None,
+                    datasource_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The gateway datasources, optionally only those of a gateway, name or id"""
+        return self._select('datasources', gateway_id=gateway_id, name=name, id=datasource_id)
+
+    def reports_by_dataset(self, dataset_id: str) -> List[Dict[str, Any]]:
+        """The reports bound to a dataset"""
+        return self.reports(dataset_id=dataset_id)
+
+    def datasets_by_gateway(self, gateway_id: str) -> List[Dict[str, Any]]:
+        """The datasets with a datasource on a gateway; needs a sync with dataset_datasources"""
+        return self._query(
+            'SELECT DISTINCT d.* FROM dataset_datasources l JOIN datasets d '
+            'ON d.workspace_id = l.workspace_id AND d.id = l.dataset_id WHERE l.gateway_id = ?', (gateway_id,))
+
+    def reports_by_gateway(self, gateway_id: str) -> List[Dict[str, Any]]:
+        """The reports bound to a dataset with a datasource on a gateway; needs a sync with dataset_datasources"""
+        return self._query(
+            'SELECT DISTINCT r.* FROM dataset_datasources l JOIN reports r '
+            'ON r.workspace_id = l.workspace_id AND r.dataset_id = l.dataset_id WHERE l.gateway_id = ?', (gateway_id,))
+
+    def snapshot(self) -> Snapshot:
+        """A snapshot of the inventory, to diff against a later one with diff_snapshots
+
+        Records are keyed by id, or by (workspace id, id) for datasets and reports and (gateway id, id) for
+        datasources; sync times are left out.
+        """
+        snapshot = Snapshot()
+        keys = {
+            'workspaces': ('id',),
+            'datasets': ('workspace_id', 'id'),
+            'reports': ('workspace_id', 'id'),
+            'gateways': ('id',),
+            'datasources': ('gateway_id', 'id'),
+            'dataset_datasources': ('workspace_id', 'dataset_id', 'gateway_id', 'datasource_id'),
+        }
+
+        for kind, key in keys.items():
+            for row in self.connection.execute(f'SELECT * FROM {kind} ORDER BY {", ".join(key)}'):
+                record = dict(row)
+                record.pop('synced_at', None)
+                snapshot.add(kind, record[key[0]] if len(key) == 1 else tuple(record[column] for column in key),
+                             record)
+
+        return snapshot
+
+    def __repr__(self):
+        return f'<Inventory {self.path}>'
@@ -0,0 +1,132 @@
+# -*- coding: future_fstrings -*-
+import datetime
+import json
+from enum import Enum
+from json.encoder import encode_basestring_ascii
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JsonCodec:
+    """Encodes request bodies and decodes response bodies using the standard library json module
+
+    Bodies are decoded straight from bytes and encoded straight to bytes, without an intermediate str.
+    """
+    name = 'json'
+    content_type = 'application/json'
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Decodes a json document
+
+        :param data: The json document, as bytes (utf-8, utf-16 or utf-32) or str
+        :return: The decoded document
+        """
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encodes an object to a compact utf-8 json document
+
+        :param obj: The object to encode; datetimes, dates and enums are encoded the same way by every codec
+        :return: The json document as bytes
+        """
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_default).encode('utf-8')
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name}>'
+
+
+class OrjsonCodec(JsonCodec):
+    """Encodes and decodes json using orjson"""
+    name = 'orjson'
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+
+class UjsonCodec(JsonCodec):
+    """Encodes and decodes json using ujson"""
+    name = 'ujson'
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return ujson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False, default=_default).encode('utf-8')
+
+
+def _default(obj):
+    """Encodes the types the standard library and ujson do not, the way orjson does natively"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+
+    if isinstance(obj, Enum):
+        return obj.value
+
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def wire_string(value: str, drop_colon_space: bool = False) -> str:
+    """Encodes a string the way the credentials and connection details of gateway datasources are sent
+
+    That is json.dumps with ensure_ascii, except that backslashes are not escaped. The string is escaped by the C
+    encoder of the json module; only strings with backslashes, or with ': ' for drop_colon_space, are fixed up.
+
+    :param value: The string
+    :param drop_colon_space: Whether to drop the space of every '": ' in the escaped string, as the connection details
+     format does
+    :return: The quoted string
+    """
+    encoded = encode_basestring_ascii(value)
+
+    if '\\' in value:
+        encoded = encoded.replace('\\\\', '\\')
+
+    if drop_colon_space and ': ' in value:
+        encoded = encoded.replace('": ', '":')
+
+    return encoded
+
+
+def get_codec(name: str = None) -> JsonCodec:
+    """Returns a json codec
+
+    :param name: One of 'orjson', 'ujson' or 'json'. If None, the fastest installed backend is used.
+    :return: The codec
+    """
+    if name is None:
+        if orjson is not None:
+            return OrjsonCodec()
+        if ujson is not None:
+            return UjsonCodec()
+        return JsonCodec()
+
+    if name == OrjsonCodec.name:
+        if orjson is None:
+            raise ImportError('The orjson json codec requires the orjson package')
+        return OrjsonCodec()
+
+    if name == UjsonCodec.name:
+        if ujson is None:
+            raise ImportError('The ujson json codec requires the ujson package')
+        return UjsonCodec()
+
+    if name == JsonCodec.name:
+        return JsonCodec()
+
+    raise ValueError(f'Unknown json codec: {name}')
+
+
+# used wherever no client is at hand, e.g. when parsing responses through the operations classmethods
+default_codec = get_codec()
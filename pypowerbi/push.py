@@ -0,0 +1,783 @@
+# -*- coding: future_fstrings -*-
+import collections
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .utils import is_transient_error
+
+
+"""
+This file contains the push session, which buffers rows for several tables of one push dataset and posts them in
+batches over a shared thread pool, and the push writer, which streams rows into a single table from a background
+thread.
+"""
+
+
+class TablePushReport:
+    """What a push session did to a single table"""
+    __slots__ = ('table_name', 'truncated', 'rows_posted', 'batches_posted', 'rows_failed', 'batches_failed',
+                 'rejected', 'errors')
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.truncated = False
+        self.rows_posted = 0
+        self.batches_posted = 0
+        self.rows_failed = 0
+        self.batches_failed = 0
+        # rows failing client side validation
+        self.rejected = []
+        self.errors = []
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.errors
+
+    def __repr__(self):
+        return f'<TablePushReport {self.table_name} posted={self.rows_posted} failed={self.rows_failed} ' \
+               f'rejected={len(self.rejected)} truncated={self.truncated}>'
+
+
+class PushReport:
+    """What a push session did between two flushes"""
+    __slots__ = ('dataset_id', 'tables', 'elapsed')
+
+    def __init__(self, dataset_id: str, tables: Dict[str, TablePushReport], elapsed: float):
+        self.dataset_id = dataset_id
+        self.tables = tables
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self) -> bool:
+        return all(table.succeeded for table in self.tables.values())
+
+    @property
+    def rows_posted(self) -> int:
+        return sum(table.rows_posted for table in self.tables.values())
+
+    @property
+    def rows_failed(self) -> int:
+        return sum(table.rows_failed for table in self.tables.values())
+
+    @property
+    def errors(self) -> List[BaseException]:
+        return [error for table in self.tables.values() for error in table.errors]
+
+    def raise_for_errors(self) -> None:
+        """Raises a PushError if any truncate or batch failed"""
+        if not self.succeeded:
+            raise PushError(self)
+
+    def __repr__(self):
+        return f'<PushReport dataset={self.dataset_id} tables={len(self.tables)} posted={self.rows_posted} ' \
+               f'failed={self.rows_failed} elapsed={self.elapsed:.3f}s>'
+
+
+class PushError(RuntimeError):
+    """Raised when committing a push session that had failed requests"""
+    def __init__(self, report: PushReport):
+        errors = report.errors
+        super().__init__(f'{len(errors)} push requests to dataset {report.dataset_id} failed, the first: {errors[0]}')
+        self.report = report
+
+
+class _TableBuffer:
+    __slots__ = ('rows', 'oldest', 'truncate', 'posts')
+
+    def __init__(self):
+        self.rows = []
+        # time.monotonic() of the oldest buffered row
+        self.oldest = None
+        # the future of a pending delete_rows, which posts to the table wait for
+        self.truncate: Optional[Future] = None
+        # the futures of the posts submitted since, which the next delete_rows waits for
+        self.posts: List[Future] = []
+
+
+class PushSession:
+    """Buffers rows for several tables of one push dataset and posts them in batches over a shared pool
+
+    A table's rows are posted as soon as batch_size rows are buffered, or when its oldest buffered row is older than
+    max_age seconds as rows are added. Tables can be truncated and reloaded; posts to a truncated table wait for its
+    delete_rows, while other tables carry on concurrently. flush posts what is left and returns a report of everything
+    done since the previous flush. Used as a context manager, the session commits on exit.
+    """
+    # the push datasets limit on rows per post rows request
+    max_batch_size = 10000
+
+    def __init__(
+        self,
+        datasets,
+        dataset_id: str,
+        group_id: Optional[str] = None,
+        batch_size: int = 10000,
+        max_age: Optional[float] = None,
+        max_workers: int = 4,
+        executor: Optional[Executor] = None,
+        validate: bool = False
+    ):
+        """Constructs a PushSession
+
+        :param datasets: The Datasets operations of a client
+        :param dataset_id: The id of the push dataset
+        :param group_id: The optional id of the group
+        :param batch_size: The number of rows per post rows request, at most 10000
+        :param max_age: Seconds a buffered row may wait before its table is posted; None only posts full batches
+        until the session is flushed
+        :param max_workers: The number of concurrent requests, when the session creates its own pool
+        :param executor: A pool to share with other sessions; the session does not shut it down
+        :param validate: Whether rows are validated against the table schemas; rejected rows are reported
+        """
+        if not 0 < batch_size <= self.max_batch_size:
+            raise ValueError(f'batch_size must be between 1 and {self.max_batch_size}')
+
+        self.datasets = datasets
+        self.dataset_id = dataset_id
+        self.group_id = group_id
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.validate = validate
+
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                        thread_name_prefix='pypowerbi-push')
+        self._lock = threading.Lock()
+        self._buffers: Dict[str, _TableBuffer] = {}
+        self._reports: Dict[str, TablePushReport] = {}
+        self._futures: List[Future] = []
+        self._started = time.perf_counter()
+        self._closed = False
+
+    def _buffer(self, table_name: str) -> _TableBuffer:
+        buffer = self._buffers.get(table_name)
+        if buffer is None:
+            buffer = self._buffers[table_name] = _TableBuffer()
+
+        return buffer
+
+    def _report(self, table_name: str) -> TablePushReport:
+        report = self._reports.get(table_name)
+        if report is None:
+            report = self._reports[table_name] = TablePushReport(table_name)
+
+        return report
+
+    def add_rows(self, table_name: str, rows: Iterable[Any]) -> None:
+        """Buffers rows for a table, posting full batches
+
+        :param table_name: The name of the table
+        :param rows: The rows, as Row objects or dicts
+        """
+        with self._lock:
+            self._check_open()
+
+            buffer = self._buffer(table_name)
+            if buffer.oldest is None:
+                buffer.oldest = time.monotonic()
+            buffer.rows.extend(rows)
+
+            while len(buffer.rows) >= self.batch_size:
+                batch = buffer.rows[:self.batch_size]
+                del buffer.rows[:self.batch_size]
+                self._submit_batch(table_name, buffer, batch)
+
+            if not buffer.rows:
+                buffer.oldest = None
+
+            if self.max_age is not None:
+                self._post_aged(time.monotonic())
+
+    def truncate(self, table_name: str) -> None:
+        """Deletes all rows of a table, discarding rows buffered for it but not posted yet
+
+        Rows added afterwards are posted once the rows are deleted.
+
+        :param table_name: The name of the table
+        """
+        with self._lock:
+            self._check_open()
+
+            buffer = self._buffer(table_name)
+            buffer.rows = []
+            buffer.oldest = None
+
+            # the rows posted before are deleted too, so the delete waits for their posts
+            pending = [future for future in buffer.posts if not future.done()]
+            if buffer.truncate is not None:
+                pending.append(buffer.truncate)
+            buffer.truncate = self._executor.submit(self._delete_rows, table_name, pending)
+            buffer.posts = []
+            self._futures.append(buffer.truncate)
+
+    def reload(self, table_name: str, rows: Iterable[Any]) -> None:
+        """Replaces all rows of a table
+
+        :param table_name: The name of the table
+        :param rows: The new rows, as Row objects or dicts
+        """
+        self.truncate(table_name)
+        self.add_rows(table_name, rows)
+
+    def flush(self) -> PushReport:
+        """Posts all buffered rows and waits for every pending request
+
+        :return: The report of everything done since the previous flush
+        """
+        with self._lock:
+            self._check_open()
+
+            for table_name, buffer in self._buffers.items():
+                for start in range(0, len(buffer.rows), self.batch_size):
+                    self._submit_batch(table_name, buffer, buffer.rows[start:start + self.batch_size])
+                buffer.rows = []
+                buffer.oldest = None
+
+            futures, self._futures = self._futures, []
+
+        wait(futures)
+
+        with self._lock:
+            report = PushReport(self.dataset_id, self._reports, time.perf_counter() - self._started)
+            self._reports = {}
+            self._started = time.perf_counter()
+            for buffer in self._buffers.values():
+                if buffer.truncate is not None and buffer.truncate.done():
+                    buffer.truncate = None
+
+        return report
+
+    def commit(self) -> PushReport:
+        """Flushes the session, raising a PushError if any request failed
+
+        :return: The report of everything done since the previous flush
+        """
+        report = self.flush()
+        report.raise_for_errors()
+
+        return report
+
+    def close(self) -> None:
+        """Closes the session, discarding rows not flushed yet, and shuts down its own pool"""
+        with self._lock:
+            self._closed = True
+            self._buffers = {}
+
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            self.close()
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError('The push session is closed')
+
+    def _post_aged(self, now: float) -> None:
+        for table_name, buffer in self._buffers.items():
+            if buffer.oldest is not None and now - buffer.oldest >= self.max_age:
+                self._submit_batch(table_name, buffer, buffer.rows)
+                buffer.rows = []
+                buffer.oldest = None
+
+    def _submit_batch(self, table_name: str, buffer: _TableBuffer, batch: List[Any]) -> None:
+        if batch:
+            future = self._executor.submit(self._post_batch, table_name, buffer.truncate, batch)
+            self._futures.append(future)
+            buffer.posts = [post for post in buffer.posts if not post.done()]
+            buffer.posts.append(future)
+
+    def _delete_rows(self, table_name: str, pending: List[Future]) -> None:
+        wait(pending)
+
+        try:
+            self.datasets.delete_rows(self.dataset_id, table_name, self.group_id)
+        except Exception as error:
+            with self._lock:
+                self._report(table_name).errors.append(error)
+            raise
+
+        with self._lock:
+            self._report(table_name).truncated = True
+
+    def _post_batch(self, table_name: str, truncate: Optional[Future], batch: List[Any]) -> None:
+        # a table that could not be truncated is not appended to
+        if truncate is not None and truncate.exception() is not None:
+            with self._lock:
+                report = self._report(table_name)
+                report.rows_failed += len(batch)
+                report.batches_failed += 1
+            return
+
+        rejected = []
+        try:
+            self.datasets.post_rows(self.dataset_id, table_name, batch, self.group_id, validate=self.validate,
+                                    reject_sink=rejected.extend)
+        except Exception as error:
+            with self._lock:
+                report = self._report(table_name)
+                report.rows_failed += len(batch) - len(rejected)
+                report.batches_failed += 1
+                report.rejected.extend(rejected)
+                report.errors.append(error)
+            return
+
+        with self._lock:
+            report = self._report(table_name)
+            report.rows_posted += len(batch) - len(rejected)
+            report.batches_posted += 1
+            report.rejected.extend(rejected)
+
+
+class PushWriterFull(RuntimeError):
+    """Raised when a write to a PushWriter times out waiting for buffer space"""
+
+
+class PushWriterStats:
+    """Counters of a PushWriter"""
+    __slots__ = ('rows_written', 'rows_posted', 'batches_posted', 'batches_failed', 'rows_spilled', 'rows_replayed',
+                 'rows_rejected', 'rows_dropped', 'throttled_seconds', 'last_error')
+
+    def __init__(self):
+        self.rows_written = 0
+        self.rows_posted = 0
+        self.batches_posted = 0
+        self.batches_failed = 0
+        self.rows_spilled = 0
+        self.rows_replayed = 0
+        # rows the service refused, which are never retried, and spilled lines that could not be decoded, e.g. torn
+        # by a crash
+        self.rows_rejected = 0
+        # rows left over on close without a spill path
+        self.rows_dropped = 0
+        # time spent waiting for the rows per hour budget
+        self.throttled_seconds = 0.0
+        self.last_error = None
+
+    def __repr__(self):
+        return f'<PushWriterStats written={self.rows_written} posted={self.rows_posted} ' \
+               f'spilled={self.rows_spilled} replayed={self.rows_replayed} rejected={self.rows_rejected} ' \
+               f'dropped={self.rows_dropped}>'
+
+
+class PushWriter:
+    """Streams rows into a push dataset table from any number of threads
+
+    Rows are written to a bounded in-memory buffer and posted by a background thread, whenever batch_size rows are
+    buffered or the oldest buffered row is max_age seconds old. Posts are paced to the rows per hour budget of the
+    dataset; once it is spent the buffer fills up and writes block, which is the back-pressure on the writers.
+
+    When posting fails on a connection error, timeout, throttling or server error, the batch is kept and retried every
+    retry_interval seconds, and the rows per hour budget it took is given back. With a spill path, a buffer that fills
+    up during such an outage is spilled to disk instead of blocking writers, and so are the rows left on close.
+    Spilled rows are posted again once posting succeeds, and by the next writer with the same spill path. Rows are
+    posted at least once; a crash while replaying may post some spilled rows twice.
+
+    A batch the service refuses otherwise, e.g. with a bad request, would fail the same way every time; its rows are
+    rejected instead: passed to reject_sink, or else appended to a .rejected file next to the spill file, and counted
+    in stats.rows_rejected. Spilled lines that cannot be decoded, such as one torn by a crash, go to the .rejected file
+    too.
+
+    Should the background thread fail, its exception is kept in stats.last_error and writes raise instead of blocking.
+    """
+    # the push datasets limit on rows posted per hour to a dataset
+    default_rows_per_hour = 1000000
+
+    def __init__(
+        self,
+        datasets,
+        dataset_id: str,
+        table_name: str,
+        group_id: Optional[str] = None,
+        capacity: int = 100000,
+        batch_size: int = 10000,
+        max_age: float = 1.0,
+        rows_per_hour: Optional[int] = None,
+        spill_path: Optional[str] = None,
+        retry_interval: float = 5.0,
+        reject_sink: Optional[Callable[[List[Any]], None]] = None
+    ):
+        """Constructs a PushWriter and starts its background thread
+
+        :param datasets: The Datasets operations of a client
+        :param dataset_id: The id of the push dataset
+        :param table_name: The name of the table
+        :param group_id: The optional id of the group
+        :param capacity: The number of rows the buffer holds
+        :param batch_size: The number of rows per post rows request, at most 10000
+        :param max_age: Seconds a buffered row may wait before it is posted
+        :param rows_per_hour: The rows per hour budget; defaults to the push datasets limit of 1,000,000
+        :param spill_path: The file rows are spilled to as json lines during outages and on close; None never spills
+        :param retry_interval: Seconds between attempts to post a batch that failed
+        :param reject_sink: Callable taking the rows of a batch the service refused, e.g. a list's extend; called from
+         the background thread. If None, the rows are appended to the .rejected file, or dropped without a spill path.
+        """
+        if not 0 < batch_size <= PushSession.max_batch_size:
+            raise ValueError(f'batch_size must be between 1 and {PushSession.max_batch_size}')
+        if capacity < batch_size:
+            raise ValueError('capacity must be at least batch_size')
+
+        self.datasets = datasets
+        self.dataset_id = dataset_id
+        self.table_name = table_name
+        self.group_id = group_id
+        self.capacity = capacity
+        self.rows_per_hour = rows_per_hour or self.default_rows_per_hour
+        self.batch_size = min(batch_size, self.rows_per_hour)
+        self.max_age = max_age
+        self.spill_path = spill_path
+        self.retry_interval = retry_interval
+        self.reject_sink = reject_sink
+        self.stats = PushWriterStats()
+
+        self._json_codec = datasets.client.json_codec
+        self._condition = threading.Condition()
+        # (time.monotonic() of the write, row) pairs, oldest first
+        self._buffer = collections.deque()
+        self._in_flight = 0
+        self._flushing = False
+        self._outage = False
+        self._closing = False
+        self._closed = False
+        # set when the background thread stopped on an unexpected exception
+        self._failed = False
+        self._deadline = None
+        self._tokens = float(self.rows_per_hour)
+        self._tokens_updated = time.monotonic()
+
+        self._thread = threading.Thread(target=self._run, name=f'pypowerbi-push-writer-{table_name}', daemon=True)
+        self._thread.start()
+
+    @property
+    def buffered(self) -> int:
+        """The number of rows buffered or being posted"""
+        with self._condition:
+            return len(self._buffer) + self._in_flight
+
+    def write(self, row: Any, timeout: Optional[float] = None) -> None:
+        """Writes a single row
+
+        :param row: The row, a Row object or dict
+        :param timeout: Seconds to wait for buffer space; None waits indefinitely
+        """
+        self.write_rows((row,), timeout)
+
+    def write_rows(self, rows: Iterable[Any], timeout: Optional[float] = None) -> None:
+        """Writes rows, blocking while the buffer is full
+
+        :param rows: The rows, as Row objects or dicts
+        :param timeout: Seconds to wait for buffer space; None waits indefinitely
+        :raises PushWriterFull: When the timeout passes before the rows fit in the buffer
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        rows = list(rows)
+        written = 0
+
+        with self._condition:
+            while written < len(rows):
+                if self._failed:
+                    raise RuntimeError('The push writer stopped on an error') from self.stats.last_error
+                if self._closing:
+                    raise RuntimeError('The push writer is closed')
+
+                space = self.capacity - len(self._buffer) - self._in_flight
+                if space <= 0:
+                    if self._outage and self.spill_path is not None:
+                        self._spill([row for _, row in self._buffer])
+                        self._buffer.clear()
+                        continue
+
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise PushWriterFull(f'{len(rows) - written} rows did not fit in the push writer buffer')
+                    self._condition.wait(remaining)
+                    continue
+
+                was_empty = not self._buffer
+                now = time.monotonic()
+                chunk = rows[written:written + space]
+                self._buffer.extend((now, row) for row in chunk)
+                written += len(chunk)
+                self.stats.rows_written += len(chunk)
+
+                # wake the background thread to start the age timer or post a full batch
+                if was_empty or len(self._buffer) >= self.batch_size:
+                    self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Posts all buffered rows now, waiting until they are posted
+
+        :param timeout: Seconds to wait; None waits indefinitely
+        :return: True if the buffer was emptied, False on timeout or if the background thread failed
+        """
+        with self._condition:
+            self._flushing = True
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._failed or (not self._buffer and not self._in_flight), timeout)
+            self._flushing = False
+
+            return not self._buffer and not self._in_flight
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Posts the buffered rows and stops the background thread
+
+        Rows which could not be posted within the timeout, or because posting fails, are spilled to disk, or dropped
+        and counted in stats.rows_dropped without a spill path.
+
+        :param timeout: Seconds to keep posting, after which a request in progress is still waited for; None posts
+         until the buffer is empty or posting fails
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._closing = True
+            self._deadline = None if timeout is None else time.monotonic() + timeout
+            self._condition.notify_all()
+
+        self._thread.join()
+
+        with self._condition:
+            leftover = [row for _, row in self._buffer]
+            self._buffer.clear()
+
+            if leftover:
+                if self.spill_path is not None:
+                    self._spill(leftover)
+                else:
+                    self.stats.rows_dropped += len(leftover)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _past_deadline(self) -> bool:
+        return self._closing and self._deadline is not None and time.monotonic() >= self._deadline
+
+    def _next_batch(self) -> Optional[List[Any]]:
+        """Waits for a batch to be due; None once closing with nothing left to post"""
+        with self._condition:
+            while True:
+                if self._buffer:
+                    age = time.monotonic() - self._buffer[0][0]
+                    if len(self._buffer) >= self.batch_size or age >= self.max_age or self._flushing \
+                            or self._closing:
+                        break
+                    self._condition.wait(self.max_age - age)
+                else:
+                    if self._closing:
+                        return None
+                    self._condition.wait()
+
+            if self._past_deadline():
+                return None
+
+            count = min(self.batch_size, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(count)]
+            self._in_flight = count
+            self._condition.notify_all()
+
+            return batch
+
+    def _take_budget(self, count: int) -> bool:
+        """Waits until count rows fit in the rows per hour budget; False if closing runs out of time first"""
+        rate = self.rows_per_hour / 3600.0
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rows_per_hour, self._tokens + (now - self._tokens_updated) * rate)
+                self._tokens_updated = now
+
+                if self._tokens >= count:
+                    self._tokens -= count
+                    return True
+
+                if self._past_deadline():
+                    return False
+
+                wait_seconds = (count - self._tokens) / rate
+                if self._deadline is not None:
+                    wait_seconds = min(wait_seconds, self._deadline - now)
+                self._condition.wait(wait_seconds)
+                self.stats.throttled_seconds += time.monotonic() - now
+
+    def _post(self, rows: List[Any]) -> Optional[int]:
+        """Posts a batch of rows
+
+        :return: The number of rows posted, 0 if the batch was rejected, or None if it failed and is to be retried
+        """
+        if not self._take_budget(len(rows)):
+            return None
+
+        try:
+            self.datasets.post_rows(self.dataset_id, self.table_name, rows, self.group_id)
+        except Exception as error:
+            transient = is_transient_error(error)
+            with self._condition:
+                # the rows were not taken, so they do not count against the budget
+                self._tokens = min(self.rows_per_hour, self._tokens + len(rows))
+                self.stats.batches_failed += 1
+                self.stats.last_error = error
+                # a refused batch says nothing about the service being down
+                self._outage = transient
+
+            if transient:
+                return None
+
+            self._reject(rows)
+            return 0
+
+        with self._condition:
+            self.stats.batches_posted += 1
+            self.stats.rows_posted += len(rows)
+            self._outage = False
+
+        return len(rows)
+
+    def _reject(self, rows: List[Any]) -> None:
+        """Hands the rows of a refused batch to the reject sink, or appends them to the .rejected file"""
+        if self.reject_sink is not None:
+            self.reject_sink(rows)
+        elif self.spill_path is not None:
+            dumps = self._json_codec.dumps
+            self._write_rejected([dumps(row if type(row) is dict else row.to_dict()) + b'\n' for row in rows])
+
+        with self._condition:
+            self.stats.rows_rejected += len(rows)
+
+    def _write_rejected(self, lines: List[bytes]) -> None:
+        with self._condition:
+            with open(f'{self.spill_path}.rejected', 'ab') as rejected_file:
+                rejected_file.writelines(lines)
+
+    def _run(self):
+        try:
+            self._post_buffer()
+        except Exception as error:
+            with self._condition:
+                self.stats.last_error = error
+                self._failed = True
+                self._closing = True
+                self._in_flight = 0
+                # blocked writers and flushes fail fast; the buffered rows are left to close
+                self._condition.notify_all()
+
+    def _post_buffer(self):
+        self._replay_spill()
+
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            posted = self._post([row for _, row in batch]) is not None
+
+            with self._condition:
+                self._in_flight = 0
+                if not posted:
+                    # keep the batch at the front of the buffer, in order
+                    self._buffer.extendleft(reversed(batch))
+                self._condition.notify_all()
+
+                if not posted:
+                    if self._closing:
+                        return
+                    self._condition.wait(self.retry_interval)
+                    continue
+
+            if self.spill_path is not None and os.path.exists(self.spill_path):
+                self._replay_spill()
+
+    def _spill(self, rows: List[Any]) -> None:
+        """Appends rows to the spill file, called with the condition held"""
+        dumps = self._json_codec.dumps
+        with self._open_spill() as spill_file:
+            for row in rows:
+                spill_file.write(dumps(row if type(row) is dict else row.to_dict()) + b'\n')
+
+        self.stats.rows_spilled += len(rows)
+
+    def _open_spill(self):
+        """Opens the spill file for appending, ending a line torn by a crash so that it does not swallow the next"""
+        spill_file = open(self.spill_path, 'a+b')
+        if spill_file.seek(0, os.SEEK_END):
+            spill_file.seek(-1, os.SEEK_END)
+            if spill_file.read(1) != b'\n':
+                spill_file.write(b'\n')
+
+        return spill_file
+
+    def _replay_spill(self) -> None:
+        """Posts rows spilled to disk, keeping what could not be posted in the spill file"""
+        if self.spill_path is None:
+            return
+
+        replay_path = f'{self.spill_path}.replay'
+        with self._condition:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                os.replace(self.spill_path, replay_path)
+
+        with open(replay_path, 'rb') as replay_file:
+            while True:
+                lines = list(itertools.islice(replay_file, self.batch_size))
+                if not lines:
+                    break
+
+                lines, rows = self._decode_spilled(lines)
+                posted = self._post(rows) if rows else 0
+                if posted is None:
+                    # put back what is left, to be replayed later
+                    with self._condition:
+                        with self._open_spill() as spill_file:
+                            spill_file.writelines(lines)
+                            spill_file.writelines(replay_file)
+                    break
+
+                with self._condition:
+                    self.stats.rows_replayed += posted
+
+        os.remove(replay_path)
+
+    def _decode_spilled(self, lines: List[bytes]) -> Tuple[List[bytes], List[Any]]:
+        """Decodes spilled lines, moving those that cannot be decoded to the .rejected file
+
+        :return: The lines that were decoded, and their rows
+        """
+        loads = self._json_codec.loads
+        decoded = []
+        rows = []
+        rejected = []
+        for line in lines:
+            if not line.strip():
+                continue
+            if not line.endswith(b'\n'):
+                line += b'\n'
+
+            try:
+                rows.append(loads(line))
+            except ValueError:
+                rejected.append(line)
+            else:
+                decoded.append(line)
+
+        if rejected:
+            self._write_rejected(rejected)
+            with self._condition:
+                self.stats.rows_rejected += len(rejected)
+
+        return decoded, rows
@@ -1,9 +1,9 @@
 # -*- coding: future_fstrings -*-
 
-import json
+from .base import Deserializable, Field, ModelEncoder, attributes_dict
 
 
-class Report:
+class Report(Deserializable):
     id_key = 'id'
     name_key = 'name'
     web_url_key = 'webUrl'
@@ -12,6 +12,16 @@ class Report:
     target_workspace_id_key = 'targetWorkspaceId'
     target_model_id_key = 'targetModelId'
 
+    __slots__ = ('id', 'name', 'web_url', 'embed_url', 'dataset_id')
+
+    field_specs = (
+        Field(id_key, 'id', required=True, not_blank=True, convert=str, encode=True, omit_none=False),
+        Field(name_key, 'name', required=True, not_blank=True, convert=str, encode=True, omit_none=False),
+        Field(web_url_key, 'web_url', convert=str, encode=True, omit_none=False),
+        Field(embed_url_key, 'embed_url', convert=str, encode=True, omit_none=False),
+        Field(dataset_id_key, 'dataset_id', encode=True, omit_none=False),
+    )
+
     def __init__(self, report_id, name, web_url, embed_url, dataset_id):
         self.id = report_id
         self.name = name
@@ -19,58 +29,9 @@ class Report:
         self.embed_url = embed_url
         self.dataset_id = dataset_id
 
-    @classmethod
-    def from_dict(cls, dictionary):
-        """
-        Creates a report from a dictionary
-        :param dictionary: The dictionary to create a report from
-        :return: The created dictionary
-        """
-        # id is required
-        if cls.id_key in dictionary:
-            report_id = str(dictionary[cls.id_key])
-            # id cannot be whitespace
-            if report_id.isspace():
-                raise RuntimeError(f'Report dict has empty {cls.id_key} key value')
-        else:
-            raise RuntimeError(f'Report dict has no {cls.id_key} key')
-
-        # name is required
-        if cls.name_key in dictionary:
-            report_name = str(dictionary[cls.name_key])
-            # name cannot be whitespace
-            if report_name.isspace():
-                raise RuntimeError(f'Report dict has empty {cls.name_key} key value')
-        else:
-            raise RuntimeError(f'Report dict has no {cls.name_key} key')
-
-        # web url is optional
-        if cls.web_url_key in dictionary:
-            web_url = str(dictionary[cls.web_url_key])
-        else:
-            web_url = None
-
-        # embed url is optional
-        if cls.embed_url_key in dictionary:
-            embed_url = str(dictionary[cls.embed_url_key])
-        else:
-            embed_url = None
-
-        # dataset id is optional
-        dataset_id = dictionary.get(cls.dataset_id_key)
-
-        return Report(report_id, report_name, web_url, embed_url, dataset_id)
-
     def __repr__(self):
-        return f'<Report {str(self.__dict__)}>'
+        return f'<Report {str(attributes_dict(self))}>'
 
 
-class ReportEncoder(json.JSONEncoder):
-    def default(self, o):
-        return {
-            Report.id_key: o.id,
-            Report.name_key: o.name,
-            Report.web_url_key: o.web_url,
-            Report.embed_url_key: o.embed_url,
-            Report.dataset_id_key: o.dataset_id
-        }
+class ReportEncoder(ModelEncoder):
+    pass
@@ -2,14 +2,16 @@
 import io
 from typing import Optional
 
-import requests
-import json
 from requests.exceptions import HTTPError
 
 import pypowerbi.client
+from pypowerbi.base import ModelList
+from pypowerbi.json_codec import default_codec
+from pypowerbi.tracing import traced_operations
 from pypowerbi.report import Report
 
 
+@traced_operations
 class Reports:
     # url snippets
     groups_snippet = 'groups'
@@ -18,6 +20,7 @@ class Reports:
     clone_snippet = 'clone'
     export_snippet = 'Export'
     generate_token_snippet = 'generatetoken'
+    multi_resource_generate_token_snippet = 'GenerateToken'
 
     # json keys
     get_reports_value_key = 'value'
@@ -43,11 +46,7 @@ class Reports:
         """
         reports = self.get_reports(group_id)
 
-        for report in reports:
-            if report.id == str(report_id):
-                return True
-
-        return False
+        return str(report_id) in reports.ids()
 
     def get_reports(self, group_id=None):
         """
@@ -68,11 +67,11 @@ class Reports:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 - OK. Indicates success. List of reports.
         if response.status_code == 200:
-            reports = self.reports_from_get_reports_response(response)
+            reports = self.reports_from_get_reports_response(response, self.client.json_codec)
         else:
             raise HTTPError(response, f'Get reports request returned http error: {response.json()}')
 
@@ -88,9 +87,10 @@ class Reports:
         """
         reports = self.get_reports(group_id)
 
-        for report in reports:
-            if report.id == report_id:
-                return report
+        # only build the report that matches
+        report_ids = reports.ids()
+        if report_id in report_ids:
+            return reports[report_ids.index(report_id)]
 
         raise RuntimeError('Could not find report')
 
@@ -114,7 +114,7 @@ class Reports:
         # form the url
         url = f'{self.base_url}{groups_part}{self.reports_snippet}/{report_id}/{self.clone_snippet}'
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
         # form the json
         json_dict = {
             Report.name_key: name,
@@ -126,13 +126,13 @@ class Reports:
             json_dict[Report.target_workspace_id_key] = str(target_group_id)
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(json_dict))
 
         # 200 - OK. Indicates success.
         if response.status_code != 200:
             raise HTTPError(response, f'Clone report request returned http error: {response.json()}')
 
-        return Report.from_dict(json.loads(response.text))
+        return Report.from_dict(self.client.json_codec.loads(response.content))
 
     def delete_report(self, report_id, group_id=None):
         """
@@ -153,7 +153,7 @@ class Reports:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.delete(url, headers=headers)
+        response = self.client.request('DELETE', url, headers=headers)
 
         # 200 - OK. Indicates success.
         if response.status_code != 200:
@@ -176,14 +176,14 @@ class Reports:
         # form the url
         url = f'{self.base_url}{groups_part}{self.reports_snippet}/{report_id}/{self.rebind_snippet}'
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
         # form the json
         json_dict = {
             Report.dataset_id_key: dataset_id
         }
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(json_dict))
 
         # 200 - OK. Indicates success.
         if response.status_code != 200:
@@ -202,18 +202,41 @@ class Reports:
         url = f'{self.base_url}/{self.groups_snippet}/{group_id}/' \
               f'{self.reports_snippet}/{report_id}/{self.generate_token_snippet}'
         # form the headers
-        headers = self.client.auth_header
+        headers = self.client.json_headers
         # form the json
-        json_dict = pypowerbi.client.TokenRequestEncoder().default(token_request)
+        json_dict = token_request.to_dict()
 
         # get the response
-        response = requests.post(url, headers=headers, json=json_dict)
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(json_dict))
 
         # 200 - OK. Indicates success.
         if response.status_code != 200:
             raise HTTPError(response, f'Generate token for report request returned http error: {response.json()}')
 
-        return pypowerbi.client.EmbedToken.from_dict(json.loads(response.text))
+        return pypowerbi.client.EmbedToken.from_dict(self.client.json_codec.loads(response.content))
+
+    def generate_multi_resource_token(self, token_request):
+        """
+        Generates a single embed token for several reports, datasets and target workspaces
+        https://docs.microsoft.com/en-us/rest/api/power-bi/embedtoken/generatetoken
+        :param token_request: The MultiResourceTokenRequest object
+        :return: Returns the embed token
+        """
+        # form the url
+        url = f'{self.base_url}/{self.multi_resource_generate_token_snippet}'
+        # form the headers
+        headers = self.client.json_headers
+        # form the json
+        json_dict = token_request.to_dict()
+
+        # get the response
+        response = self.client.request('POST', url, headers=headers, data=self.client.json_codec.dumps(json_dict))
+
+        # 200 - OK. Indicates success.
+        if response.status_code != 200:
+            raise HTTPError(response, f'Generate token request returned http error: {response.json()}')
+
+        return pypowerbi.client.EmbedToken.from_dict(self.client.json_codec.loads(response.content))
 
     def export_report(
         self,
@@ -243,7 +266,7 @@ class Reports:
         headers = self.client.auth_header
 
         # get the response
-        response = requests.get(url, headers=headers)
+        response = self.client.request('GET', url, headers=headers)
 
         # 200 is the only valid response. Show an error in other cases.
         if response.status_code != 200:
@@ -262,17 +285,15 @@ class Reports:
             )
 
     @classmethod
-    def reports_from_get_reports_response(cls, response):
+    def reports_from_get_reports_response(cls, response, json_codec=None):
         """
         Creates a list of reports from a http response
         :param response: The response to create the reports from
-        :return: A list of reports created from the http response
+        :param json_codec: The json codec to decode the response with; defaults to the fastest installed backend
+        :return: A lazily built list of reports created from the http response
         """
         # load the response into a dict
-        response_dict = json.loads(response.text)
-        reports = []
-        # go through entries returned from API
-        for entry in response_dict[cls.get_reports_value_key]:
-            reports.append(Report.from_dict(entry))
+        response_dict = (json_codec or default_codec).loads(response.content)
 
-        return reports
+        # reports are built from the entries as they are accessed
+        return ModelList(response_dict[cls.get_reports_value_key], Report)
@@ -0,0 +1,309 @@
+# -*- coding: future_fstrings -*-
+import csv
+import datetime
+import decimal
+import itertools
+import numbers
+import os
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+from .dataset import Column, Dataset, Row, Table
+from .enums import ColumnDataType
+from .formats import datetime_regex, float_regex, int64_max, int64_min, int_regex
+
+
+"""
+This file contains the push dataset schema inference. Rows are read in chunks and each column's values are typed a
+chunk at a time, so only the inferred type per column is kept however long the input is.
+"""
+
+_booleans = frozenset(('true', 'false'))
+
+# types whose values all map to the same data type
+_data_types_by_type = {
+    bool: ColumnDataType.BOOLEAN,
+    float: ColumnDataType.DOUBLE,
+    decimal.Decimal: ColumnDataType.DOUBLE,
+    datetime.datetime: ColumnDataType.DATETIME,
+    datetime.date: ColumnDataType.DATETIME,
+}
+
+# pandas.api.types.infer_dtype results, for object columns
+_data_types_by_inferred_dtype = {
+    'integer': ColumnDataType.INT64,
+    'floating': ColumnDataType.DOUBLE,
+    'mixed-integer-float': ColumnDataType.DOUBLE,
+    'decimal': ColumnDataType.DOUBLE,
+    'boolean': ColumnDataType.BOOLEAN,
+    'datetime64': ColumnDataType.DATETIME,
+    'datetime': ColumnDataType.DATETIME,
+    'date': ColumnDataType.DATETIME,
+}
+
+# numpy dtype kinds
+_data_types_by_dtype_kind = {
+    'b': ColumnDataType.BOOLEAN,
+    'i': ColumnDataType.INT64,
+    'u': ColumnDataType.INT64,
+    'f': ColumnDataType.DOUBLE,
+    'M': ColumnDataType.DATETIME,
+}
+
+
+def _merge(data_type: Optional[ColumnDataType], other: Optional[ColumnDataType]) -> Optional[ColumnDataType]:
+    """The narrowest data type holding values of both data types; None stands for a column of nulls only"""
+    if data_type is None or data_type is other:
+        return other
+    if other is None:
+        return data_type
+    if {data_type, other} == {ColumnDataType.INT64, ColumnDataType.DOUBLE}:
+        return ColumnDataType.DOUBLE
+
+    return ColumnDataType.STRING
+
+
+def _string_data_type(text: str) -> Optional[ColumnDataType]:
+    """The data type of a value read from text, e.g. a csv field; None for an empty field"""
+    if not text or text.isspace():
+        return None
+
+    if int_regex.fullmatch(text):
+        return ColumnDataType.INT64 if int64_min <= int(text) <= int64_max else ColumnDataType.DOUBLE
+
+    if float_regex.fullmatch(text):
+        return ColumnDataType.DOUBLE
+
+    if text.lower() in _booleans:
+        return ColumnDataType.BOOLEAN
+
+    if datetime_regex.fullmatch(text):
+        return ColumnDataType.DATETIME
+
+    return ColumnDataType.STRING
+
+
+def _values_data_type(values: Sequence[Any], parse_strings: bool) -> Optional[ColumnDataType]:
+    """The data type of a chunk of a column's values
+
+    Values are grouped by type first, so only strings (when parsed) and integers (for their range) are looked at
+    one by one, and only the distinct ones.
+    """
+    data_type = None
+
+    for value_type in set(map(type, values)):
+        if value_type is type(None):
+            continue
+
+        if value_type is str:
+            if not parse_strings:
+                return ColumnDataType.STRING
+
+            for text in {value for value in values if type(value) is str}:
+                data_type = _merge(data_type, _string_data_type(text))
+                if data_type is ColumnDataType.STRING:
+                    return data_type
+            continue
+
+        value_data_type = _data_types_by_type.get(value_type)
+        if value_data_type is None:
+            if issubclass(value_type, numbers.Integral) and not issubclass(value_type, bool):
+                integers = [value for value in values if type(value) is value_type]
+                in_range = int64_min <= min(integers) and max(integers) <= int64_max
+                value_data_type = ColumnDataType.INT64 if in_range else ColumnDataType.DOUBLE
+            elif issubclass(value_type, bool):
+                value_data_type = ColumnDataType.BOOLEAN
+            elif issubclass(value_type, numbers.Real):
+                value_data_type = ColumnDataType.DOUBLE
+            elif issubclass(value_type, datetime.date):
+                value_data_type = ColumnDataType.DATETIME
+            else:
+                value_data_type = ColumnDataType.STRING
+
+        data_type = _merge(data_type, value_data_type)
+        if data_type is ColumnDataType.STRING:
+            return data_type
+
+    return data_type
+
+
+class SchemaInference:
+    """Infers the Power BI data types of a table's columns from chunks of rows
+
+    Columns are kept in the order they are first seen. A column whose values are of mixed, incompatible types is a
+    String column, as is a column holding only nulls.
+    """
+    def __init__(self, parse_strings: bool = False):
+        """Constructs a SchemaInference
+
+        :param parse_strings: Whether string values are parsed, e.g. '1' counts as an Int64 and '2020-01-01' as a
+         DateTime value. Csv fields are always parsed.
+        """
+        self.parse_strings = parse_strings
+        self.row_count = 0
+        self._data_types: Dict[str, Optional[ColumnDataType]] = {}
+
+    @property
+    def data_types(self) -> Dict[str, ColumnDataType]:
+        """The inferred data type per column"""
+        return {name: data_type or ColumnDataType.STRING for name, data_type in self._data_types.items()}
+
+    def update_columns(self, names: Sequence[str], columns: Sequence[Sequence[Any]]) -> None:
+        """Accounts for a chunk of rows given column by column
+
+        :param names: The column names
+        :param columns: The values of each column, in the order of names
+        """
+        for name, values in zip(names, columns):
+            data_type = self._data_types.setdefault(name, None)
+            if data_type is ColumnDataType.STRING:
+                continue
+
+            self._data_types[name] = _merge(data_type, _values_data_type(values, self.parse_strings))
+
+        if columns:
+            self.row_count += len(columns[0])
+
+    def update(self, rows: Sequence[Mapping[str, Any]]) -> None:
+        """Accounts for a chunk of rows given as mappings, e.g. dicts
+
+        :param rows: The rows; a key missing from a row counts as a null value
+        """
+        names = list(dict.fromkeys(itertools.chain.from_iterable(rows)))
+        self.update_columns(names, [[row.get(name) for row in rows] for name in names])
+
+    def table(self, name: str) -> Table:
+        """Builds a Table with a column per inferred data type
+
+        :param name: The table name
+        :return: The table, ready to be posted with Datasets.post_dataset
+        """
+        return Table(name, [Column(column_name, data_type.value)
+                            for column_name, data_type in self.data_types.items()])
+
+
+def _chunks(iterable: Iterable[Any], chunk_size: int, sample_size: Optional[int]):
+    iterator = iter(iterable) if sample_size is None else itertools.islice(iterable, sample_size)
+
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def infer_table(
+    name: str,
+    rows: Iterable[Any],
+    sample_size: Optional[int] = None,
+    parse_strings: bool = False,
+    chunk_size: int = 10000
+) -> Table:
+    """Infers a table from an iterable of rows
+
+    :param name: The table name
+    :param rows: The rows, as dicts or Row objects
+    :param sample_size: The number of rows to read; None reads them all
+    :param parse_strings: Whether string values are parsed into numbers, booleans and datetimes
+    :param chunk_size: The number of rows held in memory at once
+    :return: The inferred table
+    """
+    inference = SchemaInference(parse_strings)
+
+    for chunk in _chunks(rows, chunk_size, sample_size):
+        inference.update([row.to_dict() if isinstance(row, Row) else row for row in chunk])
+
+    return inference.table(name)
+
+
+def infer_table_from_csv(
+    name: str,
+    csv_file,
+    sample_size: Optional[int] = None,
+    chunk_size: int = 10000,
+    **reader_kwargs
+) -> Table:
+    """Infers a table from a csv file with a header row
+
+    :param name: The table name
+    :param csv_file: The path of the csv file, or a text file object
+    :param sample_size: The number of data rows to read; None reads them all
+    :param chunk_size: The number of rows held in memory at once
+    :param reader_kwargs: Further csv.reader arguments, e.g. delimiter
+    :return: The inferred table
+    """
+    if isinstance(csv_file, (str, bytes, os.PathLike)):
+        with open(csv_file, newline='') as opened_file:
+            return infer_table_from_csv(name, opened_file, sample_size, chunk_size, **reader_kwargs)
+
+    reader = csv.reader(csv_file, **reader_kwargs)
+    names = next(reader, [])
+    inference = SchemaInference(parse_strings=True)
+    # columns without any data rows are String columns
+    inference.update_columns(names, [[] for _ in names])
+
+    for chunk in _chunks(reader, chunk_size, sample_size):
+        # short rows are padded with empty fields, extra fields are ignored
+        columns = list(itertools.zip_longest(*chunk, fillvalue=''))[:len(names)]
+        columns += [[''] * len(chunk)] * (len(names) - len(columns))
+        inference.update_columns(names, columns)
+
+    return inference.table(name)
+
+
+def infer_table_from_dataframe(name: str, data_frame, sample_size: Optional[int] = None) -> Table:
+    """Infers a table from a pandas DataFrame
+
+    Numeric, boolean and datetime columns are typed from their dtype; object, string and categorical columns from
+    pandas' own inference over their values.
+
+    :param name: The table name
+    :param data_frame: The DataFrame
+    :param sample_size: The number of rows object columns are inferred from; None uses them all
+    :return: The inferred table
+    """
+    if pandas is None:
+        raise ImportError('Inferring a table from a DataFrame requires the pandas package')
+
+    columns = []
+    for column_name, dtype in data_frame.dtypes.items():
+        data_type = _data_types_by_dtype_kind.get(dtype.kind)
+
+        if data_type is None:
+            series = data_frame[column_name]
+            if sample_size is not None:
+                series = series.head(sample_size)
+            if isinstance(dtype, pandas.CategoricalDtype):
+                series = series.cat.categories.to_series()
+
+            inferred_dtype = pandas.api.types.infer_dtype(series, skipna=True)
+            data_type = _data_types_by_inferred_dtype.get(inferred_dtype, ColumnDataType.STRING)
+
+        columns.append(Column(str(column_name), data_type.value))
+
+    return Table(name, columns)
+
+
+def infer_dataset(name: str, sources: Mapping[str, Any], sample_size: Optional[int] = None) -> Dataset:
+    """Infers a dataset with a table per source
+
+    :param name: The dataset name
+    :param sources: The sources by table name; each is a pandas DataFrame, the path of a csv file, or an iterable of
+     rows as dicts or Row objects
+    :param sample_size: The number of rows to read per source; None reads them all
+    :return: The inferred dataset, ready to be posted with Datasets.post_dataset
+    """
+    tables = []
+    for table_name, source in sources.items():
+        if pandas is not None and isinstance(source, pandas.DataFrame):
+            tables.append(infer_table_from_dataframe(table_name, source, sample_size))
+        elif isinstance(source, (str, bytes, os.PathLike)):
+            tables.append(infer_table_from_csv(table_name, source, sample_size))
+        else:
+            tables.append(infer_table(table_name, source, sample_size))
+
+    return Dataset(name, tables=tables)
@@ -0,0 +1,175 @@
+# -*- coding: future_fstrings -*-
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .dataset import Column, Measure, Table
+
+
+"""
+This file contains the push dataset schema sync. Each dataset's current tables are fetched and diffed against the
+desired tables, and only the tables that differ are put, with every request of a rollout running on one thread pool.
+"""
+
+
+def _column_key(column: Column):
+    # the service is case insensitive about data types, e.g. 'string' comes back as 'String'
+    return str(column.data_type).lower(), column.formatstring
+
+
+def _measure_key(measure: Measure):
+    return measure.expression, measure.formatstring, bool(measure.is_hidden)
+
+
+class TableDiff:
+    """The differences between a table as it is and as it should be"""
+    __slots__ = ('table_name', 'is_new', 'added_columns', 'removed_columns', 'changed_columns', 'added_measures',
+                 'removed_measures', 'changed_measures')
+
+    def __init__(self, table_name: str, is_new: bool = False):
+        self.table_name = table_name
+        # the dataset has no such table yet
+        self.is_new = is_new
+        self.added_columns: List[str] = []
+        self.removed_columns: List[str] = []
+        self.changed_columns: List[str] = []
+        self.added_measures: List[str] = []
+        self.removed_measures: List[str] = []
+        self.changed_measures: List[str] = []
+
+    @property
+    def has_changes(self) -> bool:
+        return self.is_new or any((self.added_columns, self.removed_columns, self.changed_columns,
+                                   self.added_measures, self.removed_measures, self.changed_measures))
+
+    def __repr__(self):
+        if self.is_new:
+            return f'<TableDiff {self.table_name} new>'
+
+        return f'<TableDiff {self.table_name} columns +{self.added_columns} -{self.removed_columns} ' \
+               f'~{self.changed_columns} measures +{self.added_measures} -{self.removed_measures} ' \
+               f'~{self.changed_measures}>'
+
+
+def _diff_named(current: Dict[str, Any], desired: Dict[str, Any], key):
+    added = [name for name in desired if name not in current]
+    removed = [name for name in current if name not in desired]
+    changed = [name for name, item in desired.items() if name in current and key(current[name]) != key(item)]
+
+    return added, removed, changed
+
+
+def diff_table(current: Optional[Table], desired: Table) -> TableDiff:
+    """Diffs a table against the table it should be
+
+    Columns and measures are matched by name, so their order does not matter.
+
+    :param current: The table as it is, or None if the dataset does not have it
+    :param desired: The table as it should be
+    :return: The differences
+    """
+    if current is None:
+        return TableDiff(desired.name, is_new=True)
+
+    diff = TableDiff(desired.name)
+    diff.added_columns, diff.removed_columns, diff.changed_columns = _diff_named(
+        {column.name: column for column in current.columns or ()},
+        {column.name: column for column in desired.columns or ()},
+        _column_key
+    )
+    diff.added_measures, diff.removed_measures, diff.changed_measures = _diff_named(
+        {measure.name: measure for measure in current.measures or ()},
+        {measure.name: measure for measure in desired.measures or ()},
+        _measure_key
+    )
+
+    return diff
+
+
+def diff_tables(current: Iterable[Table], desired: Iterable[Table]) -> List[TableDiff]:
+    """Diffs a dataset's tables against the tables it should have
+
+    Tables the dataset has but which are not desired are left out, as push dataset tables cannot be deleted.
+
+    :param current: The tables as they are
+    :param desired: The tables as they should be
+    :return: A diff per desired table, whether it has changes or not
+    """
+    current_by_name = {table.name: table for table in current}
+
+    return [diff_table(current_by_name.get(table.name), table) for table in desired]
+
+
+class SchemaSyncResult:
+    """What a schema sync did to a single dataset"""
+    __slots__ = ('dataset_id', 'group_id', 'diffs', 'updated_tables', 'errors')
+
+    def __init__(self, dataset_id: str, group_id: Optional[str]):
+        self.dataset_id = dataset_id
+        self.group_id = group_id
+        self.diffs: List[TableDiff] = []
+        # the names of the tables that were put
+        self.updated_tables: List[str] = []
+        # the exceptions by table name, or by None when the tables could not be fetched
+        self.errors: Dict[Optional[str], BaseException] = {}
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.errors
+
+    @property
+    def changed(self) -> bool:
+        return any(diff.has_changes for diff in self.diffs)
+
+    def __repr__(self):
+        return f'<SchemaSyncResult dataset={self.dataset_id} updated={self.updated_tables} ' \
+               f'errors={len(self.errors)}>'
+
+
+def sync_schemas(
+    datasets,
+    dataset_ids: Iterable[str],
+    tables: Sequence[Table],
+    group_id: Optional[str] = None,
+    max_workers: int = 8,
+    dry_run: bool = False
+) -> List[SchemaSyncResult]:
+    """Brings the tables of push datasets in line with the desired tables, putting only the tables that differ
+
+    The current tables of all datasets are fetched concurrently, then all the needed put_table calls are made
+    concurrently, so a rollout over many datasets takes about two requests' time per max_workers datasets. Syncing
+    again once it succeeded puts nothing, unless the service returns tables without their columns, in which case
+    every desired table is put. Failures are recorded per dataset and table rather than raised.
+
+    :param datasets: The Datasets operations of a client
+    :param dataset_ids: The ids of the push datasets
+    :param tables: The tables every dataset should have
+    :param group_id: The optional id of the group of the datasets
+    :param max_workers: The number of concurrent requests
+    :param dry_run: Whether to only diff, without putting any table
+    :return: A result per dataset, in the order of dataset_ids
+    """
+    results = [SchemaSyncResult(dataset_id, group_id) for dataset_id in dataset_ids]
+    tables_by_name = {table.name: table for table in tables}
+
+    def fetch(result):
+        try:
+            result.diffs = diff_tables(datasets.get_tables(result.dataset_id, group_id), tables)
+        except Exception as error:
+            result.errors[None] = error
+
+    def put(result, table_name):
+        try:
+            datasets.put_table(result.dataset_id, table_name, tables_by_name[table_name], group_id)
+            result.updated_tables.append(table_name)
+        except Exception as error:
+            result.errors[table_name] = error
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pypowerbi-schema-sync') as executor:
+        # list() re-raises anything unexpected from the workers
+        list(executor.map(fetch, results))
+
+        if not dry_run:
+            puts = [(result, diff.table_name) for result in results for diff in result.diffs if diff.has_changes]
+            list(executor.map(lambda item: put(*item), puts))
+
+    return results
@@ -0,0 +1,170 @@
+# -*- coding: future_fstrings -*-
+import hashlib
+import json
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from .base import Deserializable, attributes_dict
+
+
+"""
+This file contains tenant snapshots and the diff between two of them. A snapshot holds records by kind and key, each
+with a fingerprint, so a diff finds the added, removed and changed records with a dict lookup per record and only
+compares the fields of the records whose fingerprints differ.
+"""
+
+
+def _plain(value: Any) -> Any:
+    """Converts models, enums and tuples into json compatible values"""
+    if isinstance(value, Deserializable):
+        return {name: _plain(attribute) for name, attribute in attributes_dict(value).items()}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+
+    return value
+
+
+def _fingerprint(record: Dict[str, Any]) -> bytes:
+    encoded = json.dumps(record, sort_keys=True, separators=(',', ':'), default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+def _key(key: Any) -> Hashable:
+    """Keys are kept as strings or tuples, also after a round trip through json"""
+    return tuple(key) if isinstance(key, list) else key
+
+
+class Snapshot:
+    """Records of a tenant, by kind (e.g. 'datasets') and key (e.g. a dataset id)"""
+    def __init__(self):
+        self.records: Dict[str, Dict[Hashable, Dict[str, Any]]] = {}
+        self._fingerprints: Dict[str, Dict[Hashable, bytes]] = {}
+
+    def add(self, kind: str, key: Hashable, record: Dict[str, Any]) -> None:
+        """Adds a record, replacing the record of the same kind and key
+
+        :param kind: The kind of the record, e.g. 'datasets'
+        :param key: The key of the record within its kind, a string or a tuple of strings
+        :param record: The record's fields, with json compatible values
+        """
+        self.records.setdefault(kind, {})[key] = record
+        self._fingerprints.setdefault(kind, {})[key] = _fingerprint(record)
+
+    def add_models(self, kind: str, models: Iterable[Any], key: Callable[[Any], Hashable] = lambda model: model.id,
+                   exclude: Iterable[str] = ()) -> None:
+        """Adds a record per model, with the model's attributes as fields
+
+        :param kind: The kind of the records, e.g. 'datasource_users'
+        :param models: The models, e.g. the result of Gateways.get_datasource_users
+        :param key: Returns the key of a model; the model id by default
+        :param exclude: The attributes to leave out, e.g. ones that change on every read
+        """
+        exclude = set(exclude)
+        for model in models:
+            record = {name: _plain(value) for name, value in attributes_dict(model).items() if name not in exclude}
+            self.add(kind, key(model), record)
+
+    def kinds(self) -> List[str]:
+        return list(self.records)
+
+    def __len__(self):
+        return sum(len(records) for records in self.records.values())
+
+    def save(self, path: str) -> None:
+        """Writes the snapshot to a file, as a json line per record"""
+        with open(path, 'w', encoding='utf-8') as file:
+            for kind, records in self.records.items():
+                for key, record in records.items():
+                    file.write(json.dumps([kind, key, record], separators=(',', ':'), default=str))
+                    file.write('\n')
+
+    @classmethod
+    def load(cls, path: str) -> 'Snapshot':
+        """Reads a snapshot written by save"""
+        snapshot = cls()
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                kind, key, record = json.loads(line)
+                snapshot.add(kind, _key(key), record)
+
+        return snapshot
+
+    def __repr__(self):
+        counts = ' '.join(f'{kind}={len(records)}' for kind, records in self.records.items())
+        return f'<Snapshot {counts}>'
+
+
+class Change:
+    """A record that was added, removed or changed between two snapshots"""
+    __slots__ = ('kind', 'key', 'action', 'old', 'new')
+
+    # what can happen to a record
+    added = 'added'
+    removed = 'removed'
+    changed = 'changed'
+
+    def __init__(self, kind: str, key: Hashable, action: str, old: Optional[Dict[str, Any]],
+                 new: Optional[Dict[str, Any]]):
+        self.kind = kind
+        self.key = key
+        self.action = action
+        self.old = old
+        self.new = new
+
+    @property
+    def fields(self) -> Dict[str, Tuple[Any, Any]]:
+        """The fields that differ, as (old value, new value) by name"""
+        old = self.old or {}
+        new = self.new or {}
+
+        return {name: (old.get(name), new.get(name)) for name in {**old, **new}
+                if old.get(name) != new.get(name)}
+
+    def to_row(self) -> Dict[str, Any]:
+        """The change as a flat dict, e.g. for a csv report or a DataFrame"""
+        return {
+            'kind': self.kind,
+            'key': '/'.join(map(str, self.key)) if isinstance(self.key, tuple) else self.key,
+            'action': self.action,
+            'fields': ', '.join(sorted(self.fields)) if self.action == self.changed else '',
+        }
+
+    def __repr__(self):
+        return f'<Change {self.action} {self.kind} {self.key}>'
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot, kinds: Optional[Iterable[str]] = None) -> Iterator[Change]:
+    """Yields the changes from one snapshot to another
+
+    Per kind, the removed and changed records are yielded in the order of the old snapshot, then the added records in
+    the order of the new one. Records are compared by fingerprint, so the diff takes time linear in the number of
+    records.
+
+    :param old: The earlier snapshot
+    :param new: The later snapshot
+    :param kinds: The kinds to compare; None compares all kinds of either snapshot
+    :return: The changes
+    """
+    if kinds is None:
+        kinds = list(dict.fromkeys(old.kinds() + new.kinds()))
+
+    for kind in kinds:
+        old_records = old.records.get(kind, {})
+        new_records = new.records.get(kind, {})
+        old_fingerprints = old._fingerprints.get(kind, {})
+        new_fingerprints = new._fingerprints.get(kind, {})
+
+        for key, fingerprint in old_fingerprints.items():
+            new_fingerprint = new_fingerprints.get(key)
+            if new_fingerprint is None:
+                yield Change(kind, key, Change.removed, old_records[key], None)
+            elif new_fingerprint != fingerprint:
+                yield Change(kind, key, Change.changed, old_records[key], new_records[key])
+
+        for key in new_fingerprints:
+            if key not in old_fingerprints:
+                yield Change(kind, key, Change.added, None, new_records[key])
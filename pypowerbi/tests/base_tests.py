@@ -0,0 +1,164 @@
+# -*- coding: future_fstrings -*-
+
+import json
+from types import SimpleNamespace
+from unittest import TestCase
+
+from pypowerbi import *
+from pypowerbi.base import Deserializable, Field, ModelList
+from pypowerbi.enums import CredentialType
+from pypowerbi.gateway import Gateway, GatewayDatasource
+from pypowerbi.import_class import Import
+
+
+class FieldSpecTests(TestCase):
+    def test_required_key(self):
+        with self.assertRaises(RuntimeError) as context:
+            Dataset.from_dict({'name': 'theDataset'})
+
+        self.assertEqual('Dataset dict has no id key', str(context.exception))
+
+        with self.assertRaises(RuntimeError):
+            Gateway.from_dict({'name': 'theGateway'})
+
+    def test_blank_key(self):
+        with self.assertRaises(RuntimeError) as context:
+            Dataset.from_dict({'id': '1234', 'name': '   '})
+
+        self.assertEqual('Dataset dict has empty name key value', str(context.exception))
+
+    def test_conversions_and_defaults(self):
+        dataset = Dataset.from_dict({
+            'id': 1234,
+            'name': 'theDataset',
+            'isRefreshable': 1,
+            'configuredBy': None,
+        })
+
+        self.assertEqual('1234', dataset.id)
+        self.assertIs(True, dataset.is_refreshable)
+        self.assertIsNone(dataset.configured_by)
+        self.assertIsNone(dataset.add_rows_api_enabled)
+        self.assertIsNone(dataset.tables)
+
+        datasource = GatewayDatasource.from_dict({
+            'id': 'ds',
+            'credentialType': 'Basic',
+            'connectionDetails': {'server': 'the server'},
+        })
+
+        self.assertEqual(CredentialType.BASIC, datasource.credential_type)
+        self.assertEqual('{"server": "the server"}', datasource.connection_details)
+
+    def test_nested_models(self):
+        imported = Import.from_dict({
+            'id': 'import',
+            'datasets': [{'id': '1', 'name': 'theDataset'}],
+            'reports': [{'id': '2', 'name': 'theReport', 'datasetId': '1'}],
+        })
+
+        self.assertIsInstance(imported.datasets[0], Dataset)
+        self.assertEqual('1', imported.reports[0].dataset_id)
+        self.assertIsNone(imported.reports[0].web_url)
+
+        table = Table.from_dict({
+            'name': 'theTable',
+            'columns': [{'name': 'id', 'dataType': 'Int64'}],
+            'measures': [{'name': 'count', 'expression': 'COUNTROWS(theTable)'}],
+        })
+
+        self.assertIsInstance(table.columns[0], Column)
+        self.assertIsInstance(table.measures[0], Measure)
+        self.assertIsNone(table.rows)
+
+    def test_round_trip(self):
+        table = Table(name='theTable', columns=[Column(name='id', data_type='Int64', formatstring='0')],
+                      measures=[Measure(name='count', expression='COUNTROWS(theTable)', is_hidden=False)],
+                      rows=[Row(id=1)])
+
+        self.assertEqual({
+            'name': 'theTable',
+            'columns': [{'name': 'id', 'dataType': 'Int64', 'formatString': '0'}],
+            'measures': [{'name': 'count', 'expression': 'COUNTROWS(theTable)', 'isHidden': False}],
+            'rows': [{'id': 1}],
+        }, table.to_dict())
+
+        decoded = Table.from_dict(table.to_dict())
+        self.assertEqual('0', decoded.columns[0].formatstring)
+        self.assertIsNone(decoded.rows)
+
+    def test_omit_none(self):
+        report = Report('1', 'theReport', None, None, None)
+
+        self.assertEqual('{"id": "1", "name": "theReport", "webUrl": null, "embedUrl": null, "datasetId": null}',
+                         json.dumps(report, cls=ReportEncoder))
+
+    def test_custom_model(self):
+        class Thing(Deserializable):
+            __slots__ = ('name', 'size')
+
+            field_specs = (
+                Field('name', 'name', required=True, encode=True),
+                Field('size', 'size', convert=int, default=0, encode=True, serialize=str),
+            )
+
+        thing = Thing.from_dict({'name': 'a', 'size': '3'})
+        self.assertEqual(3, thing.size)
+        self.assertEqual({'name': 'a', 'size': '3'}, thing.to_dict())
+        self.assertEqual(0, Thing.from_dict({'name': 'b'}).size)
+
+
+class ModelListTests(TestCase):
+    def setUp(self):
+        self.entries = [{'id': str(x), 'name': f'dataset {x}'} for x in range(3)]
+        # the last entry is malformed, it only fails once it is built
+        self.entries.append({'name': 'no id'})
+        self.datasets = ModelList(self.entries, Dataset)
+
+    def test_lazy_access(self):
+        self.assertEqual(4, len(self.datasets))
+        self.assertEqual([None] * 4, self.datasets._models)
+
+        dataset = self.datasets[1]
+        self.assertEqual('dataset 1', dataset.name)
+        self.assertIs(dataset, self.datasets[1])
+        self.assertIsNone(self.datasets._models[0])
+
+        with self.assertRaises(RuntimeError):
+            self.datasets[-1]
+
+    def test_slice_and_iteration(self):
+        datasets = self.datasets[:3]
+
+        self.assertIsInstance(datasets, ModelList)
+        self.assertEqual(['0', '1', '2'], [x.id for x in datasets])
+
+    def test_projection(self):
+        self.assertEqual(['0', '1', '2', None], self.datasets.ids())
+        self.assertEqual(('0', 'dataset 0'), self.datasets.project('id', 'name')[0])
+        self.assertEqual([None] * 4, self.datasets._models)
+
+    def test_list_behaviour(self):
+        datasets = self.datasets[:3]
+
+        self.assertIsInstance(datasets, list)
+        self.assertNotEqual([], datasets)
+        self.assertEqual(list(datasets), datasets)
+        self.assertEqual(['0', '1', '2', '3'], [x.id for x in [] + datasets + [Dataset('3', '3')]])
+
+        datasets.append(Dataset('3', '3'))
+        self.assertEqual(['0', '1', '2', '3'], datasets.ids())
+        with self.assertRaises(ValueError):
+            datasets.project('name')
+
+    def test_ids_are_converted(self):
+        datasets = ModelList([{'id': 1, 'name': 'numbered'}], Dataset)
+
+        self.assertEqual([x.id for x in datasets], datasets.ids())
+
+    def test_from_response(self):
+        response = SimpleNamespace(content=json.dumps({'value': self.entries[:3]}).encode())
+        datasets = Datasets.datasets_from_get_datasets_response(response)
+
+        self.assertEqual(3, len(datasets))
+        self.assertEqual('dataset 2', datasets[2].name)
@@ -0,0 +1,138 @@
+# -*- coding: future_fstrings -*-
+from unittest import TestCase
+
+from pypowerbi.bulk import DatasetBinding, DatasourceSpec, promote_reports, provision_datasources, rebind_datasets
+from pypowerbi.credentials import BasicCredentials
+from pypowerbi.enums import CredentialType, DatasourceUserAccessRight, EncryptedConnection, EncryptionAlgorithm, \
+    PrivacyLevel, PrincipalType
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.gateway import CredentialDetails, DatasourceConnectionDetails, DatasourceUser, \
+    PublishDatasourceToGatewayRequest
+
+
+class RebindDatasetsTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.group = self.service.add_group('prod')
+        self.gateway = self.service.add_gateway('prod gateway')
+
+    def add_dataset(self, name, server, gateway_id=None):
+        datasource = {'datasourceType': 'Sql', 'connectionDetails': {'server': server}, 'gatewayId': gateway_id}
+        return self.service.add_dataset(name, group_id=self.group['id'], parameters={'server': server},
+                                        datasources=[datasource])['id']
+
+    def requests(self, method):
+        return [x[1] for x in self.service.request_log if x[0] == method]
+
+    def test_rebind_datasets(self):
+        in_place = self.add_dataset('in place', 'prod', self.gateway['id'])
+        outdated = self.add_dataset('outdated', 'test')
+        failing = self.service.add_dataset('no parameters', group_id=self.group['id'])['id']
+        binding = DatasetBinding({'server': 'prod'}, self.gateway['id'])
+
+        results = rebind_datasets(self.client.datasets, {in_place: binding, outdated: binding, failing: binding},
+                                  self.group['id'], refresh=True, requests_per_second=1000)
+
+        self.assertEqual(['unchanged', 'updated', 'failed'], [x.status for x in results])
+        self.assertEqual({'server': ('test', 'prod')}, results[1].changed_parameters)
+        self.assertTrue(results[1].rebound)
+        self.assertTrue(results[1].refreshed)
+        self.assertFalse(results[0].refreshed)
+        self.assertEqual('server', results[1].to_row()['changed_parameters'])
+
+        # the outdated dataset was written to, the failing one only tried to
+        self.assertEqual(['Default.BindToGateway', 'Default.UpdateParameters', 'Default.UpdateParameters', 'refreshes'],
+                         sorted(x.rsplit('/', 1)[1] for x in self.requests('POST')))
+        self.assertEqual([{'name': 'server', 'type': 'Text', 'isRequired': True, 'currentValue': 'prod'}],
+                         self.client.datasets.get_dataset_parameters(outdated, self.group['id'])['value'])
+
+        # everything is in place now
+        results = rebind_datasets(self.client.datasets, {in_place: binding, outdated: binding}, self.group['id'])
+        self.assertEqual(['unchanged', 'unchanged'], [x.status for x in results])
+
+
+class PromoteReportsTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.test = self.service.add_group('test')['id']
+        self.prod = self.service.add_group('prod')['id']
+
+    def test_promote_reports(self):
+        sales = self.service.add_dataset('sales', group_id=self.test)['id']
+        costs = self.service.add_dataset('costs', group_id=self.test)['id']
+        orphan = self.service.add_dataset('orphan', group_id=self.test)['id']
+        prod_sales = self.service.add_dataset('sales', group_id=self.prod)['id']
+        prod_costs = self.service.add_dataset('costs', group_id=self.prod)['id']
+        self.service.add_report('sales', sales, self.test)
+        self.service.add_report('costs', costs, self.test)
+        self.service.add_report('orphan', orphan, self.test)
+        existing = self.service.add_report('costs', prod_sales, self.prod)['id']
+
+        results = {x.name: x for x in promote_reports(self.client, self.test, self.prod)}
+
+        self.assertEqual('cloned', results['sales'].action)
+        self.assertEqual('rebound', results['costs'].action)
+        self.assertEqual(existing, results['costs'].target_report_id)
+        self.assertEqual('failed', results['orphan'].action)
+        self.assertIn('orphan', str(results['orphan'].error))
+        # the reports are listed once per workspace, however many are promoted
+        lists = [x for x in self.service.request_log if x[:2] == ('GET', '/v1.0/myorg/groups/{id}/reports')]
+        self.assertEqual(2, len(lists))
+        self.assertEqual({('sales', prod_sales), ('costs', prod_costs)},
+                         {(x.name, x.dataset_id) for x in self.client.reports.get_reports(self.prod)})
+
+        # promoting again changes nothing
+        results = promote_reports(self.client, self.test, self.prod, on_conflict='rebind')
+        self.assertEqual(['failed', 'unchanged', 'unchanged'], sorted(x.action for x in results))
+
+
+
+class ProvisionDatasourcesTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.gateway = self.service.add_gateway('prod gateway')['id']
+        ann = {'datasourceAccessRight': 'Read', 'identifier': 'ann@example.com', 'principalType': 'User'}
+        self.warehouse = self.service.add_gateway_datasource(self.gateway, 'warehouse', users=[ann],
+                                                             connection_details={'server': 'dwh'})['id']
+        self.service.add_gateway_datasource(self.gateway, 'moved', connection_details={'server': 'old'})
+        self.obsolete = self.service.add_gateway_datasource(self.gateway, 'obsolete')['id']
+
+    def spec(self, name, server, *users):
+        credentials = CredentialDetails(BasicCredentials('sa', 'secret').to_json(), CredentialType.BASIC,
+                                        EncryptedConnection.ENCRYPTED, EncryptionAlgorithm.NONE, PrivacyLevel.NONE)
+        request = PublishDatasourceToGatewayRequest('Sql', DatasourceConnectionDetails(server).to_json(), credentials,
+                                                    name)
+        return DatasourceSpec(request, [DatasourceUser(right, identifier=identifier, principal_type=PrincipalType.USER)
+                                        for identifier, right in users])
+
+    def test_provision_datasources(self):
+        read = DatasourceUserAccessRight.READ
+        specs = [
+            self.spec('warehouse', 'dwh', ('ann@example.com', read),
+                      ('bob@example.com', DatasourceUserAccessRight.READ_OVERRIDE_EFFECTIVE_IDENTITY)),
+            self.spec('crm', 'crm', ('ann@example.com', read)),
+            self.spec('moved', 'new'),
+        ]
+
+        results = provision_datasources(self.client.gateways, self.gateway, specs, prune=True,
+                                        requests_per_second=1000)
+
+        self.assertEqual([('warehouse', 'updated'), ('crm', 'created'), ('moved', 'failed'), ('obsolete', 'deleted')],
+                         [(x.datasource_name, x.action) for x in results])
+        self.assertEqual(['bob@example.com'], results[0].users_added)
+        self.assertEqual(['ann@example.com'], results[1].users_added)
+        self.assertEqual(self.warehouse, results[0].datasource_id)
+        self.assertIn('connection details', results[2].to_row()['error'])
+        self.assertEqual({'crm', 'moved', 'warehouse'},
+                         {x.datasource_name for x in self.client.gateways.get_datasources(self.gateway)})
+
+        # everything but the moved datasource is in place; rotating credentials only updates them
+        self.service.request_log.clear()
+        results = provision_datasources(self.client.gateways, self.gateway, specs[:2], update_credentials=True)
+
+        self.assertEqual([('updated', True, []), ('updated', True, [])],
+                         [(x.action, x.credentials_updated, x.users_added) for x in results])
+        self.assertEqual(['GET', 'GET', 'GET', 'PATCH', 'PATCH'], sorted(x[0] for x in self.service.request_log))
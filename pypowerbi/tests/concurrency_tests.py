@@ -0,0 +1,102 @@
+# -*- coding: future_fstrings -*-
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from pypowerbi.concurrency import AsyncSingleFlight, RateLimiter, SingleFlight
+from pypowerbi.fake_service import FakePowerBIService
+
+
+class RateLimiterTests(TestCase):
+    def test_acquire(self):
+        limiter = RateLimiter(rate=100, burst=2)
+
+        self.assertEqual(0.0, limiter.acquire())
+        self.assertEqual(0.0, limiter.acquire())
+        # the burst is spent, the next call waits for its turn
+        self.assertGreater(limiter.acquire(), 0.0)
+
+
+class SingleFlightTests(TestCase):
+    def run_threads(self, count, target):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_do(self):
+        flight = SingleFlight()
+        calls = []
+        results = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        self.run_threads(5, lambda: results.append(flight.do('key', slow)))
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(1, len({id(x) for x in results}))
+        self.assertEqual(4, flight.coalesced)
+
+        # nothing is cached once the call returned
+        flight.do('key', slow)
+        self.assertEqual(2, len(calls))
+
+    def test_exceptions(self):
+        flight = SingleFlight()
+        errors = []
+
+        def failing():
+            time.sleep(0.05)
+            raise ValueError('failed')
+
+        def call():
+            try:
+                flight.do('key', failing)
+            except ValueError as error:
+                errors.append(error)
+
+        self.run_threads(3, call)
+
+        self.assertEqual(3, len(errors))
+
+    def test_client_reads(self):
+        service = FakePowerBIService(seed=1, latency=0.05)
+        client = service.client(coalesce_reads=True)
+        group = service.add_group('workspace')
+        service.add_dataset('sales', group_id=group['id'])
+        results = []
+
+        self.run_threads(5, lambda: results.append(client.datasets.get_datasets(group['id'])))
+
+        self.assertEqual(1, len(service.request_log))
+        self.assertEqual([['sales']] * 5, [[x.name for x in datasets] for datasets in results])
+
+        # writes are never shared
+        names = iter(['a', 'b'])
+        self.run_threads(2, lambda: client.groups.create_group(next(names)))
+        self.assertEqual(3, len(service.request_log))
+
+        # reads are only shared when asked for
+        client = service.client()
+        self.run_threads(2, lambda: client.datasets.get_datasets(group['id']))
+        self.assertEqual(5, len(service.request_log))
+
+    def test_async_do(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        async def main():
+            return await asyncio.gather(*(flight.do('key', slow) for _ in range(5)))
+
+        self.assertEqual([1] * 5, asyncio.run(main()))
+        self.assertEqual(4, flight.coalesced)
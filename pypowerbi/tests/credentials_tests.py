@@ -1,8 +1,10 @@
+import json
 from unittest import TestCase
 
 from pypowerbi import CredentialType
 from pypowerbi.credentials import AnonymousCredentials, BasicCredentials, KeyCredentials, OAuth2Credentials, \
-    WindowsCredentials
+    WindowsCredentials, credentials_to_json
+from pypowerbi.gateway import DatasourceConnectionDetails
 
 
 # The following tests are based on the examples found here:
@@ -94,3 +96,60 @@ class CredentialsTestCase(TestCase):
             CredentialType.WINDOWS,
             windows_credentials.CREDENTIAL_TYPE
         )
+
+
+# strings covering every escape: backslashes next to escapes, quotes followed by ': ', controls, non-ascii and
+# characters beyond the basic multilingual plane
+_values = [
+    'plain', r'contoso\john', 'ends with \\', '\\"', 'a "quoted": value', '\\": x', '": ": ', 'tab\tnew\nline\r',
+    '\x00\x1f\x7f', '\b\f', 'pässwörd', '\u2028', '\U0001f600', '\ud800', '\\u00e9', '/slash/', ': "', '',
+]
+
+
+class WireFormatTests(TestCase):
+    """The serializers produce the exact output of their earlier json.dumps and replace based versions"""
+    @staticmethod
+    def credentials_json(credentials):
+        return json.dumps(credentials.credential_data, separators=(',', ':')).replace('\\\\', '\\')
+
+    @staticmethod
+    def connection_details_json(details):
+        return json.dumps(details.as_set_values_dict()).replace(r'": ', r'":').replace('\\\\', '\\')
+
+    def test_credentials(self):
+        credentials = [BasicCredentials(value or 'x', value[::-1] or 'y') for value in _values]
+        credentials.append(AnonymousCredentials())
+        credentials.append(KeyCredentials('\\'))
+        # data not built by add_credential_data takes the general path
+        irregular = KeyCredentials('k\\ey')
+        irregular.credential_data[irregular.credential_data_key].append({'value': 'v\\"', 'name': 1})
+        credentials.append(irregular)
+
+        for item in credentials:
+            self.assertEqual(self.credentials_json(item), item.to_json(), item.credential_data)
+
+        self.assertEqual([self.credentials_json(item) for item in credentials], credentials_to_json(credentials))
+
+    def test_credentials_json_types(self):
+        # tuples are encoded as lists and keys converted to strings, as json.dumps does
+        data = {'tuple': ('a\\b', ('c', 1), None), 3: 'int', 2.5: 'float', True: 'bool', None: 'none',
+                'nested': {False: ['x', ('y\\',)]}}
+        credentials = KeyCredentials('key')
+        credentials.credential_data = data
+
+        self.assertEqual(self.credentials_json(credentials), credentials.to_json())
+        self.assertEqual('{"tuple":["a\\b",["c",1],null],"3":"int","2.5":"float","true":"bool","null":"none",'
+                         '"nested":{"false":["x",["y\\"]]}}', credentials.to_json())
+
+        credentials.credential_data = {('not', 'a', 'key'): 'x'}
+        with self.assertRaises(TypeError):
+            credentials.to_json()
+
+    def test_connection_details(self):
+        for value in _values:
+            for details in (DatasourceConnectionDetails(value), DatasourceConnectionDetails(value, value[::-1], value)):
+                self.assertEqual(self.connection_details_json(details), details.to_json(), value)
+
+        self.assertEqual('{}', DatasourceConnectionDetails().to_json())
+        self.assertEqual(r'{"server":"sql\prod", "database":"sales"}',
+                         DatasourceConnectionDetails(r'sql\prod', 'sales').to_json())
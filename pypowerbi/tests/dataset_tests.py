@@ -4,6 +4,7 @@ import json
 from unittest import TestCase
 
 from pypowerbi import *
+from pypowerbi.base import attributes_dict
 
 
 class DatasetTests(TestCase):
@@ -97,3 +98,40 @@ class DatasetTests(TestCase):
                         '}'
 
         self.assertEqual(dataset_json, expected_json)
+
+    def test_models_are_slotted(self):
+        dataset = Dataset(name='testDataset', dataset_id='1234')
+        table = Table(name='testTable', columns=[Column(name='id', data_type='Int64')])
+
+        for model in [dataset, table, table.columns[0], Measure(name='count', expression='1')]:
+            self.assertFalse(hasattr(model, '__dict__'))
+
+        with self.assertRaises(AttributeError):
+            dataset.not_an_attribute = True
+
+        self.assertEqual(attributes_dict(dataset)['id'], '1234')
+        self.assertIn("'name': 'testDataset'", repr(dataset))
+
+    def test_row_values(self):
+        row = Row(id=1, name='the name')
+
+        self.assertEqual(row.id, 1)
+        self.assertEqual(row.name, 'the name')
+        with self.assertRaises(AttributeError):
+            row.missing
+
+        # rows are attribute bags, changing the dict of their values leaves them as they are
+        row.name = 'another name'
+        row.to_dict()['id'] = 2
+        self.assertEqual({'id': 1, 'name': 'another name'}, row.to_dict())
+        self.assertEqual(row.to_dict(), row.__dict__)
+
+    def test_refresh_schedule_from_dict(self):
+        schedule = RefreshSchedule.from_dict({'NotifyOption': 'MailOnFailure', 'days': ['Monday'], 'enabled': True,
+                                              'localTimeZoneId': 'UTC', 'times': ['07:00']})
+        self.assertEqual(ScheduleNotifyOption.MAIL_ON_FAILURE, schedule.notify_option)
+        self.assertEqual('UTC', schedule.local_time_zone_id)
+
+        # an empty notify option and a null time zone are not set
+        schedule = RefreshSchedule.from_dict({'NotifyOption': '', 'localTimeZoneId': None})
+        self.assertEqual((None, None), (schedule.notify_option, schedule.local_time_zone_id))
@@ -0,0 +1,134 @@
+# -*- coding: future_fstrings -*-
+import threading
+import time
+from unittest import TestCase
+
+from requests.exceptions import HTTPError
+
+from pypowerbi.client import EffectiveIdentity, MultiResourceTokenRequest, TokenRequestDataset, TokenRequestReport, \
+    TokenRequestTargetWorkspace
+from pypowerbi.embed import EmbedTokenCache, token_expiry
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.json_codec import JsonCodec
+
+
+class EmbedTokenCacheTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.group = self.service.add_group('embedded')['id']
+        dataset = self.service.add_dataset('sales', group_id=self.group)['id']
+        self.reports = [self.service.add_report(f'report {i}', dataset, self.group)['id'] for i in range(3)]
+        self.now = time.time()
+
+    def token_requests(self):
+        return len([x for x in self.service.request_log if x[1].endswith('/generatetoken')])
+
+    def cache(self, **kwargs):
+        return EmbedTokenCache(self.client.reports, clock=lambda: self.now, **kwargs)
+
+    def test_hits(self):
+        with self.cache() as cache:
+            token = cache.get_token(self.reports[0], self.group)
+            self.assertIs(token, cache.get_token(self.reports[0], self.group))
+
+            # other access levels and identities get tokens of their own
+            cache.get_token(self.reports[0], self.group, access_level='Edit')
+            identity = EffectiveIdentity('someone@somecompany.com', ['reader'], ['sales'])
+            cache.get_token(self.reports[0], self.group, identities=[identity])
+            cache.get_token(self.reports[0], self.group, identities=[identity])
+
+            self.assertEqual(3, self.token_requests())
+            self.assertEqual(2, cache.stats.hits)
+
+            # no token is handed out within the expiry margin
+            self.now = token_expiry(token) - 10
+            self.assertIsNot(token, cache.get_token(self.reports[0], self.group))
+
+    def test_refresh_ahead(self):
+        with self.cache(expiry_margin=60, refresh_ahead=600) as cache:
+            token = cache.get_token(self.reports[0], self.group)
+            self.now = token_expiry(token) - 300
+            self.service.token_lifetime *= 2
+
+            # the cached token is handed out while a new one is generated in the background
+            self.assertIs(token, cache.get_token(self.reports[0], self.group))
+            cache.close()
+
+            self.assertEqual(1, cache.stats.refreshes)
+            self.assertIsNot(token, cache.get_token(self.reports[0], self.group))
+            self.assertEqual(2, self.token_requests())
+
+    def test_lru_eviction(self):
+        with self.cache(max_size=2) as cache:
+            cache.get_token(self.reports[0], self.group)
+            cache.get_token(self.reports[1], self.group)
+            cache.get_token(self.reports[0], self.group)
+            cache.get_token(self.reports[2], self.group)
+
+            self.assertEqual(2, len(cache))
+            self.assertEqual(1, cache.stats.evictions)
+
+            # report 1 was the least recently used
+            cache.get_token(self.reports[0], self.group)
+            cache.get_token(self.reports[1], self.group)
+            self.assertEqual(4, self.token_requests())
+
+    def test_concurrent_misses(self):
+        self.service.latency = 0.05
+        tokens = []
+
+        with self.cache() as cache:
+            threads = [threading.Thread(target=lambda: tokens.append(cache.get_token(self.reports[0], self.group)))
+                       for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(1, self.token_requests())
+        self.assertEqual(1, len({token.token for token in tokens}))
+        self.assertEqual(4, cache.coalesced)
+
+
+class MultiResourceTokenTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.group = self.service.add_group('embedded')['id']
+        self.datasets = [self.service.add_dataset(f'dataset {i}', group_id=self.group)['id'] for i in range(2)]
+        self.reports = [self.service.add_report(f'report {i}', dataset_id, self.group)['id']
+                        for i, dataset_id in enumerate(self.datasets)]
+
+    def token_request(self, datasets):
+        return MultiResourceTokenRequest(
+            datasets=[TokenRequestDataset(dataset_id) for dataset_id in datasets],
+            reports=[TokenRequestReport(report_id, allow_edit=False) for report_id in self.reports],
+            target_workspaces=[TokenRequestTargetWorkspace(self.group)],
+            identities=[EffectiveIdentity('someone@somecompany.com', ['reader'], self.datasets)]
+        )
+
+    def test_json(self):
+        token_request = MultiResourceTokenRequest([TokenRequestDataset('d', 'ReadOnly')], [TokenRequestReport('r')],
+                                                  [TokenRequestTargetWorkspace('g')], lifetime_in_minutes=10)
+
+        self.assertEqual(b'{"datasets":[{"id":"d","xmlaPermissions":"ReadOnly"}],"reports":[{"id":"r"}],'
+                         b'"targetWorkspaces":[{"id":"g"}],"lifetimeInMinutes":10}',
+                         JsonCodec().dumps(token_request.to_dict()))
+
+    def test_generate_multi_resource_token(self):
+        token = self.client.reports.generate_multi_resource_token(self.token_request(self.datasets))
+
+        self.assertTrue(token.token)
+        self.assertEqual([('POST', '/v1.0/myorg/GenerateToken', 200)], self.service.request_log)
+
+        # every report's dataset has to be part of the token
+        with self.assertRaises(HTTPError):
+            self.client.reports.generate_multi_resource_token(self.token_request(self.datasets[:1]))
+
+    def test_cache(self):
+        with EmbedTokenCache(self.client.reports) as cache:
+            token = cache.get_multi_resource_token(self.token_request(self.datasets))
+            self.assertIs(token, cache.get_multi_resource_token(self.token_request(self.datasets)))
+
+        self.assertEqual(1, len(self.service.request_log))
@@ -0,0 +1,90 @@
+# -*- coding: future_fstrings -*-
+import base64
+import hashlib
+import hmac
+import json
+from unittest import TestCase, skipIf
+
+from pypowerbi.credentials import BasicCredentials
+from pypowerbi.encryption import GatewayCredentialEncryptor, encrypt_credentials, rsa
+from pypowerbi.enums import CredentialType, EncryptionAlgorithm
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.gateway import GatewayPublicKey
+
+if rsa is not None:
+    from cryptography.hazmat.primitives import hashes, padding as symmetric_padding
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+
+def _public_key(private_key):
+    numbers = private_key.public_key().public_numbers()
+
+    def encode(number):
+        return base64.b64encode(number.to_bytes((number.bit_length() + 7) // 8, 'big')).decode()
+
+    return GatewayPublicKey(encode(numbers.e), encode(numbers.n))
+
+
+def _decrypt(private_key, encrypted):
+    """Decrypts credentials the way a gateway does"""
+    size = private_key.key_size // 8
+    if size == 128:
+        oaep = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA1()), algorithm=hashes.SHA1(), label=None)
+        data = base64.b64decode(encrypted)
+        return b''.join(private_key.decrypt(data[start:start + size], oaep) for start in range(0, len(data), size))
+
+    # the base64 of the encrypted keys has no padding inside the string, its length is a multiple of 4
+    keys_length = (size + 2) // 3 * 4
+    oaep = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+    keys = private_key.decrypt(base64.b64decode(encrypted[:keys_length]), oaep)
+    assert keys[:2] == b'\x00\x01'
+    aes_key, hmac_key = keys[2:34], keys[34:]
+
+    message = base64.b64decode(encrypted[keys_length:])
+    choices, tag, iv, cipher_text = message[:2], message[2:34], message[34:50], message[50:]
+    assert hmac.compare_digest(tag, hmac.new(hmac_key, choices + iv + cipher_text, hashlib.sha256).digest())
+
+    decryptor = Cipher(algorithms.AES(aes_key), modes.CBC(iv)).decryptor()
+    unpadder = symmetric_padding.PKCS7(128).unpadder()
+    return unpadder.update(decryptor.update(cipher_text) + decryptor.finalize()) + unpadder.finalize()
+
+
+@skipIf(rsa is None, 'cryptography is not installed')
+class EncryptionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.private_keys = {size: rsa.generate_private_key(public_exponent=65537, key_size=size)
+                            for size in (1024, 2048)}
+
+    def test_encrypt_credentials(self):
+        credentials = BasicCredentials('ann', 'a "long" pässword ' * 10)
+
+        for size, private_key in self.private_keys.items():
+            encrypted = encrypt_credentials(credentials, _public_key(private_key))
+
+            decrypted = json.loads(_decrypt(private_key, encrypted).decode('utf-8'))
+            self.assertEqual(json.loads(credentials.to_json()), decrypted, size)
+
+    def test_encryptor(self):
+        service = FakePowerBIService(seed=1)
+        client = service.client(max_retry_wait=0)
+        gateways = {size: service.add_gateway(f'gateway {size}', _public_key(private_key).as_dict())['id']
+                    for size, private_key in self.private_keys.items()}
+        encryptor = GatewayCredentialEncryptor(client.gateways)
+
+        items = [(gateways[size], BasicCredentials(f'user {index}', 'secret'))
+                 for index in range(10) for size in (1024, 2048)]
+        encrypted = encryptor.encrypt_many(items)
+
+        # each gateway was read once
+        self.assertEqual(2, len([x for x in service.request_log if x[1] == '/v1.0/myorg/gateways/{id}']))
+        for (gateway_id, credentials), value in zip(items, encrypted):
+            size, = [size for size, id in gateways.items() if id == gateway_id]
+            self.assertEqual(credentials.to_json().encode(), _decrypt(self.private_keys[size], value))
+
+        details = encryptor.credential_details(gateways[2048], BasicCredentials('ann', 'secret'))
+        self.assertEqual((CredentialType.BASIC, EncryptionAlgorithm.RSA_OAEP),
+                         (details.credential_type, details.encryption_algorithm))
+        self.assertEqual(b'{"credentialData":[{"name":"username","value":"ann"},{"name":"password","value":"secret"}]}',
+                         _decrypt(self.private_keys[2048], details.credentials))
@@ -0,0 +1,173 @@
+# -*- coding: future_fstrings -*-
+import datetime
+import io
+import tempfile
+import time
+import wsgiref.util
+from unittest import TestCase
+
+from requests.exceptions import HTTPError
+
+from pypowerbi.client import TokenRequest
+from pypowerbi.dataset import Column, Dataset, Row, Table
+from pypowerbi.enums import DatasourceUserAccessRight, PrincipalType
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.gateway import DatasourceUser
+
+
+class FakeServiceTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+
+    def post_dataset(self, group_id=None):
+        table = Table('sales', [Column('id', 'Int64'), Column('amount', 'Double')])
+        return self.client.datasets.post_dataset(Dataset('push', tables=[table]), group_id=group_id)
+
+    def test_push_dataset(self):
+        dataset = self.post_dataset()
+
+        self.assertEqual([dataset.id], self.client.datasets.get_datasets().ids())
+        self.assertEqual(['sales'], [x.name for x in self.client.datasets.get_tables(dataset.id)])
+
+        self.client.datasets.post_rows(dataset.id, 'sales', [Row(id=1, amount=2.5), Row(id=2, amount=1.0)])
+        self.assertEqual([{'id': 1, 'amount': 2.5}, {'id': 2, 'amount': 1.0}],
+                         self.service.rows(dataset.id, 'sales'))
+
+        self.client.datasets.delete_rows(dataset.id, 'sales')
+        self.assertEqual([], self.service.rows(dataset.id, 'sales'))
+
+        with self.assertRaises(HTTPError):
+            self.client.datasets.post_rows(dataset.id, 'missing', [Row(id=1)])
+
+        self.client.datasets.delete_dataset(dataset.id)
+        self.assertEqual(0, self.client.datasets.count())
+
+    def test_rows_per_post_limit(self):
+        dataset = self.post_dataset()
+        self.service.max_rows_per_post = 2
+
+        with self.assertRaises(HTTPError):
+            self.client.datasets.post_rows(dataset.id, 'sales', [Row(id=x) for x in range(3)])
+
+    def test_groups(self):
+        group = self.client.groups.create_group('workspace')
+        dataset = self.post_dataset(group.id)
+
+        self.assertTrue(self.client.groups.has_group(group.id))
+        self.assertEqual([dataset.id], self.client.datasets.get_datasets(group.id).ids())
+        self.assertEqual(0, self.client.datasets.count())
+
+        with self.assertRaises(HTTPError):
+            self.client.datasets.get_datasets('cfafbeb1-8037-4d0c-896e-a46fb27ff229')
+
+    def test_refreshes_and_parameters(self):
+        dataset = self.service.add_dataset('model', parameters={'server': 'old'})
+
+        self.client.datasets.refresh_dataset(dataset['id'])
+        self.client.datasets.refresh_dataset(dataset['id'])
+        history = self.client.datasets.get_dataset_refresh_history(dataset['id'], top=1)
+
+        self.assertEqual(1, len(history))
+        self.assertIsInstance(history[0]['startTime'], datetime.datetime)
+
+        self.client.datasets.set_dataset_parameters(dataset['id'], {'server': 'new'})
+        self.assertEqual('new', self.client.datasets.get_dataset_parameters(dataset['id'])['value'][0]['currentValue'])
+
+        with self.assertRaises(HTTPError):
+            self.client.datasets.set_dataset_parameters(dataset['id'], {'missing': 'value'})
+
+    def test_reports(self):
+        source = self.service.add_group('source')
+        target = self.service.add_group('target')
+        source_dataset = self.service.add_dataset('model', group_id=source['id'])
+        target_dataset = self.service.add_dataset('model', group_id=target['id'])
+        report = self.service.add_report('report', source_dataset['id'], source['id'], content=b'pbix')
+
+        clone = self.client.reports.clone_report(report['id'], 'clone', target['id'], target_dataset['id'],
+                                                 group_id=source['id'])
+        self.assertEqual(target_dataset['id'], clone.dataset_id)
+        self.assertEqual([clone.id], self.client.reports.get_reports(target['id']).ids())
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.client.reports.export_report(clone.id, directory, group_id=target['id'])
+            with open(f'{directory}/clone.pbix', 'rb') as report_file:
+                self.assertEqual(b'pbix', report_file.read())
+
+        token = self.client.reports.generate_token(clone.id, TokenRequest('View'), target['id'])
+        self.assertGreater(token.expiration_as_datetime, datetime.datetime.utcnow())
+
+    def test_imports(self):
+        pbix_import = self.client.imports.upload_file(io.BytesIO(b'pbix'), 'sales')
+
+        self.assertEqual('Succeeded', pbix_import.import_state)
+        self.assertEqual(pbix_import.id, self.client.imports.get_import(pbix_import.id).id)
+        self.assertEqual(['sales'], [x.name for x in self.client.datasets.get_datasets()])
+        self.assertEqual(1, self.client.reports.count())
+
+        with self.assertRaises(NotImplementedError):
+            self.client.imports.upload_file(io.BytesIO(b'pbix'), 'sales')
+
+    def test_gateways(self):
+        gateway = self.service.add_gateway('gateway')
+        datasource = self.service.add_gateway_datasource(gateway['id'], 'sql', connection_details={'server': 's'})
+
+        self.assertEqual([gateway['id']], self.client.gateways.get_gateways().ids())
+        self.assertEqual([datasource['id']], self.client.gateways.get_datasources(gateway['id']).ids())
+
+        user = DatasourceUser(DatasourceUserAccessRight.READ, email_address='a@contoso.com',
+                              principal_type=PrincipalType.USER)
+        self.client.gateways.add_datasource_user(gateway['id'], datasource['id'], user)
+        users = self.client.gateways.get_datasource_users(gateway['id'], datasource['id'])
+        self.assertEqual(['a@contoso.com'], [x.identifier for x in users])
+
+        self.client.gateways.delete_datasource(gateway['id'], datasource['id'])
+        self.assertEqual(0, len(self.client.gateways.get_datasources(gateway['id'])))
+
+    def test_activity_event_continuation(self):
+        self.service.activity_events_page_size = 2
+        self.service.add_activity_events([{'Id': str(x), 'CreationTime': '2020-01-01T00:00:00'} for x in range(5)])
+
+        events = self.client.activity_logs.get_activity_logs(datetime.datetime(2020, 1, 1))
+
+        self.assertEqual(['0', '1', '2', '3', '4'], [x['Id'] for x in events])
+        self.assertEqual(3, len(self.service.request_log))
+
+    def test_injected_faults(self):
+        self.service.inject_fault(429, 'GET', '/v1.0/myorg/datasets', times=2, retry_after=0)
+        self.assertEqual(0, self.client.datasets.count())
+        self.assertEqual([429, 429, 200], [x[2] for x in self.service.request_log])
+
+        self.service.inject_fault(500, endpoint='/v1.0/myorg/groups')
+        with self.assertRaises(HTTPError):
+            self.client.groups.get_groups()
+        self.assertEqual(0, len(self.client.groups.get_groups()))
+
+    def test_throttling(self):
+        service = FakePowerBIService(throttle_limit=2, throttle_window=0.05)
+        client = service.client()
+
+        for _ in range(3):
+            client.datasets.get_datasets()
+
+        self.assertEqual([200, 200, 429, 200], [x[2] for x in service.request_log])
+
+    def test_latency_and_failure_rate(self):
+        service = FakePowerBIService(latency=lambda method, endpoint: 0.01, failure_rate=1.0)
+
+        start = time.perf_counter()
+        status_code, headers, body = service.handle('GET', 'https://api.powerbi.com/v1.0/myorg/datasets')
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.01)
+        self.assertEqual(500, status_code)
+
+    def test_wsgi(self):
+        dataset = self.service.add_dataset('model')
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': f'/v1.0/myorg/datasets/{dataset["id"]}'}
+        wsgiref.util.setup_testing_defaults(environ)
+        statuses = []
+
+        body = b''.join(self.service(environ, lambda status, headers: statuses.append(status)))
+
+        self.assertEqual(['200 OK'], statuses)
+        self.assertEqual(dataset, self.service.json_codec.loads(body))
@@ -0,0 +1,63 @@
+# -*- coding: future_fstrings -*-
+from unittest import TestCase
+
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.gateway_audit import GatewayAudit
+
+
+class GatewayAuditTests(TestCase):
+    users_endpoint = '/v1.0/myorg/gateways/{id}/datasources/{id}/users'
+
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.datasources = {}
+        for gateway_name in ('east', 'west'):
+            gateway = self.service.add_gateway(gateway_name)['id']
+            for datasource_name in ('warehouse', 'crm'):
+                user = {'datasourceAccessRight': 'Read', 'identifier': f'{gateway_name}@example.com',
+                        'principalType': 'User'}
+                datasource = self.service.add_gateway_datasource(gateway, f'{gateway_name} {datasource_name}',
+                                                                 users=[user])
+                self.datasources[datasource['id']] = gateway_name
+        self.empty = self.service.add_gateway('empty')['id']
+
+    def test_audit(self):
+        audit = GatewayAudit(self.client.gateways, max_workers=4, requests_per_second=1000)
+
+        rows = {datasource.id: (gateway.name, [user.identifier for user in users])
+                for gateway, datasource, users in audit}
+
+        self.assertEqual({id: (name, [f'{name}@example.com']) for id, name in self.datasources.items()}, rows)
+        self.assertEqual(({}, 0), (audit.errors, audit.retries))
+
+    def test_failed_branches_are_retried(self):
+        self.service.inject_fault(500, 'GET', self.users_endpoint, times=2)
+        audit = GatewayAudit(self.client.gateways, retry_wait=0)
+
+        self.assertEqual(4, len(list(audit)))
+        self.assertEqual(({}, 2), (audit.errors, audit.retries))
+
+        # a branch that keeps failing is given up, the others complete
+        self.service.inject_fault(500, 'GET', self.users_endpoint, times=3)
+        audit = GatewayAudit(self.client.gateways, max_workers=1, retry_wait=0)
+
+        self.assertEqual(3, len(list(audit)))
+        (kind, _, datasource), = audit.errors
+        self.assertEqual('datasource', kind)
+        self.assertIn(datasource, self.datasources)
+
+    def test_gateway_ids(self):
+        audit = GatewayAudit(self.client.gateways, [self.empty, 'missing'], retry_wait=0)
+
+        self.assertEqual([], list(audit))
+        self.assertEqual([('gateway', 'missing')], list(audit.errors))
+        # a gateway that does not exist is not retried
+        self.assertEqual(0, audit.retries)
+
+    def test_client_errors_are_not_retried(self):
+        self.service.inject_fault(403, 'GET', self.users_endpoint, times=1)
+        audit = GatewayAudit(self.client.gateways, max_workers=1, retry_wait=0)
+
+        self.assertEqual(3, len(list(audit)))
+        self.assertEqual((1, 0), (len(audit.errors), audit.retries))
@@ -0,0 +1,122 @@
+# -*- coding: future_fstrings -*-
+
+from unittest import TestCase
+
+import requests
+from requests.adapters import BaseAdapter
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.instrumentation import Hooks, MetricsCollector, endpoint_template
+
+
+class QueuedAdapter(BaseAdapter):
+    """Answers requests with queued (status code, headers, body) tuples"""
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status_code, headers, body = self.responses.pop(0)
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        response._content = body
+        response.request = request
+        response.url = request.url
+
+        return response
+
+    def close(self):
+        pass
+
+
+class InstrumentationTests(TestCase):
+    dataset_id = 'cfafbeb1-8037-4d0c-896e-a46fb27ff229'
+
+    def create_client(self, responses):
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, max_retry_wait=0)
+        adapter = QueuedAdapter(responses)
+        client.session.mount('https://', adapter)
+
+        return client, adapter
+
+    def test_endpoint_template(self):
+        self.assertEqual('/v1.0/myorg/datasets/{id}/tables/{name}/rows',
+                         endpoint_template(f'https://api.powerbi.com/v1.0/myorg//datasets/{self.dataset_id}'
+                                           f'/tables/the table/rows'))
+        self.assertEqual('/v1.0/myorg/admin/activityevents',
+                         endpoint_template("https://api.powerbi.com/v1.0/myorg/admin/activityevents?startDateTime='a'"))
+
+    def test_hooks(self):
+        client, adapter = self.create_client([(200, {}, b'{"value":[]}')])
+        events = []
+
+        client.hooks.register(Hooks.before_request, lambda context: events.append(('before', context.endpoint)))
+        client.hooks.register(Hooks.after_response,
+                              lambda context, response: events.append(('after', context.status_code)))
+
+        datasets = client.datasets.get_datasets()
+
+        self.assertEqual(0, len(datasets))
+        self.assertEqual([('before', '/v1.0/myorg/datasets'), ('after', 200)], events)
+
+        with self.assertRaises(ValueError):
+            client.hooks.register('on_everything', print)
+
+    def test_throttled_requests_are_retried(self):
+        client, adapter = self.create_client([
+            (429, {'Retry-After': '0'}, b''),
+            (429, {}, b''),
+            (200, {}, b''),
+        ])
+        retries = []
+        client.hooks.register(Hooks.on_retry, lambda context, response, wait: retries.append(context.attempt))
+
+        client.datasets.post_rows(self.dataset_id, 'theTable', [])
+
+        self.assertEqual([0, 1], retries)
+        self.assertEqual(3, len(adapter.requests))
+        self.assertEqual(b'{"rows":[]}', adapter.requests[-1].body)
+
+        metrics = client.metrics.as_dict()['POST /v1.0/myorg/datasets/{id}/tables/{name}/rows']
+        self.assertEqual(3, metrics['requests'])
+        self.assertEqual({429: 2, 200: 1}, metrics['status_codes'])
+        self.assertEqual(2, metrics['retries'])
+        self.assertEqual(2, metrics['throttle_waits'])
+        self.assertEqual(33, metrics['bytes_sent'])
+        self.assertEqual(3, metrics['latency_buckets'][float('inf')])
+
+    def test_retries_are_bounded(self):
+        client, adapter = self.create_client([(429, {}, b'{"error":"throttled"}')] * 4)
+
+        with self.assertRaises(requests.HTTPError):
+            client.datasets.get_datasets()
+
+        self.assertEqual(4, len(adapter.requests))
+
+    def test_errors(self):
+        client, adapter = self.create_client([])
+        errors = []
+        client.hooks.register(Hooks.on_error, lambda context, error: errors.append(type(error)))
+
+        with self.assertRaises(IndexError):
+            client.datasets.get_datasets()
+
+        self.assertEqual([IndexError], errors)
+        self.assertEqual(1, client.metrics.as_dict()['GET /v1.0/myorg/datasets']['errors'])
+
+    def test_prometheus(self):
+        collector = MetricsCollector(buckets=[1.0])
+        client, adapter = self.create_client([(200, {}, b'{"value":[]}')])
+        collector.attach(client.hooks)
+
+        client.groups.get_groups()
+        text = collector.to_prometheus()
+
+        self.assertIn('pypowerbi_request_duration_seconds_bucket{method="GET",endpoint="/v1.0/myorg/groups",le="1.0"} 1',
+                      text)
+        self.assertIn('pypowerbi_responses_total{method="GET",endpoint="/v1.0/myorg/groups",status="200"} 1', text)
+        self.assertIn('pypowerbi_received_bytes_total{method="GET",endpoint="/v1.0/myorg/groups"} 12', text)
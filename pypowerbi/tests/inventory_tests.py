@@ -0,0 +1,87 @@
+# -*- coding: future_fstrings -*-
+import os
+import tempfile
+from unittest import TestCase
+
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.inventory import Inventory
+
+
+class InventoryTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.gateway = self.service.add_gateway('prod gateway')
+        self.service.add_gateway_datasource(self.gateway['id'], 'warehouse', connection_details={'server': 'dwh'})
+        self.group = self.service.add_group('sales')
+        datasource = {'datasourceType': 'Sql', 'connectionDetails': {'server': 'dwh'},
+                      'gatewayId': self.gateway['id'], 'datasourceId': 'x'}
+        self.on_gateway = self.service.add_dataset('on gateway', group_id=self.group['id'],
+                                                   datasources=[datasource])['id']
+        self.cloud = self.service.add_dataset('cloud', group_id=self.group['id'])['id']
+        self.report = self.service.add_report('revenue', self.on_gateway, group_id=self.group['id'])['id']
+        self.inventory = Inventory()
+
+    def tearDown(self):
+        self.inventory.close()
+
+    def requests(self):
+        log = list(self.service.request_log)
+        self.service.request_log.clear()
+        return sorted(x[1] for x in log)
+
+    def test_sync_and_query(self):
+        report = self.inventory.sync(self.client, dataset_datasources=True)
+
+        self.assertTrue(report.succeeded)
+        self.assertEqual((2, 1, 2), (report.workspaces_synced, report.gateways_synced, report.datasets_linked))
+        self.assertEqual(['sales'], [x['name'] for x in self.inventory.workspaces(name='sales')])
+        self.assertEqual(['cloud', 'on gateway'],
+                         sorted(x['name'] for x in self.inventory.datasets(workspace_id=self.group['id'])))
+        self.assertEqual([self.report], [x['id'] for x in self.inventory.reports_by_dataset(self.on_gateway)])
+        self.assertEqual([self.on_gateway], [x['id'] for x in self.inventory.datasets_by_gateway(self.gateway['id'])])
+        self.assertEqual([self.report], [x['id'] for x in self.inventory.reports_by_gateway(self.gateway['id'])])
+        datasource, = self.inventory.datasources(gateway_id=self.gateway['id'])
+        self.assertEqual(('warehouse', '{"server":"dwh"}'), (datasource['name'], datasource['connection_details']))
+
+    def test_incremental_sync(self):
+        self.inventory.sync(self.client, dataset_datasources=True)
+        self.service.request_log.clear()
+
+        # nothing is stale, only the lists of workspaces and gateways are fetched
+        report = self.inventory.sync(self.client, dataset_datasources=True, max_age=3600)
+        self.assertEqual((0, 0, 0), (report.workspaces_synced, report.gateways_synced, report.datasets_linked))
+        self.assertEqual(['/v1.0/myorg/gateways', '/v1.0/myorg/groups'], self.requests())
+
+        # a new workspace is fetched, and only its new dataset is linked
+        group = self.service.add_group('finance')
+        self.service.add_dataset('budget', group_id=group['id'])
+        report = self.inventory.sync(self.client, dataset_datasources=True, max_age=3600)
+        self.assertEqual((1, 1), (report.workspaces_synced, report.datasets_linked))
+        self.assertEqual(['budget'], [x['name'] for x in self.inventory.datasets(workspace_id=group['id'])])
+
+    def test_failures(self):
+        self.service.inject_fault(500, 'GET', '/v1.0/myorg/groups/{id}/reports', times=10)
+        report = self.inventory.sync(self.client, gateways=False)
+        self.assertEqual([('workspace', self.group['id'])], list(report.errors))
+        self.assertEqual([], self.inventory.datasets(workspace_id=self.group['id']))
+
+        # the failed workspace was not marked as synced, so it is fetched again
+        self.service.clear_faults()
+        report = self.inventory.sync(self.client, gateways=False, max_age=3600)
+        self.assertEqual((1, True), (report.workspaces_synced, report.succeeded))
+
+        # a failed re-sync keeps what was synced before
+        self.service.inject_fault(500, 'GET', '/v1.0/myorg/groups/{id}/reports', times=10)
+        report = self.inventory.sync(self.client, gateways=False)
+        self.assertFalse(report.succeeded)
+        self.assertEqual([self.report], [x['id'] for x in self.inventory.reports(workspace_id=self.group['id'])])
+
+    def test_persistence(self):
+        path = os.path.join(tempfile.mkdtemp(), 'inventory.db')
+        with Inventory(path) as inventory:
+            inventory.sync(self.client, gateways=False)
+
+        with Inventory(path) as inventory:
+            self.assertEqual(2, len(inventory.datasets(workspace_id=self.group['id'])))
+            self.assertEqual([self.report], [x['id'] for x in inventory.reports(name='revenue')])
@@ -0,0 +1,58 @@
+# -*- coding: future_fstrings -*-
+
+import datetime
+from unittest import TestCase, skipIf
+
+from pypowerbi.client import PowerBIClient
+from pypowerbi.enums import CredentialType
+from pypowerbi import json_codec
+from pypowerbi.json_codec import JsonCodec, OrjsonCodec, UjsonCodec, get_codec
+
+
+class JsonCodecTests(TestCase):
+    def available_codecs(self):
+        codecs = [JsonCodec()]
+
+        if json_codec.orjson is not None:
+            codecs.append(OrjsonCodec())
+
+        if json_codec.ujson is not None:
+            codecs.append(UjsonCodec())
+
+        return codecs
+
+    def test_loads_bytes(self):
+        for codec in self.available_codecs():
+            document = codec.loads('{"value":[{"id":"1","name":"café"}]}'.encode('utf-8'))
+            self.assertEqual({'value': [{'id': '1', 'name': 'café'}]}, document, codec.name)
+
+    def test_dumps_consistently(self):
+        obj = {
+            'rows': [{'id': 1, 'name': 'café', 'when': datetime.datetime(2020, 1, 2, 3, 4, 5)}],
+            'credentialType': CredentialType.BASIC,
+        }
+        expected = '{"rows":[{"id":1,"name":"café","when":"2020-01-02T03:04:05"}],' \
+                   '"credentialType":"Basic"}'.encode('utf-8')
+
+        for codec in self.available_codecs():
+            self.assertEqual(expected, codec.dumps(obj), codec.name)
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            JsonCodec().dumps({'value': object()})
+
+    def test_get_codec(self):
+        self.assertIsInstance(get_codec('json'), JsonCodec)
+
+        with self.assertRaises(ValueError):
+            get_codec('yaml')
+
+    @skipIf(json_codec.orjson is None, 'orjson is not installed')
+    def test_client_prefers_orjson(self):
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'})
+        self.assertIsInstance(client.json_codec, OrjsonCodec)
+
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, json_codec='json')
+        self.assertEqual('json', client.json_codec.name)
+        self.assertEqual('application/json', client.json_headers['Content-Type'])
+        self.assertEqual('Bearer token', client.json_headers['Authorization'])
@@ -12,6 +12,7 @@ from pypowerbi.datasets import *
 from pypowerbi.dataset import *
 from pypowerbi.imports import *
 from pypowerbi.import_class import *
+from pypowerbi.base import attributes_dict
 from pypowerbi.tests.settings import PowerBITestSettings
 
 
@@ -208,7 +209,7 @@ class PowerBIAPITests(TestCase):
         # validate that the single dataset get is what we expect
         dataset = client.datasets.get_dataset(datasets[0].id, group_id)
         self.assert_dataset_valid(dataset)
-        self.assertDictEqual(datasets[0].__dict__, dataset.__dict__)
+        self.assertDictEqual(attributes_dict(datasets[0]), attributes_dict(dataset))
 
     def test_client_post_dataset(self):
         for group_id in self.group_ids:
@@ -387,7 +388,7 @@ class PowerBIAPITests(TestCase):
         self.assert_report_valid(report)
 
         # validate that the first report and the fetched report are the same
-        self.assertDictEqual(reports[0].__dict__, report.__dict__)
+        self.assertDictEqual(attributes_dict(reports[0]), attributes_dict(report))
 
     def test_client_clone_report(self):
         for group_id in self.group_ids:
@@ -0,0 +1,247 @@
+# -*- coding: future_fstrings -*-
+import json
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from pypowerbi.dataset import Column, Dataset, Row, Table
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.push import PushError, PushSession, PushWriter, PushWriterFull
+
+
+class PushSessionTests(TestCase):
+    rows_endpoint = '/v1.0/myorg/datasets/{id}/tables/{name}/rows'
+
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        tables = [Table(name, [Column('id', 'Int64')]) for name in ('a', 'b')]
+        self.dataset = self.client.datasets.post_dataset(Dataset('push', tables=tables))
+
+    def test_batches(self):
+        with PushSession(self.client.datasets, self.dataset.id, batch_size=3) as session:
+            session.add_rows('a', [Row(id=x) for x in range(7)])
+            session.add_rows('b', [{'id': 1}])
+            report = session.flush()
+
+        self.assertTrue(report.succeeded)
+        self.assertEqual(8, report.rows_posted)
+        self.assertEqual(3, report.tables['a'].batches_posted)
+        self.assertEqual(1, report.tables['b'].batches_posted)
+        self.assertEqual(list(range(7)), sorted(x['id'] for x in self.service.rows(self.dataset.id, 'a')))
+
+    def test_reload(self):
+        self.client.datasets.post_rows(self.dataset.id, 'a', [Row(id=100)])
+        self.client.datasets.post_rows(self.dataset.id, 'b', [Row(id=100)])
+
+        with PushSession(self.client.datasets, self.dataset.id, batch_size=2) as session:
+            session.reload('a', [Row(id=x) for x in range(5)])
+            session.reload('b', [Row(id=1)])
+            report = session.commit()
+
+        self.assertTrue(report.tables['a'].truncated)
+        self.assertTrue(report.tables['b'].truncated)
+        self.assertEqual(list(range(5)), sorted(x['id'] for x in self.service.rows(self.dataset.id, 'a')))
+        self.assertEqual([{'id': 1}], self.service.rows(self.dataset.id, 'b'))
+
+    def test_reload_waits_for_posts(self):
+        self.service.latency = lambda method, endpoint: 0.2 if method == 'POST' else 0.0
+
+        with PushSession(self.client.datasets, self.dataset.id, batch_size=2) as session:
+            session.add_rows('a', [Row(id=100), Row(id=101)])
+            session.reload('a', [Row(id=1), Row(id=2)])
+
+        self.assertEqual([1, 2], sorted(x['id'] for x in self.service.rows(self.dataset.id, 'a')))
+
+    def test_failed_truncate_skips_the_table(self):
+        self.client.datasets.post_rows(self.dataset.id, 'a', [Row(id=100)])
+        self.service.inject_fault(500, 'DELETE', self.rows_endpoint)
+
+        session = PushSession(self.client.datasets, self.dataset.id)
+        session.reload('a', [Row(id=1)])
+        session.add_rows('b', [Row(id=1)])
+
+        with self.assertRaises(PushError) as context:
+            with session:
+                pass
+
+        report = context.exception.report
+        self.assertFalse(report.tables['a'].truncated)
+        self.assertEqual(1, report.tables['a'].rows_failed)
+        self.assertEqual(1, report.tables['b'].rows_posted)
+        self.assertEqual([{'id': 100}], self.service.rows(self.dataset.id, 'a'))
+
+        with self.assertRaises(RuntimeError):
+            session.add_rows('a', [Row(id=1)])
+
+    def test_max_age(self):
+        with PushSession(self.client.datasets, self.dataset.id, max_age=0) as session:
+            session.add_rows('a', [Row(id=1)])
+            session.add_rows('a', [Row(id=2)])
+            report = session.flush()
+
+        self.assertEqual(2, report.tables['a'].batches_posted)
+
+    def test_validation(self):
+        with PushSession(self.client.datasets, self.dataset.id, validate=True) as session:
+            session.add_rows('a', [Row(id='1'), Row(id='x')])
+            report = session.flush()
+
+        self.assertEqual(1, report.rows_posted)
+        self.assertEqual([1], [x.index for x in report.tables['a'].rejected])
+        self.assertEqual([{'id': 1}], self.service.rows(self.dataset.id, 'a'))
+
+
+class PushWriterTests(TestCase):
+    rows_endpoint = '/v1.0/myorg/datasets/{id}/tables/{name}/rows'
+
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.dataset = self.client.datasets.post_dataset(Dataset('push', tables=[Table('a', [Column('id', 'Int64')])]))
+        self.directory = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.directory.name, 'spill.jsonl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ids(self):
+        return sorted(x['id'] for x in self.service.rows(self.dataset.id, 'a'))
+
+    def test_batches(self):
+        with PushWriter(self.client.datasets, self.dataset.id, 'a', capacity=10, batch_size=3, max_age=60) as writer:
+            writer.write_rows([Row(id=x) for x in range(7)])
+            writer.write({'id': 7})
+            self.assertTrue(writer.flush(timeout=5))
+
+        self.assertEqual(list(range(8)), self.ids())
+        self.assertEqual(8, writer.stats.rows_posted)
+        self.assertEqual(0, writer.buffered)
+
+    def test_max_age(self):
+        with PushWriter(self.client.datasets, self.dataset.id, 'a', max_age=0.01) as writer:
+            writer.write(Row(id=1))
+            deadline = time.monotonic() + 5
+            while writer.stats.rows_posted == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            self.assertEqual([1], self.ids())
+
+    def test_back_pressure(self):
+        writer = PushWriter(self.client.datasets, self.dataset.id, 'a', capacity=2, batch_size=2, max_age=0,
+                            rows_per_hour=2)
+        writer.write_rows([Row(id=1), Row(id=2)])
+        self.assertTrue(writer.flush(timeout=5))
+
+        # the hourly budget is spent, so the buffer fills up and writes block
+        writer.write_rows([Row(id=3), Row(id=4)])
+        with self.assertRaises(PushWriterFull):
+            writer.write(Row(id=5), timeout=0.05)
+
+        writer.close(timeout=0.05)
+        self.assertEqual([1, 2], self.ids())
+        self.assertEqual(2, writer.stats.rows_dropped)
+
+    def test_spill_on_outage(self):
+        self.service.inject_fault(500, 'POST', self.rows_endpoint, times=1000)
+        writer = PushWriter(self.client.datasets, self.dataset.id, 'a', capacity=2, batch_size=2, max_age=0,
+                            spill_path=self.spill_path, retry_interval=0.01)
+        writer.write_rows([Row(id=x) for x in range(2)])
+        deadline = time.monotonic() + 5
+        while not writer.stats.batches_failed and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # the buffer is full and posting fails, so writes spill instead of blocking
+        writer.write_rows([Row(id=x) for x in range(2, 6)], timeout=5)
+        self.assertGreaterEqual(writer.stats.rows_spilled, 2)
+
+        self.service.clear_faults()
+        self.assertTrue(writer.flush(timeout=5))
+        writer.close()
+
+        self.assertEqual(list(range(6)), self.ids())
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_spill_on_close(self):
+        self.service.inject_fault(500, 'POST', self.rows_endpoint, times=1000)
+        writer = PushWriter(self.client.datasets, self.dataset.id, 'a', max_age=0, spill_path=self.spill_path)
+        writer.write_rows([Row(id=x) for x in range(3)])
+        writer.close()
+
+        self.assertEqual([], self.ids())
+        self.assertEqual(3, writer.stats.rows_spilled)
+
+        # the next writer replays the spilled rows
+        self.service.clear_faults()
+        with PushWriter(self.client.datasets, self.dataset.id, 'a', spill_path=self.spill_path) as writer:
+            writer.write(Row(id=3))
+
+        self.assertEqual(list(range(4)), self.ids())
+        self.assertEqual(3, writer.stats.rows_replayed)
+
+    def test_torn_spill_line(self):
+        # a crash while spilling left the last line incomplete
+        with open(self.spill_path, 'wb') as spill_file:
+            spill_file.write(b'{"id": 1}\n{"id": 2')
+
+        with PushWriter(self.client.datasets, self.dataset.id, 'a', spill_path=self.spill_path) as writer:
+            writer.write(Row(id=3))
+            self.assertTrue(writer.flush(timeout=5))
+
+        self.assertEqual([1, 3], self.ids())
+        self.assertEqual((1, 1), (writer.stats.rows_replayed, writer.stats.rows_rejected))
+        with open(f'{self.spill_path}.rejected', 'rb') as rejected_file:
+            self.assertEqual(b'{"id": 2\n', rejected_file.read())
+        self.assertFalse(os.path.exists(f'{self.spill_path}.replay'))
+
+    def test_thread_failure(self):
+        # the replay file cannot be read, which stops the background thread
+        os.mkdir(f'{self.spill_path}.replay')
+        writer = PushWriter(self.client.datasets, self.dataset.id, 'a', capacity=1, batch_size=1, max_age=0,
+                            spill_path=self.spill_path)
+        writer._thread.join(timeout=5)
+
+        # writers fail instead of blocking, and the error is kept
+        with self.assertRaises(RuntimeError):
+            writer.write_rows([Row(id=1), Row(id=2)])
+        self.assertIsInstance(writer.stats.last_error, OSError)
+
+        writer.close()
+
+    def test_rejected_batch(self):
+        # a refused batch is not retried and does not hold back the next
+        self.service.inject_fault(400, 'POST', self.rows_endpoint, times=1)
+        rejected = []
+        with PushWriter(self.client.datasets, self.dataset.id, 'a', batch_size=3, max_age=60, retry_interval=60,
+                        reject_sink=rejected.extend) as writer:
+            writer.write_rows([Row(id=x) for x in range(6)])
+            self.assertTrue(writer.flush(timeout=5))
+
+        self.assertEqual([3, 4, 5], self.ids())
+        self.assertEqual([0, 1, 2], [row.id for row in rejected])
+        self.assertEqual((3, 1), (writer.stats.rows_rejected, writer.stats.batches_failed))
+
+    def test_rejected_batch_file(self):
+        self.service.inject_fault(400, 'POST', self.rows_endpoint, times=1)
+        with PushWriter(self.client.datasets, self.dataset.id, 'a', max_age=60, retry_interval=60,
+                        spill_path=self.spill_path) as writer:
+            writer.write_rows([Row(id=1), {'id': 2}])
+            self.assertTrue(writer.flush(timeout=5))
+            writer.write(Row(id=3))
+
+        self.assertEqual([3], self.ids())
+        with open(f'{self.spill_path}.rejected', 'rb') as rejected_file:
+            self.assertEqual([{'id': 1}, {'id': 2}], [json.loads(line) for line in rejected_file])
+        self.assertEqual(0, writer.stats.rows_spilled)
+
+    def test_failed_posts_keep_budget(self):
+        # failed attempts give their rows back to the budget, so the retry is not throttled
+        self.service.inject_fault(500, 'POST', self.rows_endpoint, times=2)
+        with PushWriter(self.client.datasets, self.dataset.id, 'a', capacity=2, batch_size=2, max_age=0,
+                        rows_per_hour=2, retry_interval=0.01) as writer:
+            writer.write_rows([Row(id=1), Row(id=2)])
+            self.assertTrue(writer.flush(timeout=5))
+
+        self.assertEqual([1, 2], self.ids())
+        self.assertEqual(2, writer.stats.batches_failed)
@@ -0,0 +1,67 @@
+# -*- coding: future_fstrings -*-
+from unittest import TestCase
+
+from pypowerbi.dataset import Column, Dataset, Measure, Table
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.schema_sync import diff_table, diff_tables, sync_schemas
+
+
+class SchemaSyncTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client(max_retry_wait=0)
+        self.tables = [Table('sales', [Column('id', 'Int64'), Column('name', 'String')])]
+
+    def put_requests(self):
+        return [x for x in self.service.request_log if x[0] == 'PUT']
+
+    def test_diff_table(self):
+        current = Table('sales', [Column('id', 'int64'), Column('price', 'Double'), Column('name', 'String')],
+                        measures=[Measure('total', 'SUM(sales[price])')])
+        desired = Table('sales', [Column('name', 'String', formatstring='@'), Column('id', 'Int64'),
+                                  Column('date', 'DateTime')])
+
+        diff = diff_table(current, desired)
+        self.assertEqual(['date'], diff.added_columns)
+        self.assertEqual(['price'], diff.removed_columns)
+        self.assertEqual(['name'], diff.changed_columns)
+        self.assertEqual(['total'], diff.removed_measures)
+        self.assertTrue(diff.has_changes)
+
+        self.assertFalse(diff_table(current, current).has_changes)
+        self.assertTrue(diff_table(None, desired).is_new)
+        self.assertEqual(['sales'], [x.table_name for x in diff_tables([current, Table('other', [])], [desired])])
+
+    def test_put_table(self):
+        dataset = self.client.datasets.post_dataset(Dataset('push', tables=self.tables))
+        table = Table('sales', [Column('id', 'Int64'), Column('price', 'Double')])
+
+        self.client.datasets.put_table(dataset.id, 'sales', table)
+
+        tables = self.client.datasets.get_tables(dataset.id)
+        self.assertEqual(['id', 'price'], [x.name for x in tables[0].columns])
+        # rows are validated against the new schema
+        self.assertEqual([{'price': 1.5}], self.client.datasets.validate_rows(dataset.id, 'sales', [{'price': '1.5'}]))
+
+    def test_sync_schemas(self):
+        group = self.service.add_group('workspace')
+        up_to_date = self.service.add_dataset('up to date', [x.to_dict() for x in self.tables], group['id'])
+        outdated = self.service.add_dataset('outdated', [{'name': 'sales', 'columns': [
+            {'name': 'id', 'dataType': 'Int64'}]}], group['id'])
+        missing = self.service.add_dataset('missing', [], group['id'])
+        dataset_ids = [up_to_date['id'], outdated['id'], missing['id'], 'unknown']
+
+        dry_run = sync_schemas(self.client.datasets, dataset_ids, self.tables, group['id'], dry_run=True)
+        self.assertEqual([False, True, True], [x.changed for x in dry_run[:3]])
+        self.assertEqual([], self.put_requests())
+
+        results = sync_schemas(self.client.datasets, dataset_ids, self.tables, group['id'])
+        self.assertEqual([[], ['sales'], ['sales'], []], [x.updated_tables for x in results])
+        self.assertTrue(results[2].diffs[0].is_new)
+        self.assertEqual([None], list(results[3].errors))
+        self.assertEqual(2, len(self.put_requests()))
+
+        # a second sync has nothing left to do
+        again = sync_schemas(self.client.datasets, dataset_ids[:3], self.tables, group['id'])
+        self.assertFalse(any(x.changed for x in again))
+        self.assertEqual(2, len(self.put_requests()))
@@ -0,0 +1,86 @@
+# -*- coding: future_fstrings -*-
+import datetime
+import io
+import os
+import tempfile
+from unittest import TestCase, skipIf
+
+from pypowerbi.dataset import Row
+from pypowerbi.schema import SchemaInference, infer_dataset, infer_table, infer_table_from_csv, \
+    infer_table_from_dataframe, pandas
+
+
+def data_types(table):
+    return {column.name: column.data_type for column in table.columns}
+
+
+class SchemaTests(TestCase):
+    def test_infer_table(self):
+        rows = [
+            {'id': 1, 'cost': 1, 'name': 'a', 'flag': True, 'when': datetime.datetime(2020, 1, 1), 'empty': None},
+            {'id': 2, 'cost': 2.5, 'name': None, 'flag': False, 'when': datetime.date(2020, 1, 2)},
+            Row(id=3, cost=None, name='c', flag=None, mixed=1),
+            {'mixed': 'one'},
+        ]
+
+        table = infer_table('sales', rows, chunk_size=2)
+
+        self.assertEqual('sales', table.name)
+        self.assertEqual({'id': 'Int64', 'cost': 'Double', 'name': 'String', 'flag': 'Boolean', 'when': 'DateTime',
+                          'empty': 'String', 'mixed': 'String'}, data_types(table))
+
+    def test_booleans_are_not_integers(self):
+        self.assertEqual({'value': 'String'}, data_types(infer_table('t', [{'value': True}, {'value': 1}])))
+        self.assertEqual({'value': 'Double'}, data_types(infer_table('t', [{'value': 2 ** 64}])))
+
+    def test_sample_size(self):
+        rows = ({'value': 1 if x < 10 else 'text'} for x in range(20))
+
+        self.assertEqual({'value': 'Int64'}, data_types(infer_table('t', rows, sample_size=10)))
+
+    def test_parse_strings(self):
+        inference = SchemaInference(parse_strings=True)
+        inference.update([{'a': '1', 'b': '1.5', 'c': 'TRUE', 'd': '2020-01-01T10:00:00Z', 'e': 'x'}])
+        inference.update([{'a': '-2', 'b': '3', 'c': 'false', 'd': '2020-01-02', 'e': '1'}])
+
+        self.assertEqual(2, inference.row_count)
+        self.assertEqual({'a': 'Int64', 'b': 'Double', 'c': 'Boolean', 'd': 'DateTime', 'e': 'String'},
+                         {name: data_type.value for name, data_type in inference.data_types.items()})
+
+    def test_infer_table_from_csv(self):
+        csv_file = io.StringIO('id;cost;name;when;empty\n1;1.5;a;2020-01-01 10:00;\n2;;b;2020-01-02\n')
+
+        table = infer_table_from_csv('sales', csv_file, chunk_size=1, delimiter=';')
+
+        self.assertEqual({'id': 'Int64', 'cost': 'Double', 'name': 'String', 'when': 'DateTime', 'empty': 'String'},
+                         data_types(table))
+
+    def test_infer_dataset(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sales.csv')
+            with open(path, 'w') as csv_file:
+                csv_file.write('id,name\n1,a\n')
+
+            dataset = infer_dataset('dataset', {'sales': path, 'events': [{'at': datetime.datetime.now()}]})
+
+        self.assertEqual('dataset', dataset.name)
+        self.assertEqual(['sales', 'events'], [table.name for table in dataset.tables])
+        self.assertEqual({'id': 'Int64', 'name': 'String'}, data_types(dataset.tables[0]))
+        self.assertEqual({'at': 'DateTime'}, data_types(dataset.tables[1]))
+
+    @skipIf(pandas is None, 'pandas is not installed')
+    def test_infer_table_from_dataframe(self):
+        data_frame = pandas.DataFrame({
+            'id': [1, 2],
+            'cost': [1.5, None],
+            'flag': [True, False],
+            'when': pandas.to_datetime(['2020-01-01', '2020-01-02']),
+            'name': ['a', None],
+            'objects': pandas.Series([1, 2], dtype=object),
+            'category': pandas.Series(['a', 'b'], dtype='category'),
+        })
+
+        table = infer_table_from_dataframe('sales', data_frame)
+
+        self.assertEqual({'id': 'Int64', 'cost': 'Double', 'flag': 'Boolean', 'when': 'DateTime', 'name': 'String',
+                          'objects': 'Int64', 'category': 'String'}, data_types(table))
@@ -0,0 +1,80 @@
+# -*- coding: future_fstrings -*-
+import os
+import tempfile
+from unittest import TestCase
+
+from pypowerbi.enums import DatasourceUserAccessRight, PrincipalType
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.gateway import DatasourceUser
+from pypowerbi.inventory import Inventory
+from pypowerbi.snapshot import Change, Snapshot, diff_snapshots
+
+
+class DiffSnapshotsTests(TestCase):
+    def test_diff_snapshots(self):
+        old = Snapshot()
+        old.add('datasets', 'a', {'name': 'sales', 'is_refreshable': True})
+        old.add('datasets', 'b', {'name': 'costs', 'is_refreshable': True})
+        old.add('datasets', 'c', {'name': 'budget', 'is_refreshable': True})
+        new = Snapshot()
+        new.add('datasets', 'd', {'name': 'forecast', 'is_refreshable': True})
+        new.add('datasets', 'c', {'name': 'budget', 'is_refreshable': False})
+        new.add('datasets', 'a', {'name': 'sales', 'is_refreshable': True})
+
+        changes = list(diff_snapshots(old, new))
+
+        self.assertEqual([('removed', 'b'), ('changed', 'c'), ('added', 'd')], [(x.action, x.key) for x in changes])
+        self.assertEqual({'is_refreshable': (True, False)}, changes[1].fields)
+        self.assertEqual({'kind': 'datasets', 'key': 'c', 'action': 'changed', 'fields': 'is_refreshable'},
+                         changes[1].to_row())
+        self.assertEqual([], list(diff_snapshots(new, new)))
+
+    def test_models_and_persistence(self):
+        service = FakePowerBIService(seed=1)
+        client = service.client(max_retry_wait=0)
+        gateway = service.add_gateway('prod gateway')['id']
+        user = {'datasourceAccessRight': 'Read', 'emailAddress': 'ann@example.com', 'identifier': 'ann@example.com',
+                'principalType': 'User'}
+        datasource = service.add_gateway_datasource(gateway, 'warehouse', users=[user])['id']
+
+        def snapshot():
+            result = Snapshot()
+            result.add_models('datasource_users', client.gateways.get_datasource_users(gateway, datasource),
+                              key=lambda model: (gateway, datasource, model.identifier))
+            return result
+
+        path = os.path.join(tempfile.mkdtemp(), 'snapshot.jsonl')
+        snapshot().save(path)
+        client.gateways.add_datasource_user(gateway, datasource, DatasourceUser(
+            DatasourceUserAccessRight.READ_OVERRIDE_EFFECTIVE_IDENTITY, 'bob@example.com',
+            identifier='bob@example.com', principal_type=PrincipalType.USER))
+
+        changes = list(diff_snapshots(Snapshot.load(path), snapshot()))
+
+        self.assertEqual([(Change.added, (gateway, datasource, 'bob@example.com'))],
+                         [(x.action, x.key) for x in changes])
+        self.assertEqual('ReadOverrideEffectiveIdentity', changes[0].new['datasource_access_right'])
+
+
+class InventorySnapshotTests(TestCase):
+    def test_inventory_snapshot(self):
+        service = FakePowerBIService(seed=1)
+        client = service.client(max_retry_wait=0)
+        group = service.add_group('sales')['id']
+        sales = service.add_dataset('sales', group_id=group)['id']
+        costs = service.add_dataset('costs', group_id=group)['id']
+        report = service.add_report('revenue', sales, group_id=group)['id']
+
+        with Inventory() as inventory:
+            inventory.sync(client, gateways=False)
+            yesterday = inventory.snapshot()
+
+            client.reports.rebind_report(report, costs, group)
+            budget = service.add_dataset('budget', group_id=group)['id']
+            inventory.sync(client, gateways=False)
+            changes = list(diff_snapshots(yesterday, inventory.snapshot()))
+
+        self.assertEqual([('datasets', (group, budget), 'added'), ('reports', (group, report), 'changed')],
+                         sorted((x.kind, x.key, x.action) for x in changes))
+        rebound, = [x for x in changes if x.kind == 'reports']
+        self.assertEqual({'dataset_id': (sales, costs)}, rebound.fields)
@@ -0,0 +1,68 @@
+# -*- coding: future_fstrings -*-
+
+from unittest import TestCase, mock, skipIf
+
+from pypowerbi import tracing
+from pypowerbi.client import PowerBIClient
+from pypowerbi.instrumentation import RequestContext
+from pypowerbi.tests.instrumentation_tests import QueuedAdapter
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+except ImportError:
+    TracerProvider = None
+
+
+class NoOpTracingTests(TestCase):
+    def test_without_opentelemetry(self):
+        with mock.patch.object(tracing, 'trace', None):
+            class Operations:
+                def get_things(self):
+                    return 'things'
+
+            self.assertIs(Operations.__dict__['get_things'], tracing.traced_operations(Operations).__dict__['get_things'])
+
+            with tracing.attempt_span(RequestContext('GET', 'https://api.powerbi.com/v1.0/myorg/groups')) as span:
+                self.assertIsNone(span)
+
+            tracing.record_retry(span, 1.0)
+
+
+@skipIf(TracerProvider is None, 'opentelemetry-sdk is not installed')
+class TracingTests(TestCase):
+    dataset_id = 'cfafbeb1-8037-4d0c-896e-a46fb27ff229'
+    group_id = 'f089354e-8366-4e18-aea3-4cb4a3a50b48'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(cls.exporter))
+        trace.set_tracer_provider(provider)
+
+    def setUp(self):
+        self.exporter.clear()
+
+    def test_operation_and_attempt_spans(self):
+        client = PowerBIClient('https://api.powerbi.com', {'accessToken': 'token'}, max_retry_wait=0)
+        client.session.mount('https://', QueuedAdapter([(429, {'Retry-After': '0'}, b''), (200, {}, b'')]))
+
+        client.datasets.post_rows(self.dataset_id, 'theTable', [], group_id=self.group_id)
+
+        spans = self.exporter.get_finished_spans()
+        operation = [x for x in spans if x.name == 'Datasets.post_rows'][0]
+        attempts = [x for x in spans if x.parent is not None and x.parent.span_id == operation.context.span_id]
+
+        self.assertEqual(self.dataset_id, operation.attributes['pypowerbi.dataset_id'])
+        self.assertEqual(self.group_id, operation.attributes['pypowerbi.group_id'])
+        self.assertEqual('theTable', operation.attributes['pypowerbi.table_name'])
+        self.assertEqual(0, operation.attributes['pypowerbi.row_count'])
+
+        self.assertEqual(2, len(attempts))
+        self.assertEqual([0, 1], [x.attributes['pypowerbi.attempt'] for x in attempts])
+        self.assertEqual([429, 200], [x.attributes['http.response.status_code'] for x in attempts])
+        self.assertEqual(11, attempts[1].attributes['http.request.body.size'])
+        self.assertEqual(['retry'], [x.name for x in attempts[0].events])
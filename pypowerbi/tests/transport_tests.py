@@ -0,0 +1,58 @@
+# -*- coding: future_fstrings -*-
+import io
+from unittest import TestCase, skipIf
+
+from requests.exceptions import ConnectionError, ConnectTimeout, HTTPError, ReadTimeout
+
+from pypowerbi.dataset import Column, Dataset, Row, Table
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.transport import HttpxSession, httpx
+
+
+@skipIf(httpx is None, 'httpx is not installed')
+class HttpxSessionTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.session = HttpxSession(http2=False, transport=httpx.WSGITransport(app=self.service))
+        self.client = self.service.client(session=self.session, max_retry_wait=0)
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_requests(self):
+        dataset = self.client.datasets.post_dataset(Dataset('push', tables=[Table('a', [Column('id', 'Int64')])]))
+        self.client.datasets.post_rows(dataset.id, 'a', [Row(id=1)])
+
+        self.assertEqual(['push'], [x.name for x in self.client.datasets.get_datasets()])
+        self.assertEqual([{'id': 1}], self.service.rows(dataset.id, 'a'))
+        # bodies are counted from the converted responses
+        self.assertGreater(self.client.metrics.as_dict()['POST /v1.0/myorg/datasets']['bytes_sent'], 0)
+
+        with self.assertRaises(HTTPError) as context:
+            self.client.datasets.get_dataset('unknown')
+        self.assertEqual(404, context.exception.args[0].status_code)
+
+    def test_retries(self):
+        self.service.inject_fault(429, 'GET', '/v1.0/myorg/groups', retry_after=0)
+
+        self.assertEqual([], list(self.client.groups.get_groups()))
+        self.assertEqual([429, 200], [x[2] for x in self.service.request_log])
+
+    def test_file_upload(self):
+        self.client.imports.upload_file(io.BytesIO(b'pbix'), 'report')
+
+        self.assertEqual([('POST', '/v1.0/myorg/imports', 202)], self.service.request_log)
+
+    def test_exceptions(self):
+        def fail(request):
+            raise errors.pop(0)
+
+        errors = [httpx.ConnectError('refused'), httpx.ReadTimeout('slow'), httpx.ConnectTimeout('unreachable')]
+        with HttpxSession(http2=False, transport=httpx.MockTransport(fail)) as session:
+            client = self.service.client(session=session, max_retry_wait=0)
+
+            # transport failures raise the exceptions requests would
+            for expected in (ConnectionError, ReadTimeout, ConnectTimeout):
+                with self.assertRaises(expected) as context:
+                    client.groups.get_groups()
+                self.assertIsInstance(context.exception.__cause__, httpx.HTTPError)
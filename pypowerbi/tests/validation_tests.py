@@ -0,0 +1,102 @@
+# -*- coding: future_fstrings -*-
+import datetime
+import decimal
+from unittest import TestCase
+
+from pypowerbi.dataset import Column, Dataset, Row, Table
+from pypowerbi.fake_service import FakePowerBIService
+from pypowerbi.validation import RowValidationError, RowValidator
+
+
+class RowValidatorTests(TestCase):
+    table = Table('sales', [Column('id', 'Int64'), Column('cost', 'double'), Column('flag', 'Boolean'),
+                            Column('when', 'DateTime'), Column('name', 'string')])
+
+    def test_valid_rows(self):
+        validator = RowValidator(self.table)
+
+        valid, rejected = validator.validate([
+            {'id': 1, 'cost': 1.5, 'flag': True, 'when': '2020-01-01T00:00:00Z', 'name': 'a'},
+            Row(id=2, cost=None, name='b'),
+        ])
+
+        self.assertEqual([], rejected)
+        self.assertEqual([{'id': 1, 'cost': 1.5, 'flag': True, 'when': '2020-01-01T00:00:00Z', 'name': 'a'},
+                          {'id': 2, 'name': 'b'}], valid)
+
+    def test_coercion(self):
+        validator = RowValidator(self.table)
+
+        valid, rejected = validator.validate([
+            {'id': '3', 'cost': 2, 'flag': 'false', 'when': datetime.datetime(2020, 1, 1, 10), 'name': 5},
+            {'id': 4.0, 'cost': decimal.Decimal('1.25'), 'flag': 1, 'when': datetime.date(2020, 1, 2), 'name': True},
+        ])
+
+        self.assertEqual([], rejected)
+        self.assertEqual([{'id': 3, 'cost': 2.0, 'flag': False, 'when': '2020-01-01T10:00:00', 'name': '5'},
+                          {'id': 4, 'cost': 1.25, 'flag': True, 'when': '2020-01-02', 'name': 'true'}], valid)
+
+    def test_rejected_rows(self):
+        validator = RowValidator(self.table)
+        rows = [
+            {'id': 1.5},
+            {'id': True},
+            {'id': 2 ** 63},
+            {'cost': float('nan')},
+            {'flag': 'yes'},
+            {'when': 'yesterday'},
+            {'name': ['a']},
+            {'unknown': 1},
+            'not a row',
+            {'id': 1},
+        ]
+
+        valid, rejected = validator.validate(rows)
+
+        self.assertEqual([{'id': 1}], valid)
+        self.assertEqual(list(range(9)), [x.index for x in rejected])
+        self.assertEqual(['id', 'id', 'id', 'cost', 'flag', 'when', 'name', 'unknown', None],
+                         [x.column for x in rejected])
+        self.assertIs(rows[0], rejected[0].row)
+
+    def test_table_without_columns(self):
+        with self.assertRaises(RuntimeError):
+            RowValidator(Table('sales', None))
+
+
+class DatasetsValidationTests(TestCase):
+    def setUp(self):
+        self.service = FakePowerBIService(seed=1)
+        self.client = self.service.client()
+
+    def test_posted_dataset_schemas_are_cached(self):
+        table = Table('sales', [Column('id', 'Int64'), Column('name', 'string')])
+        dataset = self.client.datasets.post_dataset(Dataset('push', tables=[table]))
+        rejected = []
+
+        self.client.datasets.post_rows(dataset.id, 'sales', [Row(id='1'), Row(id='x'), Row(name=2)],
+                                       validate=True, reject_sink=rejected.extend)
+
+        self.assertEqual([{'id': 1}, {'name': '2'}], self.service.rows(dataset.id, 'sales'))
+        self.assertEqual([1], [x.index for x in rejected])
+        self.assertNotIn(('GET', '/v1.0/myorg/datasets/{id}/tables'), [x[:2] for x in self.service.request_log])
+
+    def test_tables_are_fetched_once(self):
+        dataset = self.service.add_dataset('push', tables=[{'name': 'sales',
+                                                            'columns': [{'name': 'id', 'dataType': 'Int64'}]}])
+
+        for _ in range(2):
+            self.client.datasets.post_rows(dataset['id'], 'sales', [Row(id=1)], validate=True)
+
+        with self.assertRaises(RowValidationError):
+            self.client.datasets.post_rows(dataset['id'], 'sales', [Row(id=1), Row(id='x')], validate=True)
+
+        self.assertEqual(2, len(self.service.rows(dataset['id'], 'sales')))
+        self.assertEqual(1, [x[:2] for x in self.service.request_log].count(('GET', '/v1.0/myorg/datasets/{id}/tables')))
+
+        self.client.datasets.invalidate_table_schemas(dataset['id'])
+        self.client.datasets.validate_rows(dataset['id'], 'sales', [Row(id=1)])
+        self.assertEqual(2, [x[:2] for x in self.service.request_log].count(('GET', '/v1.0/myorg/datasets/{id}/tables')))
+
+        with self.assertRaises(RuntimeError):
+            self.client.datasets.validate_rows(dataset['id'], 'missing', [Row(id=1)])
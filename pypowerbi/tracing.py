@@ -0,0 +1,116 @@
+# -*- coding: future_fstrings -*-
+import contextlib
+import functools
+import inspect
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+
+"""
+This file contains the optional OpenTelemetry integration. Public methods of the operations classes each get a span,
+with a child span per http attempt. Without opentelemetry installed everything here is a no-op.
+"""
+
+tracer_name = 'pypowerbi'
+
+# operation arguments recorded as span attributes
+_traced_arguments = ('group_id', 'target_group_id', 'dataset_id', 'report_id', 'gateway_id', 'datasource_id',
+                     'import_id', 'table_name')
+
+
+def _tracer():
+    return trace.get_tracer(tracer_name)
+
+
+def _operation_attributes(signature, args, kwargs):
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        # let the call itself raise
+        return {}
+
+    attributes = {}
+    for name in _traced_arguments:
+        value = bound.arguments.get(name)
+        if value is not None:
+            attributes[f'pypowerbi.{name}'] = str(value)
+
+    rows = bound.arguments.get('rows')
+    if rows is not None and hasattr(rows, '__len__'):
+        attributes['pypowerbi.row_count'] = len(rows)
+
+    return attributes
+
+
+def _traced(class_name, method):
+    span_name = f'{class_name}.{method.__name__}'
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        attributes = _operation_attributes(signature, args, kwargs)
+        attributes['pypowerbi.operation'] = span_name
+
+        with _tracer().start_as_current_span(span_name, attributes=attributes):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def traced_operations(cls):
+    """Class decorator giving each public method of an operations class a span named '<Class>.<method>'
+
+    Spans carry the workspace, dataset, report, gateway and datasource ids passed to the method. Returns the class
+    unchanged when opentelemetry is not installed.
+    """
+    if trace is None:
+        return cls
+
+    for name, member in list(vars(cls).items()):
+        # class and static methods only parse responses, they are not operations
+        if name.startswith('_') or not inspect.isfunction(member):
+            continue
+
+        setattr(cls, name, _traced(cls.__name__, member))
+
+    return cls
+
+
+@contextlib.contextmanager
+def attempt_span(context):
+    """Wraps a single http attempt in a client span, a child of the current operation span
+
+    :param context: The RequestContext of the attempt; its status and byte counts are recorded once the block exits
+    :return: The span, or None when opentelemetry is not installed
+    """
+    if trace is None:
+        yield None
+        return
+
+    attributes = {
+        'http.request.method': context.method,
+        'url.full': context.url,
+        'pypowerbi.endpoint': context.endpoint,
+        'pypowerbi.attempt': context.attempt,
+    }
+
+    with _tracer().start_as_current_span(f'{context.method} {context.endpoint}', kind=trace.SpanKind.CLIENT,
+                                         attributes=attributes) as span:
+        try:
+            yield span
+        finally:
+            span.set_attribute('http.request.body.size', context.bytes_sent)
+            span.set_attribute('http.response.body.size', context.bytes_received)
+            if context.status_code is not None:
+                span.set_attribute('http.response.status_code', context.status_code)
+                if context.status_code >= 400:
+                    span.set_status(trace.Status(trace.StatusCode.ERROR))
+
+
+def record_retry(span, wait):
+    """Records on an attempt span that the attempt is retried after waiting `wait` seconds"""
+    if span is not None:
+        span.add_event('retry', {'pypowerbi.retry_wait': wait})
@@ -0,0 +1,145 @@
+# -*- coding: future_fstrings -*-
+from typing import Any, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+"""
+This file contains the optional httpx transport. It sends the client's requests through an httpx.Client, which can
+multiplex concurrent requests to one host over a few HTTP/2 connections instead of a socket per in-flight request.
+"""
+
+
+class HttpxSession:
+    """Stands in for the requests.Session of a PowerBIClient, sending requests through an httpx.Client
+
+    Only the part of requests.Session the client uses is provided: request, close and use as a context manager.
+    Responses are converted to requests.Response objects and httpx exceptions to the matching requests exceptions, so
+    operations and their error handling are unchanged.
+    Response bodies are read in full, as they are everywhere in the library.
+
+        client = PowerBIClient(api_url, token, session=HttpxSession(http2=True))
+    """
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: Optional[int] = 10,
+        timeout: Optional[float] = None,
+        transport=None,
+        client=None
+    ):
+        """Constructs an HttpxSession
+
+        :param http2: Whether to negotiate HTTP/2, which needs the h2 package (pip install httpx[http2])
+        :param max_connections: The most connections kept open at once; None is unbounded. With HTTP/2 each
+         connection carries many concurrent requests.
+        :param timeout: The request timeout in seconds; None waits indefinitely, as requests does by default
+        :param transport: An httpx transport to send requests through, e.g. httpx.WSGITransport for tests
+        :param client: An httpx.Client to use as is; the other arguments are then ignored
+        """
+        if httpx is None:
+            raise ImportError('The httpx transport requires the httpx package, with its http2 extra for HTTP/2')
+
+        if client is None:
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            client = httpx.Client(http2=http2, limits=limits, timeout=timeout, transport=transport)
+
+        self.client = client
+        self.http2 = http2
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params=None,
+        data=None,
+        headers=None,
+        files=None,
+        json: Any = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> requests.Response:
+        """Sends a request, taking the requests.Session.request arguments the library uses
+
+        :return: The response, as a requests.Response
+        """
+        # requests takes raw bodies and form fields alike as data, httpx as content and data
+        content = data if isinstance(data, (bytes, str)) else None
+        form = None if content is not None else data
+
+        request_kwargs = {}
+        if timeout is not None:
+            request_kwargs['timeout'] = timeout
+
+        try:
+            response = self.client.request(method, url, params=params, content=content, data=form, files=files,
+                                           json=json, headers=headers, **request_kwargs)
+        except httpx.HTTPError as error:
+            raise _to_requests_exception(error) from error
+
+        return _to_requests_response(response)
+
+    def close(self) -> None:
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return f'<HttpxSession http2={self.http2}>'
+
+
+def _to_requests_exception(error) -> requests.RequestException:
+    """Converts an httpx exception into the requests exception raised for the same failure"""
+    exceptions = requests.exceptions
+    # the most specific first: httpx's timeouts are not connection errors, but requests' connect timeout is both
+    mapping = (
+        (httpx.ConnectTimeout, exceptions.ConnectTimeout),
+        (httpx.ReadTimeout, exceptions.ReadTimeout),
+        (httpx.TimeoutException, exceptions.Timeout),
+        (httpx.ProxyError, exceptions.ProxyError),
+        (httpx.UnsupportedProtocol, exceptions.InvalidSchema),
+        (httpx.NetworkError, exceptions.ConnectionError),
+        (httpx.RemoteProtocolError, exceptions.ConnectionError),
+        (httpx.TooManyRedirects, exceptions.TooManyRedirects),
+        (httpx.DecodingError, exceptions.ContentDecodingError),
+    )
+    for httpx_class, requests_class in mapping:
+        if isinstance(error, httpx_class):
+            return requests_class(str(error))
+
+    return exceptions.RequestException(str(error))
+
+
+def _to_requests_response(response) -> requests.Response:
+    """Converts an httpx.Response into a requests.Response"""
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.reason = response.reason_phrase
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted.url = str(response.url)
+    converted.encoding = response.encoding
+    converted.elapsed = response.elapsed
+    converted._content = response.content
+
+    request = requests.PreparedRequest()
+    request.method = response.request.method
+    request.url = str(response.request.url)
+    request.headers = CaseInsensitiveDict(response.request.headers)
+    try:
+        request.body = response.request.content
+    except httpx.RequestNotRead:
+        # streamed bodies, e.g. multipart file uploads
+        request.body = None
+    converted.request = request
+
+    return converted
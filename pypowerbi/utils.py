@@ -1,6 +1,8 @@
 # -*- coding: future_fstrings -*-
 import datetime
 
+from requests.exceptions import ConnectionError, HTTPError, Timeout
+
 
 """
 This file contains helper and utility functions used elsewhere in the library.
@@ -48,3 +50,24 @@ def convert_datetime_fields(list_of_dicts, fields_to_convert):
                 new_rec[field] = date_from_powerbi_str(new_rec[field])
 
     return new_list
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Whether a failed request may succeed when retried: connection errors, timeouts, throttling and server errors.
+    Other errors, such as a bad request or a missing item, fail the same way every time.
+
+    :param error: The exception the request raised
+    :return: True if the request is worth retrying
+    """
+    if isinstance(error, (ConnectionError, Timeout)):
+        return True
+
+    if isinstance(error, HTTPError):
+        # the operations raise HTTPError(response, message), without setting error.response
+        response = error.response
+        if response is None and error.args and hasattr(error.args[0], 'status_code'):
+            response = error.args[0]
+        return response is not None and (response.status_code == 429 or response.status_code >= 500)
+
+    return False
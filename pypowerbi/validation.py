@@ -0,0 +1,242 @@
+# -*- coding: future_fstrings -*-
+import datetime
+import decimal
+import math
+import numbers
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .base import compile_function
+from .dataset import Row, Table
+from .enums import ColumnDataType
+from .formats import datetime_regex, float_regex, int64_max, int64_min, int_regex
+
+
+"""
+This file contains the client side row validation for push datasets. A validator is compiled once per table schema
+into a single function checking and coercing every column of a row, so bad rows are caught before a batch is uploaded.
+"""
+
+_data_types_by_name = {data_type.value.lower(): data_type for data_type in ColumnDataType}
+_data_types_by_name['bool'] = ColumnDataType.BOOLEAN
+
+_booleans = {'true': True, 'false': False}
+
+
+class RejectedRow:
+    """A row that failed validation"""
+    __slots__ = ('index', 'row', 'column', 'reason')
+
+    def __init__(self, index: int, row: Any, column: Optional[str], reason: str):
+        """Constructs a RejectedRow
+
+        :param index: The position of the row in the validated batch
+        :param row: The row as given, a dict or Row
+        :param column: The column holding the bad value, or None
+        :param reason: Why the row was rejected
+        """
+        self.index = index
+        self.row = row
+        self.column = column
+        self.reason = reason
+
+    def __repr__(self):
+        return f'<RejectedRow index={self.index} column={self.column} reason={self.reason}>'
+
+
+class RowValidationError(ValueError):
+    """Raised when rows fail validation and there is no reject sink to route them to"""
+    def __init__(self, rejected: List[RejectedRow]):
+        super().__init__(f'{len(rejected)} rows failed validation, the first: row {rejected[0].index} column '
+                         f'{rejected[0].column}: {rejected[0].reason}')
+        self.rejected = rejected
+
+
+class _RowRejected(Exception):
+    def __init__(self, column, reason):
+        super().__init__(reason)
+        self.column = column
+        self.reason = reason
+
+
+def _coerce_int64(column: str, value: Any) -> int:
+    if isinstance(value, bool):
+        raise _RowRejected(column, f'{value!r} is a boolean, not an Int64')
+
+    if isinstance(value, str) and int_regex.fullmatch(value.strip()):
+        value = int(value)
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, decimal.Decimal) and value.is_finite() and value == value.to_integral_value():
+        value = int(value)
+    elif isinstance(value, numbers.Integral):
+        value = int(value)
+    else:
+        raise _RowRejected(column, f'{value!r} is not an Int64')
+
+    if not int64_min <= value <= int64_max:
+        raise _RowRejected(column, f'{value!r} is out of the Int64 range')
+
+    return value
+
+
+def _coerce_double(column: str, value: Any) -> float:
+    if isinstance(value, bool):
+        raise _RowRejected(column, f'{value!r} is a boolean, not a number')
+
+    if isinstance(value, str) and float_regex.fullmatch(value.strip()):
+        value = float(value)
+    elif isinstance(value, numbers.Real) or isinstance(value, decimal.Decimal):
+        value = float(value)
+    else:
+        raise _RowRejected(column, f'{value!r} is not a number')
+
+    if not math.isfinite(value):
+        raise _RowRejected(column, f'{value!r} is not a finite number')
+
+    return value
+
+
+def _coerce_boolean(column: str, value: Any) -> bool:
+    if isinstance(value, str) and value.strip().lower() in _booleans:
+        return _booleans[value.strip().lower()]
+
+    if isinstance(value, numbers.Integral) and value in (0, 1):
+        return bool(value)
+
+    raise _RowRejected(column, f'{value!r} is not a boolean')
+
+
+def _coerce_datetime(column: str, value: Any) -> str:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+
+    raise _RowRejected(column, f'{value!r} is not an ISO 8601 datetime')
+
+
+def _coerce_string(column: str, value: Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+
+    if isinstance(value, (numbers.Number, decimal.Decimal)):
+        return str(value)
+
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+
+    raise _RowRejected(column, f'{value!r} is not a string')
+
+
+# per data type: an expression true when a value {v} can be sent as is, and the coercer called otherwise
+_checks = {
+    ColumnDataType.INT64: (f'type({{v}}) is int and {int64_min} <= {{v}} <= {int64_max}', _coerce_int64),
+    ColumnDataType.DOUBLE: ('type({v}) is float and _isfinite({v})', _coerce_double),
+    ColumnDataType.DECIMAL: ('type({v}) is float and _isfinite({v})', _coerce_double),
+    ColumnDataType.BOOLEAN: ('type({v}) is bool', _coerce_boolean),
+    ColumnDataType.DATETIME: ('type({v}) is str and _datetime_match({v}) is not None', _coerce_datetime),
+    ColumnDataType.STRING: ('type({v}) is str', _coerce_string),
+}
+
+
+def _unknown_column(names, values):
+    unknown = [name for name in values if name not in names]
+    raise _RowRejected(unknown[0], f'{unknown[0]!r} is not a column of the table')
+
+
+def _compile_coercer(table: Table):
+    """Generates a function checking and coercing a row dict, returning a new dict without null values"""
+    names = frozenset(column.name for column in table.columns)
+    namespace = {
+        '_names': names,
+        '_unknown_column': _unknown_column,
+        '_isfinite': math.isfinite,
+        '_datetime_match': datetime_regex.fullmatch,
+    }
+    lines = [
+        'def coerce(values):',
+        '    if not _names.issuperset(values):',
+        '        _unknown_column(_names, values)',
+        '    get = values.get',
+        '    row = {}',
+    ]
+
+    for index, column in enumerate(table.columns):
+        value = f'v{index}'
+        lines.append(f'    {value} = get({column.name!r})')
+        lines.append(f'    if {value} is not None:')
+
+        data_type = _data_types_by_name.get(str(column.data_type).lower())
+        if data_type is not None:
+            check, coercer = _checks[data_type]
+            namespace[f'_coerce{index}'] = coercer
+            lines.append(f'        if not ({check.format(v=value)}):')
+            lines.append(f'            {value} = _coerce{index}({column.name!r}, {value})')
+
+        lines.append(f'        row[{column.name!r}] = {value}')
+
+    lines.append('    return row')
+
+    return compile_function('coerce', lines, namespace)
+
+
+class RowValidator:
+    """Checks and coerces rows against a table's columns
+
+    Null values are allowed in every column and left out of the coerced rows. Values are coerced where nothing is lost,
+    e.g. '1' or 1.0 to an Int64 column and datetimes to DateTime columns as ISO 8601 strings. Rows with values that
+    cannot be coerced or with keys that are not columns of the table are rejected.
+    """
+    def __init__(self, table: Table):
+        """Constructs a RowValidator
+
+        :param table: The table, with its columns
+        """
+        if not table.columns:
+            raise RuntimeError(f'Table {table.name} has no column definitions to validate rows against')
+
+        self.table = table
+        self._coerce = _compile_coercer(table)
+
+    def validate(self, rows: Iterable[Any]) -> Tuple[List[Dict[str, Any]], List[RejectedRow]]:
+        """Validates and coerces rows
+
+        :param rows: The rows, as dicts or Row objects
+        :return: The coerced rows as dicts and the rejected rows
+        """
+        coerce = self._coerce
+        valid = []
+        rejected = []
+
+        for index, row in enumerate(rows):
+            values = row.to_dict() if type(row) is Row else row
+            if type(values) is not dict and not isinstance(values, Mapping):
+                rejected.append(RejectedRow(index, row, None, f'{type(row).__name__} is not a row'))
+                continue
+
+            try:
+                valid.append(coerce(values))
+            except _RowRejected as error:
+                rejected.append(RejectedRow(index, row, error.column, error.reason))
+
+        return valid, rejected
+
+    def __repr__(self):
+        return f'<RowValidator {self.table.name}>'
+
+
+def validate_rows(validator: RowValidator, rows: Sequence[Any], reject_sink=None) -> List[Dict[str, Any]]:
+    """Validates rows, routing rejected rows to a sink
+
+    :param validator: The validator of the table
+    :param rows: The rows, as dicts or Row objects
+    :param reject_sink: Callable taking the list of rejected rows, e.g. a list's extend. If None, rejected rows raise
+     a RowValidationError.
+    :return: The coerced rows
+    """
+    valid, rejected = validator.validate(rows)
+
+    if rejected:
+        if reject_sink is None:
+            raise RowValidationError(rejected)
+        reject_sink(rejected)
+
+    return valid